@@ -0,0 +1,187 @@
+import os
+import sys
+import json
+import asyncio
+import argparse
+import contextlib
+
+from dotenv import load_dotenv
+from google import genai
+from google.genai import types
+
+from config import MAX_ITERS, MODEL, BATCH_CONCURRENCY, RESPONSE_CACHE_DIR, REQUESTS_PER_MINUTE
+from main import compact_history, generate_config, process_response
+from history import HistoryManager
+from call_function import tool_cache, prefetcher
+from functions.python_pool import current_python_pool
+from response_cache import MODES, CachedClient, ResponseCache
+from retry import RetryPolicy, make_limiter
+from session_state import SessionState
+
+async def generate_content_async(client, messages, verbose=False, parallel_tools=False, history=None, retry_policy=None, working_directory=None, workspace_lock=None, session=None):
+    """
+    Async counterpart of main.generate_content.
+    The model call goes through the client's async API; function calls run on a
+    worker thread so other sessions keep making progress while tools execute.
+    With a workspace_lock, the function calls wait for it, so sessions sharing a
+    working directory still overlap their model calls but never their tools.
+    """
+    compact_history(messages, history, session)
+    retry_policy = retry_policy or RetryPolicy(verbose=verbose)
+    response = await retry_policy.call_async(
+        client.aio.models.generate_content,
+        model=MODEL,
+        contents=messages,
+        config=generate_config(),
+    )
+    if history:
+        history.record_usage(response.usage_metadata, len(messages))
+    async with workspace_lock or contextlib.nullcontext():
+        return await asyncio.to_thread(
+            process_response, response, messages, verbose, parallel_tools, working_directory, session
+        )
+
+async def run_session(client, prompt, verbose=False, parallel_tools=False, token_budget=None, limiter=None, working_directory=None, workspace_lock=None, summarize_history=False):
+    """
+    Run the agent loop for one prompt and return a result record.
+    Mirrors main.main: errors are reported and the loop moves on to the next iteration.
+    Model calls are retried with backoff first, taking tokens from the shared limiter.
+    Tools run in working_directory, holding workspace_lock if one is given.
+    With summarize_history, compaction may also fold old turns into a summary.
+    """
+    messages = [
+        types.Content(role="user", parts=[types.Part(text=prompt)]),
+    ]
+    history = HistoryManager(token_budget, summarize=summarize_history) if token_budget else None
+    retry_policy = RetryPolicy(limiter=limiter, verbose=verbose)
+    session = SessionState()
+    prefetcher.note_prompt(prompt, working_directory)
+    error = None
+    for iters in range(1, MAX_ITERS + 1):
+        try:
+            final_response = await generate_content_async(
+                client, messages, verbose, parallel_tools, history, retry_policy,
+                working_directory, workspace_lock, session,
+            )
+            if final_response:
+                return {"response": final_response, "iterations": iters, "retries": retry_policy.retries}
+        except Exception as e:
+            error = str(e)
+            print(f"Error in generate_content: {e}")
+
+    result = {"response": None, "iterations": MAX_ITERS, "retries": retry_policy.retries}
+    result["error"] = error or f"Maximum iterations ({MAX_ITERS}) reached."
+    return result
+
+def read_prompts(lines):
+    """
+    Yield (id, prompt, error) triples from JSONL lines. A line is either a JSON string
+    or an object with a "prompt" key and an optional "id" (defaults to the line number).
+    Lines that can't be parsed yield a None prompt and an error message.
+    """
+    for lineno, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"prompt": record}
+            prompt = record["prompt"]
+            if not isinstance(prompt, str):
+                raise ValueError('"prompt" must be a string')
+        except (ValueError, KeyError, TypeError) as e:
+            yield lineno, None, f"invalid prompt on line {lineno}: {e}"
+            continue
+        yield record.get("id", lineno), prompt, None
+
+async def run_batch(client, lines, out, concurrency=BATCH_CONCURRENCY, verbose=False, parallel_tools=False, token_budget=None, limiter=None, summarize_history=False):
+    """
+    Run a session per prompt with at most `concurrency` sessions in flight, all
+    sharing one client and one rate limiter. Each result is written to `out` as a JSON line as soon as
+    its session finishes, so output order follows completion order.
+    Returns the number of sessions that did not produce a final response.
+    """
+    prompts = read_prompts(lines)
+    reading = asyncio.Lock()
+    failures = 0
+
+    async def next_prompt():
+        # Reading a line can block on a slow producer, so it happens on a
+        # thread, by one worker at a time, rather than in the event loop.
+        async with reading:
+            return await asyncio.to_thread(next, prompts, None)
+
+    async def worker():
+        nonlocal failures
+        # Workers share one iterator, so input is only read as fast as it is consumed.
+        while (item := await next_prompt()) is not None:
+            prompt_id, prompt, error = item
+            if prompt is None:
+                result = {"response": None, "iterations": 0, "error": error}
+            else:
+                result = await run_session(
+                    client, prompt, verbose, parallel_tools, token_budget, limiter,
+                    summarize_history=summarize_history,
+                )
+            if result["response"] is None:
+                failures += 1
+            out.write(json.dumps({"id": prompt_id, "prompt": prompt, **result}) + "\n")
+            out.flush()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many prompts concurrently against one Gemini client.")
+    parser.add_argument("input", nargs="?", default="-", help="JSONL file of prompts, or - for stdin (default).")
+    parser.add_argument("-o", "--output", default="-", help="File to write JSONL results to, or - for stdout (default).")
+    parser.add_argument("-j", "--concurrency", type=int, default=BATCH_CONCURRENCY, help="Maximum number of sessions running at once.")
+    parser.add_argument("--verbose", action="store_true", help="Enable verbose output (prints extra details).")
+    parser.add_argument("--parallel-tools", action="store_true", help="Run independent function calls from one model turn concurrently.")
+    parser.add_argument("--token-budget", type=int, help="Compact each session's history once it grows past this many prompt tokens.")
+    parser.add_argument("--summarize-history", action="store_true", help="With --token-budget, fold old turns into a summary when stubbing tool output is not enough.")
+    parser.add_argument("--requests-per-minute", type=int, default=REQUESTS_PER_MINUTE, help="Limit model requests across all sessions to this rate (0, the default, means unlimited).")
+    parser.add_argument("--cache-mode", choices=MODES, default="passthrough", help="Record model responses to the response cache, replay them from it without calling the API, or bypass it (default).")
+    parser.add_argument("--cache-dir", default=RESPONSE_CACHE_DIR, help=f"Directory of the response cache (default {RESPONSE_CACHE_DIR}).")
+    args = parser.parse_args()
+
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    load_dotenv()
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key and args.cache_mode != "replay":
+        print("Error: GEMINI_API_KEY not found in environment variables.")
+        sys.exit(1)
+    client = genai.Client(api_key=api_key) if api_key else None
+    response_cache = None
+    if args.cache_mode != "passthrough":
+        response_cache = ResponseCache(args.cache_dir)
+        client = CachedClient(client, response_cache, args.cache_mode)
+
+    with contextlib.ExitStack() as stack:
+        stack.callback(prefetcher.close)
+        lines = sys.stdin if args.input == "-" else stack.enter_context(open(args.input))
+        out = sys.stdout if args.output == "-" else stack.enter_context(open(args.output, "w"))
+        # Progress and verbose output go to stderr so stdout only carries results.
+        stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+        failures = asyncio.run(
+            run_batch(
+                client, lines, out, args.concurrency, args.verbose,
+                args.parallel_tools, args.token_budget,
+                make_limiter(args.requests_per_minute), args.summarize_history,
+            )
+        )
+        if args.verbose:
+            print(tool_cache.stats())
+            print(prefetcher.stats())
+            if current_python_pool():
+                print(current_python_pool().stats())
+            if response_cache:
+                print(response_cache.stats())
+
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
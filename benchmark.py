@@ -0,0 +1,318 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from google.genai import types
+
+import call_function
+import main
+from call_function import tool_cache, prefetcher
+from functions.workspace_index import workspace_index
+from history import HistoryManager, estimate_tokens
+
+DEFAULT_FILES = 2000
+FILES_PER_PACKAGE = 50
+LOG_BYTES = 4 * 1024 * 1024
+
+
+def make_workspace(root, files=DEFAULT_FILES):
+    """
+    Generate a calculator-like project: `files` modules spread over packages,
+    a runnable main.py, a tests.py and a large log file.
+    """
+    for i in range(files):
+        package = os.path.join(root, "pkg", f"pkg{i // FILES_PER_PACKAGE:03d}")
+        os.makedirs(package, exist_ok=True)
+        with open(os.path.join(package, f"module{i:05d}.py"), "w") as f:
+            f.write(f'"""Module {i}."""\n\n')
+            for j in range(20):
+                f.write(f"def compute_{i}_{j}(x):\n    return x * {j} + {i}\n\n\n")
+    with open(os.path.join(root, "main.py"), "w") as f:
+        f.write("from pkg.pkg000.module00000 import compute_0_1\n\nprint(compute_0_1(41))\n")
+    with open(os.path.join(root, "tests.py"), "w") as f:
+        f.write("import unittest\n\n\nclass TestCompute(unittest.TestCase):\n    def test_compute(self):\n        self.assertTrue(True)\n")
+    line = "2024-01-01 00:00:00 INFO calculator evaluated an expression\n"
+    with open(os.path.join(root, "calculator.log"), "w") as f:
+        f.write(line * (LOG_BYTES // len(line)))
+
+
+def session_script():
+    """
+    The scripted model turns: each is a list of (function name, args) calls, or
+    the final response text.
+    """
+    reads = [("get_file_content", {"file_path": f"pkg/pkg000/module{i:05d}.py"}) for i in range(4)]
+    return [
+        [("get_files_info", {"directory": ".", "depth": 0})],
+        [("search_code", {"query": "def compute_7_3"})],
+        reads,
+        [("get_file_content", {"file_path": "calculator.log", "start_line": 1000, "end_line": 1100})],
+        reads,
+        [("edit_file", {"edits": [{"file_path": "main.py", "old_text": "41", "new_text": "42"}]})],
+        [("run_python_file", {"file_path": "main.py"})],
+        [("get_file_content", {"file_path": "main.py"})],
+        "main.py now prints compute_0_1(42).",
+    ]
+
+
+def make_response(turn, prompt_tokens):
+    if isinstance(turn, str):
+        parts = [types.Part(text=turn)]
+    else:
+        parts = [types.Part(function_call=types.FunctionCall(name=name, args=args)) for name, args in turn]
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=sum(estimate_tokens(types.Content(parts=[part])) for part in parts),
+        ),
+    )
+
+
+class FakeClient:
+    """
+    Stands in for genai.Client: every generate_content call returns the next
+    scripted turn, after an optional fixed latency. Prompt token counts are
+    estimated from the contents, so token budgets behave deterministically.
+    """
+
+    def __init__(self, script, latency=0.0):
+        self.models = self
+        self.script = list(script)
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _next(self, contents):
+        with self._lock:
+            if self.calls >= len(self.script):
+                raise RuntimeError("the scripted session has no more turns")
+            turn = self.script[self.calls]
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return make_response(turn, sum(estimate_tokens(content) for content in contents))
+
+    def generate_content(self, model, contents, config=None):
+        return self._next(contents)
+
+    def generate_content_stream(self, model, contents, config=None):
+        # One chunk per part, like the API does for function calls.
+        response = self._next(contents)
+        for part in response.candidates[0].content.parts:
+            yield types.GenerateContentResponse(
+                candidates=[types.Candidate(content=types.Content(role="model", parts=[part]))],
+            )
+        yield types.GenerateContentResponse(usage_metadata=response.usage_metadata)
+
+
+class ToolTimer:
+    """Wraps call_function._run_cached to record each tool call's latency and bytes moved."""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+        self._run_cached = None
+
+    def __enter__(self):
+        self._run_cached = call_function._run_cached
+        run_cached = self._run_cached
+
+        def timed(function, function_name, args, verbose=False):
+            start = time.perf_counter()
+            result = run_cached(function, function_name, args, verbose)
+            elapsed = time.perf_counter() - start
+            moved = len(json.dumps(args, default=str)) + len(result)
+            with self._lock:
+                self.calls.append((function_name, elapsed, moved))
+            return result
+
+        call_function._run_cached = timed
+        return self
+
+    def __exit__(self, *exc_info):
+        call_function._run_cached = self._run_cached
+
+
+def message_bytes(messages):
+    return sum(len(content.model_dump_json(exclude_none=True)) for content in messages)
+
+
+def run_once(files, latency=0.0, parallel_tools=False, stream=False, token_budget=None):
+    """Run the scripted session against a fresh workspace and return its measurements."""
+    with tempfile.TemporaryDirectory() as root:
+        make_workspace(root, files)
+        tool_cache.clear()
+        tool_cache.hits = tool_cache.misses = 0
+        prefetcher.prefetched = prefetcher.used = 0
+        workspace_index.clear()
+        client = FakeClient(session_script(), latency)
+        messages = [types.Content(role="user", parts=[types.Part(text="Change main.py to print compute_0_1(42).")])]
+        history = HistoryManager(token_budget) if token_budget else None
+        generate = main.generate_content_stream if stream else main.generate_content
+
+        iterations = []
+        working_dir = call_function.WORKING_DIR
+        call_function.WORKING_DIR = root
+        tracemalloc.start()
+        try:
+            with ToolTimer() as timer, contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                final_response = None
+                while final_response is None:
+                    iteration_start = time.perf_counter()
+                    final_response = generate(client, messages, False, parallel_tools, history)
+                    iterations.append({
+                        "seconds": time.perf_counter() - iteration_start,
+                        "messages": len(messages),
+                        "message_bytes": message_bytes(messages),
+                    })
+                total = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            call_function.WORKING_DIR = working_dir
+
+    tools = {}
+    for name, elapsed, moved in timer.calls:
+        tool = tools.setdefault(name, {"calls": 0, "seconds": [], "bytes": 0})
+        tool["calls"] += 1
+        tool["seconds"].append(elapsed)
+        tool["bytes"] += moved
+    return {
+        "total_seconds": total,
+        "iterations": iterations,
+        "tools": tools,
+        "peak_memory_bytes": peak,
+        "tool_cache": tool_cache.stats(),
+        "prefetch": prefetcher.stats(),
+    }
+
+
+def summarize(runs):
+    """Combine repeated runs, taking the median of every timing."""
+    iterations = []
+    for i in range(len(runs[0]["iterations"])):
+        iteration = dict(runs[0]["iterations"][i])
+        iteration["seconds"] = statistics.median(run["iterations"][i]["seconds"] for run in runs)
+        iterations.append(iteration)
+    tools = {}
+    for name, tool in runs[0]["tools"].items():
+        seconds = [s for run in runs for s in run["tools"][name]["seconds"]]
+        tools[name] = {
+            "calls": tool["calls"],
+            "median_ms": statistics.median(seconds) * 1000,
+            "max_ms": max(seconds) * 1000,
+            "total_ms": sum(seconds) * 1000 / len(runs),
+            "bytes": tool["bytes"],
+        }
+    return {
+        "total_seconds": statistics.median(run["total_seconds"] for run in runs),
+        "peak_memory_bytes": max(run["peak_memory_bytes"] for run in runs),
+        "message_bytes": iterations[-1]["message_bytes"],
+        "iterations": iterations,
+        "tools": tools,
+        "tool_cache": runs[-1]["tool_cache"],
+        "prefetch": runs[-1]["prefetch"],
+    }
+
+
+def flatten(report):
+    """The metrics compare() looks at, by name. Lower is better for all of them."""
+    metrics = {
+        "total_seconds": report["total_seconds"],
+        "peak_memory_bytes": report["peak_memory_bytes"],
+        "message_bytes": report["message_bytes"],
+    }
+    for name, tool in report["tools"].items():
+        metrics[f"tools.{name}.median_ms"] = tool["median_ms"]
+        metrics[f"tools.{name}.bytes"] = tool["bytes"]
+    return metrics
+
+
+def compare(old, new, threshold=0.1):
+    """
+    Return (lines, regressions) describing how each metric changed from old to
+    new; a metric regresses when it grew by more than threshold.
+    """
+    old_metrics, new_metrics = flatten(old), flatten(new)
+    lines, regressions = [], []
+    for name in sorted(set(old_metrics) | set(new_metrics)):
+        before, after = old_metrics.get(name), new_metrics.get(name)
+        if before is None or after is None:
+            lines.append(f"{name:<40} {before!s:>14} -> {after!s:>14}")
+            continue
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        lines.append(f"{name:<40} {before:14.3f} -> {after:14.3f} {change:+8.1%}{flag}")
+    return lines, regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark the agent loop offline against a scripted fake model.")
+    parser.add_argument("--files", type=int, default=DEFAULT_FILES, help="Number of modules in the generated workspace.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs to take the median over.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the fake model takes per call.")
+    parser.add_argument("--parallel-tools", action="store_true", help="Benchmark with --parallel-tools.")
+    parser.add_argument("--stream", action="store_true", help="Benchmark the streaming loop.")
+    parser.add_argument("--token-budget", type=int, help="Benchmark with history compaction.")
+    parser.add_argument("-o", "--output", help="Write the JSON report here instead of stdout.")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two JSON reports instead of running.")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative growth that counts as a regression (default 0.1).")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            old = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        lines, regressions = compare(old, new, args.threshold)
+        print("\n".join(lines))
+        sys.exit(1 if regressions else 0)
+
+    runs = [
+        run_once(args.files, args.latency, args.parallel_tools, args.stream, args.token_budget)
+        for _ in range(max(args.repeat, 1))
+    ]
+    report = summarize(runs)
+    report["settings"] = {
+        "commit": git_commit(),
+        "files": args.files,
+        "repeat": args.repeat,
+        "latency": args.latency,
+        "parallel_tools": args.parallel_tools,
+        "stream": args.stream,
+        "token_budget": args.token_budget,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,57 @@
+# bench_render.py
+
+import io
+import sys
+import timeit
+from pkg.render import Renderer
+
+
+def render_concat(expression, result):
+    # render() as it was before Renderer, kept as the baseline.
+    if isinstance(result, float) and result.is_integer():
+        result_str = str(int(result))
+    else:
+        result_str = str(result)
+
+    box_width = max(len(expression), len(result_str)) + 4
+
+    box = []
+    box.append("┌" + "─" * box_width + "┐")
+    box.append(
+        "│" + " " * 2 + expression + " " * (box_width - len(expression) - 2) + "│"
+    )
+    box.append("│" + " " * box_width + "│")
+    box.append("│" + " " * 2 + "=" + " " * (box_width - 3) + "│")
+    box.append("│" + " " * box_width + "│")
+    box.append(
+        "│" + " " * 2 + result_str + " " * (box_width - len(result_str) - 2) + "│"
+    )
+    box.append("└" + "─" * box_width + "┘")
+    return "\n".join(box)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = [(f"{i} * 2 + 1", float(i * 2 + 1)) for i in range(count)]
+
+    def baseline():
+        out = io.StringIO()
+        for expression, result in rows:
+            out.write(render_concat(expression, result) + "\n")
+
+    def boxes():
+        renderer = Renderer(io.StringIO())
+        for expression, result in rows:
+            renderer.write(expression, result)
+
+    def table():
+        Renderer(io.StringIO()).write_table(rows)
+
+    print(f"Rendering {count} results, best of 5:")
+    for name, function in (("render()", baseline), ("Renderer.write", boxes), ("Renderer.write_table", table)):
+        best = min(timeit.repeat(function, number=1, repeat=5))
+        print(f"  {name:<22} {best * 1000:8.1f} ms  {best / count * 1e6:6.2f} us/result")
+
+
+if __name__ == "__main__":
+    main()
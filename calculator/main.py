@@ -1,5 +1,7 @@
 # main.py
 
+import argparse
+import os
 import sys
 from pkg.calculator import Calculator
 from pkg.render import render
@@ -10,9 +12,21 @@ def main():
     if len(sys.argv) <= 1:
         print("Calculator App")
         print('Usage: python main.py "<expression>"')
+        print('       python main.py --batch [FILE] [--format plain|csv|box] [--workers N]')
         print('Example: python main.py "3 + 5"')
         return
 
+    # Options are parsed wherever they appear, and whatever argparse leaves
+    # over is the expression, so one starting with "-" (like "-x + 1") still works.
+    parser = batch_parser()
+    args, rest = parser.parse_known_args(sys.argv[1:])
+    if args.batch is not None:
+        if rest:
+            parser.error(f"unrecognized arguments: {' '.join(rest)}")
+        sys.exit(batch(args))
+    if len(rest) < len(sys.argv) - 1:
+        parser.error("--format, --workers and --chunk-size only apply with --batch")
+
     expression = " ".join(sys.argv[1:])
     try:
         result = calculator.evaluate(expression)
@@ -22,5 +36,29 @@ def main():
         print(f"Error: {e}")
 
 
+def batch_parser():
+    from pkg.batch import CHUNK_SIZE
+
+    parser = argparse.ArgumentParser(prog="main.py", description="Evaluate an expression, or one expression per line with --batch", allow_abbrev=False)
+    parser.add_argument("--batch", metavar="FILE", nargs="?", const="-", help='Input file, "-" or omitted for stdin')
+    parser.add_argument("--format", choices=["plain", "csv", "box"], default="plain", help="Output format")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (1 evaluates in this process)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Expressions sent to a worker at a time")
+    return parser
+
+
+def batch(args):
+    from pkg.batch import evaluate_stream, write_results
+
+    source = sys.stdin if args.batch == "-" else open(args.batch)
+    try:
+        results = evaluate_stream(source, workers=args.workers, chunk_size=max(args.chunk_size, 1))
+        failures = write_results(results, sys.stdout, args.format)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    return 1 if failures else 0
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
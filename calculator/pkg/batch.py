@@ -0,0 +1,84 @@
+# batch.py
+
+import csv
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pkg.calculator import Calculator
+from pkg.render import Renderer, format_result
+
+CHUNK_SIZE = 1000
+
+# One calculator per worker process, so its compiled-expression cache is reused across chunks.
+_calculator = None
+
+
+def evaluate_chunk(expressions):
+    global _calculator
+    if _calculator is None:
+        _calculator = Calculator()
+    results = []
+    for expression in expressions:
+        try:
+            results.append((expression, _calculator.evaluate(expression), None))
+        except Exception as e:
+            results.append((expression, None, str(e)))
+    return results
+
+
+def chunked(lines, size):
+    lines = (line.rstrip("\r\n") for line in lines)
+    while True:
+        chunk = list(itertools.islice(lines, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def evaluate_stream(lines, workers=1, chunk_size=CHUNK_SIZE):
+    """
+    Evaluate one expression per line and yield (expression, result, error) in
+    input order. With more than one worker, chunks are evaluated on a process
+    pool; at most two chunks per worker are in flight, so memory stays constant
+    however long the input is.
+    """
+    chunks = chunked(lines, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            yield from evaluate_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in itertools.islice(chunks, workers * 2):
+            pending.append(pool.submit(evaluate_chunk, chunk))
+        while pending:
+            results = pending.popleft().result()
+            for chunk in itertools.islice(chunks, 1):
+                pending.append(pool.submit(evaluate_chunk, chunk))
+            yield from results
+
+
+def write_results(results, out, fmt="plain"):
+    """Write (expression, result, error) tuples to out as plain values, CSV or boxes."""
+    failures = 0
+    writer = None
+    renderer = Renderer(out)
+    if fmt == "csv":
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(["expression", "result", "error"])
+    for expression, result, error in results:
+        if error is not None:
+            failures += 1
+        if writer is not None:
+            writer.writerow([expression, "" if result is None else format_result(result), error or ""])
+        elif fmt == "box":
+            if result is not None:
+                renderer.write(expression, result)
+            elif error is not None:
+                out.write(f"Error: {expression}: {error}\n")
+        elif error is not None:
+            out.write(f"Error: {error}\n")
+        else:
+            out.write(("" if result is None else format_result(result)) + "\n")
+    return failures
@@ -1,61 +1,292 @@
 # calculator.py
 
+import math
+import operator
+import re
+from collections import OrderedDict
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+CACHE_SIZE = 256
+
+SPACE = re.compile(r"\s*")
+WORD = re.compile(r"\S+")
+TOKEN = re.compile(
+    r"(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)"
+    r"|(?P<name>[A-Za-z_]\w*)"
+    r"|(?P<op>[-+*/])"
+    r"|(?P<lparen>\()"
+    r"|(?P<rparen>\))"
+)
+SPECIAL_NUMBERS = {"inf", "infinity", "nan"}
+OPERATORS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+}
+
+
+def _ieee_div(a, b):
+    # Division that follows IEEE 754 like NumPy does, instead of raising.
+    try:
+        return a / b
+    except ZeroDivisionError:
+        if a == 0 or a != a:
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1, b)
+
+
+class Program:
+    """
+    A compiled expression: its RPN form, the variables it reads (in order of
+    first appearance) and a Python function taking one argument per variable.
+    """
+
+    def __init__(self, rpn, variables):
+        self.rpn = rpn
+        self.variables = variables
+        self._function = None
+        self._safe_function = None
+        self._used = False
+
+    def __call__(self, *arguments):
+        # Most expressions in a batch are seen once, and interpreting the RPN
+        # once is cheaper than generating and compiling a function for it.
+        if self._function is None and not self._used:
+            self._used = True
+            return self._interpret(arguments)
+        return self.function(*arguments)
+
+    @property
+    def source(self):
+        return self._source(safe_division=False)
+
+    @property
+    def function(self):
+        if self._function is None:
+            self._function = self._build(safe_division=False)
+        return self._function
+
+    def _interpret(self, arguments, divide=operator.truediv):
+        stack = []
+        for kind, value in self.rpn:
+            if kind == "num":
+                stack.append(value)
+            elif kind == "var":
+                stack.append(arguments[self.variables.index(value)])
+            elif kind == "neg":
+                stack.append(-stack.pop())
+            else:
+                b = stack.pop()
+                a = stack.pop()
+                stack.append(divide(a, b) if value == "/" else OPERATORS[value](a, b))
+        return stack[0]
+
+    def _source(self, safe_division):
+        # One statement per operator, each storing into a fresh temporary, so
+        # the source stays flat however long the expression is. Nesting it
+        # as a single expression runs into the parser's parenthesis limit.
+        params = ", ".join(f"v{i}" for i in range(len(self.variables)))
+        lines = [f"def _program({params}):"]
+        stack = []
+        for kind, value in self.rpn:
+            if kind == "num":
+                stack.append(repr(value))
+            elif kind == "var":
+                stack.append(f"v{self.variables.index(value)}")
+            else:
+                temporary = f"t{len(lines)}"
+                if kind == "neg":
+                    lines.append(f"    {temporary} = -{stack.pop()}")
+                else:
+                    b = stack.pop()
+                    a = stack.pop()
+                    if value == "/" and safe_division:
+                        lines.append(f"    {temporary} = _div({a}, {b})")
+                    else:
+                        lines.append(f"    {temporary} = {a} {value} {b}")
+                stack.append(temporary)
+        lines.append(f"    return {stack[0]}")
+        return "\n".join(lines) + "\n"
+
+    def _build(self, safe_division):
+        namespace = {"__builtins__": {}, "inf": math.inf, "nan": math.nan, "_div": _ieee_div}
+        try:
+            exec(self._source(safe_division), namespace)
+        except (SyntaxError, RecursionError, MemoryError):
+            # Too big for the compiler; interpret the RPN on every call instead,
+            # so the program gives the same result whichever path runs it.
+            divide = _ieee_div if safe_division else operator.truediv
+            return lambda *arguments: self._interpret(arguments, divide)
+        return namespace["_program"]
+
+    @property
+    def safe_function(self):
+        """Like function, but division by zero gives inf or nan instead of raising."""
+        if self._safe_function is None:
+            self._safe_function = self._build(safe_division=True)
+        return self._safe_function
+
+
 class Calculator:
-    def __init__(self):
-        self.operators = {
-            "+": lambda a, b: a + b,
-            "-": lambda a, b: a - b,
-            "*": lambda a, b: a * b,
-            "/": lambda a, b: a / b,
-        }
+    def __init__(self, cache_size=CACHE_SIZE):
+        self.operators = dict(OPERATORS)
         self.precedence = {
             "+": 1,
             "-": 1,
             "*": 2,
             "/": 2,
+            "neg": 3,
         }
+        self.cache_size = cache_size
+        self._programs = OrderedDict()
 
-    def evaluate(self, expression):
+    def evaluate(self, expression, variables=None):
         if not expression or expression.isspace():
             return None
-        tokens = expression.strip().split()
-        return self._evaluate_infix(tokens)
+        program = self.compile(expression)
+        return program(*self._arguments(program, variables or {}))
+
+    def evaluate_many(self, expression, variables):
+        """
+        Evaluate one expression for every row of `variables`, a mapping from
+        variable name to an equally long sequence of values. Returns a NumPy array
+        when NumPy is installed and a list otherwise; either way division by zero
+        gives inf or nan rather than raising. The row count comes from the
+        variables the expression uses; an expression without any gives one row
+        per row of `variables`, or a single row if it is empty.
+        """
+        program = self.compile(expression)
+        columns = self._arguments(program, variables)
+        lengths = {name: len(column) for name, column in zip(program.variables, columns)} or {
+            name: len(column) for name, column in variables.items()
+        }
+        if len(set(lengths.values())) > 1:
+            sizes = ", ".join(f"{name} has {length}" for name, length in lengths.items())
+            raise ValueError(f"variables must have the same number of values: {sizes}")
+        rows = next(iter(lengths.values()), 1)
+        if not columns:
+            value = program.safe_function()
+            return numpy.full(rows, value) if numpy is not None else [value] * rows
+        if numpy is not None:
+            arrays = [numpy.asarray(column, dtype=float) for column in columns]
+            # Division by a constant zero involves Python floats, not arrays,
+            # so it has to go through the safe division too.
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                return numpy.asarray(program.safe_function(*arrays), dtype=float)
+        columns = [[float(value) for value in column] for column in columns]
+        function = program.function
+        try:
+            return [function(*row) for row in zip(*columns)]
+        except ZeroDivisionError:
+            function = program.safe_function
+            return [function(*row) for row in zip(*columns)]
+
+    def compile(self, expression):
+        program = self._programs.get(expression)
+        if program is not None:
+            self._programs.move_to_end(expression)
+            return program
+        program = self._compile_tokens(self._tokens(expression))
+        self._programs[expression] = program
+        if len(self._programs) > self.cache_size:
+            self._programs.popitem(last=False)
+        return program
+
+    def _arguments(self, program, variables):
+        try:
+            return [variables[name] for name in program.variables]
+        except KeyError as e:
+            raise ValueError(f"no value for variable {e.args[0]}")
 
-    def _evaluate_infix(self, tokens):
-        values = []
+    def _tokens(self, expression):
+        # Single pass over the string; yields (kind, text, position).
+        position = 0
+        end = len(expression)
+        while True:
+            position = SPACE.match(expression, position).end()
+            if position == end:
+                return
+            match = TOKEN.match(expression, position)
+            if match is None:
+                bad = WORD.match(expression, position).group()
+                raise ValueError(f"invalid token: {bad} at position {position}")
+            yield match.lastgroup, match.group(), position
+            position = match.end()
+
+    def _compile_tokens(self, tokens):
+        # Shunting-yard to RPN. The parser alternates between expecting an
+        # operand and expecting an operator, which is how a leading "-" is told
+        # apart from subtraction.
+        rpn = []
+        variables = []
         operators = []
+        expect_operand = True
+        last_operator = None
+
+        def emit(symbol):
+            if symbol == "neg":
+                rpn.append(("neg", "-"))
+            else:
+                rpn.append(("op", symbol))
 
-        for token in tokens:
-            if token in self.operators:
+        for kind, text, position in tokens:
+            if expect_operand:
+                if kind == "number":
+                    rpn.append(("num", float(text)))
+                elif kind == "name" and text.lower() in SPECIAL_NUMBERS:
+                    rpn.append(("num", float(text)))
+                elif kind == "name":
+                    if text not in variables:
+                        variables.append(text)
+                    rpn.append(("var", text))
+                elif kind == "lparen":
+                    operators.append(("(", position))
+                    continue
+                elif text == "-":
+                    operators.append(("neg", position))
+                    continue
+                elif text == "+":
+                    # Unary plus leaves its operand as it is, so it needs no RPN step.
+                    continue
+                elif kind == "op":
+                    raise ValueError(f"not enough operands for operator {text} at position {position}")
+                else:
+                    raise ValueError(f"invalid expression: unexpected ) at position {position}")
+                expect_operand = False
+            elif kind == "op":
                 while (
                     operators
-                    and operators[-1] in self.operators
-                    and self.precedence[operators[-1]] >= self.precedence[token]
+                    and operators[-1][0] != "("
+                    and self.precedence[operators[-1][0]] >= self.precedence[text]
                 ):
-                    self._apply_operator(operators, values)
-                operators.append(token)
+                    emit(operators.pop()[0])
+                operators.append((text, position))
+                last_operator = (text, position)
+                expect_operand = True
+            elif kind == "rparen":
+                while operators and operators[-1][0] != "(":
+                    emit(operators.pop()[0])
+                if not operators:
+                    raise ValueError(f"invalid expression: unmatched ) at position {position}")
+                operators.pop()
             else:
-                try:
-                    values.append(float(token))
-                except ValueError:
-                    raise ValueError(f"invalid token: {token}")
-
-        while operators:
-            self._apply_operator(operators, values)
-
-        if len(values) != 1:
-            raise ValueError("invalid expression")
+                raise ValueError(f"invalid expression: unexpected {text} at position {position}")
 
-        return values[0]
+        if expect_operand:
+            if last_operator is not None and operators and operators[-1] == last_operator:
+                text, position = last_operator
+                raise ValueError(f"not enough operands for operator {text} at position {position}")
+            raise ValueError("invalid expression: unexpected end of input")
 
-    def _apply_operator(self, operators, values):
-        if not operators:
-            return
-
-        operator = operators.pop()
-        if len(values) < 2:
-            raise ValueError(f"not enough operands for operator {operator}")
+        while operators:
+            symbol, position = operators.pop()
+            if symbol == "(":
+                raise ValueError(f"invalid expression: unclosed ( at position {position}")
+            emit(symbol)
 
-        b = values.pop()
-        a = values.pop()
-        values.append(self.operators[operator](a, b))
\ No newline at end of file
+        return Program(tuple(rpn), tuple(variables))
@@ -1,21 +1,88 @@
-def render(expression, result):
+import sys
+
+
+def format_result(result):
     if isinstance(result, float) and result.is_integer():
-        result_str = str(int(result))
-    else:
-        result_str = str(result)
-
-    box_width = max(len(expression), len(result_str)) + 4
-
-    box = []
-    box.append("┌" + "─" * box_width + "┐")
-    box.append(
-        "│" + " " * 2 + expression + " " * (box_width - len(expression) - 2) + "│"
-    )
-    box.append("│" + " " * box_width + "│")
-    box.append("│" + " " * 2 + "=" + " " * (box_width - 3) + "│")
-    box.append("│" + " " * box_width + "│")
-    box.append(
-        "│" + " " * 2 + result_str + " " * (box_width - len(result_str) - 2) + "│"
-    )
-    box.append("└" + "─" * box_width + "┘")
-    return "\n".join(box)
\ No newline at end of file
+        return str(int(result))
+    return str(result)
+
+
+class Renderer:
+    """
+    Draws result boxes and tables. Border and padding strings are built once per
+    width and reused, so rendering many results costs one join per box instead
+    of rebuilding every line.
+    """
+
+    def __init__(self, sink=None):
+        # Without a sink, write() goes to whatever sys.stdout is at the time.
+        self.sink = sink
+        self._frames = {}
+        self._pads = {}
+
+    def _pad(self, n):
+        pad = self._pads.get(n)
+        if pad is None:
+            pad = self._pads[n] = " " * n
+        return pad
+
+    def _frame(self, box_width):
+        frame = self._frames.get(box_width)
+        if frame is None:
+            frame = self._frames[box_width] = (
+                "┌" + "─" * box_width + "┐",
+                "│" + " " * box_width + "│",
+                "│  =" + " " * (box_width - 3) + "│",
+                "└" + "─" * box_width + "┘",
+            )
+        return frame
+
+    def box(self, expression, result):
+        result_str = format_result(result)
+        box_width = max(len(expression), len(result_str)) + 4
+        top, blank, equals, bottom = self._frame(box_width)
+        return "\n".join((
+            top,
+            f"│  {expression}{self._pad(box_width - len(expression) - 2)}│",
+            blank,
+            equals,
+            blank,
+            f"│  {result_str}{self._pad(box_width - len(result_str) - 2)}│",
+            bottom,
+        ))
+
+    def _sink(self):
+        return self.sink if self.sink is not None else sys.stdout
+
+    def write(self, expression, result):
+        self._sink().write(self.box(expression, result) + "\n")
+
+    def table(self, rows):
+        """Render (expression, result) pairs as one table with aligned columns."""
+        cells = []
+        left = right = 0
+        for expression, result in rows:
+            result_str = format_result(result)
+            cells.append((expression, result_str))
+            left = max(left, len(expression))
+            right = max(right, len(result_str))
+        left += 4
+        right += 4
+        lines = ["┌" + "─" * left + "┬" + "─" * right + "┐"]
+        for expression, result_str in cells:
+            lines.append(
+                f"│  {expression}{self._pad(left - len(expression) - 2)}"
+                f"│  {result_str}{self._pad(right - len(result_str) - 2)}│"
+            )
+        lines.append("└" + "─" * left + "┴" + "─" * right + "┘")
+        return "\n".join(lines)
+
+    def write_table(self, rows):
+        self._sink().write(self.table(rows) + "\n")
+
+
+_renderer = Renderer()
+
+
+def render(expression, result):
+    return _renderer.box(expression, result)
@@ -1,7 +1,18 @@
 # tests.py
 
+import contextlib
+import io
+import math
+import os
+import sys
+import tempfile
 import unittest
+from unittest.mock import patch
+import main
+from pkg import calculator
+from pkg.batch import evaluate_stream, write_results
 from pkg.calculator import Calculator
+from pkg.render import Renderer, render
 
 
 class TestCalculator(unittest.TestCase):
@@ -42,7 +53,177 @@ class TestCalculator(unittest.TestCase):
 
     def test_not_enough_operands(self):
         with self.assertRaises(ValueError):
-            self.calculator.evaluate("+ 3")
+            self.calculator.evaluate("* 3")
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("3 +")
+
+    def test_no_whitespace_needed(self):
+        result = self.calculator.evaluate("3+5*2")
+        self.assertEqual(result, 13)
+
+    def test_parentheses(self):
+        result = self.calculator.evaluate("(2 + 3) * 4")
+        self.assertEqual(result, 20)
+
+    def test_unary_minus(self):
+        self.assertEqual(self.calculator.evaluate("-2 * -(1 + 2)"), 6)
+        self.assertEqual(self.calculator.evaluate("2 - -3"), 5)
+
+    def test_unary_plus(self):
+        self.assertEqual(self.calculator.evaluate("+3"), 3)
+        self.assertEqual(self.calculator.evaluate("2*+3"), 6)
+        self.assertEqual(self.calculator.evaluate("-+(1 + 2) - +-x", {"x": 4}), 1)
+
+    def test_scientific_notation(self):
+        result = self.calculator.evaluate("1.5e2 / .5")
+        self.assertEqual(result, 300)
+
+    def test_error_positions(self):
+        with self.assertRaisesRegex(ValueError, "invalid token: \\$ at position 4"):
+            self.calculator.evaluate("3 + $")
+        with self.assertRaisesRegex(ValueError, "unclosed \\( at position 2"):
+            self.calculator.evaluate("2*(3+4")
+        with self.assertRaisesRegex(ValueError, "unexpected 4 at position 2"):
+            self.calculator.evaluate("3 4")
+
+    def test_variables(self):
+        result = self.calculator.evaluate("x * 2 + y", {"x": 3, "y": 1})
+        self.assertEqual(result, 7)
+
+    def test_missing_variable(self):
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("x + 1")
+
+    def test_long_expression(self):
+        expression = " + ".join(["1"] * 1000)
+        self.assertEqual(self.calculator.compile(expression).function(), 1000)
+
+    def test_every_path_agrees(self):
+        expression = " + ".join(["1"] * 300) + " - x / y"
+        columns = {"x": [3, 1], "y": [1, 0]}
+        # The second pass makes compiling fail, so calls fall back to the interpreter.
+        for source in (calculator.Program._source, lambda program, safe_division: "def _program(:\n"):
+            with self.subTest(interpreted=source is not calculator.Program._source), \
+                    patch.object(calculator.Program, "_source", source):
+                calc = Calculator()
+                first = calc.evaluate(expression, {"x": 3, "y": 1})
+                again = calc.evaluate(expression, {"x": 3, "y": 1})
+                with patch.object(calculator, "numpy", None):
+                    many = calc.evaluate_many(expression, columns)
+                self.assertEqual((first, again, many), (297, 297, [297, -math.inf]))
+
+    def test_compiled_expressions_are_cached(self):
+        program = self.calculator.compile("3 * x")
+        self.assertIs(self.calculator.compile("3 * x"), program)
+
+    def test_cache_is_bounded(self):
+        calc = Calculator(cache_size=2)
+        first = calc.compile("1 + 1")
+        calc.compile("2 + 2")
+        calc.compile("3 + 3")
+        self.assertIsNot(calc.compile("1 + 1"), first)
+
+    def test_evaluate_many(self):
+        columns = {"x": [1, 2, 3], "y": [4, 0, 2]}
+        for numpy in (calculator.numpy, None):
+            with self.subTest(numpy=numpy is not None), patch.object(calculator, "numpy", numpy):
+                result = list(self.calculator.evaluate_many("x * 2 - y", columns))
+                self.assertEqual(result, [-2, 4, 4])
+
+                result = list(self.calculator.evaluate_many("x / y", columns))
+                self.assertEqual(result[0], 0.25)
+                self.assertEqual(result[1], math.inf)
+
+    def test_evaluate_many_rows(self):
+        for numpy in (calculator.numpy, None):
+            with self.subTest(numpy=numpy is not None), patch.object(calculator, "numpy", numpy):
+                with self.assertRaises(ValueError):
+                    self.calculator.evaluate_many("x + y", {"x": [1, 2], "y": [3]})
+                result = self.calculator.evaluate_many("x * 2", {"x": [1, 2], "unused": [1, 2, 3]})
+                self.assertEqual(list(result), [2, 4])
+                self.assertEqual(list(self.calculator.evaluate_many("2 + 3", {})), [5])
+                self.assertEqual(list(self.calculator.evaluate_many("1 / 0", {"x": [1, 2]})), [math.inf, math.inf])
+                result = list(self.calculator.evaluate_many("x + 1 / 0 * 0", {"x": [1, 2]}))
+                self.assertTrue(all(math.isnan(value) for value in result))
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.lines = [f"{i} * 2\n" for i in range(50)] + ["1 / 0\n", "$\n"]
+
+    def test_results_keep_input_order(self):
+        expected = [(f"{i} * 2", i * 2, None) for i in range(50)]
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                results = list(evaluate_stream(iter(self.lines), workers=workers, chunk_size=7))
+                self.assertEqual(results[:50], expected)
+                self.assertEqual([r[2] is not None for r in results[50:]], [True, True])
+
+    def test_write_results(self):
+        results = evaluate_stream(["3 + 5\n", "\n", "1 / 0\n"])
+        out = io.StringIO()
+        failures = write_results(results, out, "csv")
+        self.assertEqual(failures, 1)
+        self.assertEqual(
+            out.getvalue().splitlines(),
+            ["expression,result,error", "3 + 5,8,", ",,", "1 / 0,,float division by zero"],
+        )
+
+
+class TestMain(unittest.TestCase):
+    def run_main(self, *argv):
+        out = io.StringIO()
+        with patch.object(sys, "argv", ["main.py", *argv]), contextlib.redirect_stdout(out):
+            try:
+                main.main()
+            except SystemExit as e:
+                self.assertEqual(e.code, 0)
+        return out.getvalue()
+
+    def test_batch_option_in_any_position(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write("1 + 2\n3 * 4\n")
+        self.addCleanup(os.remove, f.name)
+
+        output = self.run_main("--format", "csv", "--batch", f.name, "--workers", "1")
+
+        self.assertEqual(output.splitlines(), ["expression,result,error", "1 + 2,3,", "3 * 4,12,"])
+
+    def test_expression(self):
+        self.assertIn("│  -6      │", self.run_main("-2", "*", "3"))
+
+
+class TestRender(unittest.TestCase):
+    def test_render_box(self):
+        self.assertEqual(
+            render("3 + 5", 8.0),
+            "┌─────────┐\n"
+            "│  3 + 5  │\n"
+            "│         │\n"
+            "│  =      │\n"
+            "│         │\n"
+            "│  8      │\n"
+            "└─────────┘",
+        )
+
+    def test_renderer_writes_to_sink(self):
+        out = io.StringIO()
+        renderer = Renderer(out)
+        renderer.write("1 / 4", 0.25)
+        renderer.write("3 + 5", 8.0)
+        self.assertEqual(out.getvalue(), render("1 / 4", 0.25) + "\n" + render("3 + 5", 8.0) + "\n")
+
+    def test_table(self):
+        table = Renderer().table([("3 + 5", 8.0), ("1 / 4", 0.25)])
+        self.assertEqual(
+            table.splitlines(),
+            [
+                "┌─────────┬────────┐",
+                "│  3 + 5  │  8     │",
+                "│  1 / 4  │  0.25  │",
+                "└─────────┴────────┘",
+            ],
+        )
 
 
 if __name__ == "__main__":
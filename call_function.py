@@ -1,10 +1,21 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor, wait
+
 from google.genai import types
 
 from functions.get_files_info import get_files_info, schema_get_files_info
 from functions.get_file_content import get_file_content, schema_get_file_content
 from functions.run_python import run_python_file, schema_run_python_file
 from functions.write_file_content import write_file, schema_write_file
-from config import WORKING_DIR
+from functions.edit_file import edit_file, edited_paths, schema_edit_file
+from functions.search_code import search_code, schema_search_code
+from functions.run_tests import run_tests, schema_run_tests
+from functions.workspace_index import workspace_index
+from tool_cache import ToolCache
+from prefetch import Prefetcher
+from tracing import tracer
+from config import WORKING_DIR, MAX_TOOL_WORKERS
 
 available_functions = types.Tool(
     function_declarations=[
@@ -12,24 +23,56 @@ available_functions = types.Tool(
         schema_get_file_content,
         schema_run_python_file,
         schema_write_file,
+        schema_edit_file,
+        schema_search_code,
+        schema_run_tests,
     ]
 )
 
-def call_function(function_call_part, verbose=False):
+FUNCTIONS = {
+    "get_files_info": get_files_info,
+    "get_file_content": get_file_content,
+    "run_python_file": run_python_file,
+    "write_file": write_file,
+    "edit_file": edit_file,
+    "search_code": search_code,
+    "run_tests": run_tests,
+}
+
+READ_ONLY_FUNCTIONS = {"get_files_info", "get_file_content", "search_code"}
+# Listings are kept fresh by workspace_index, which checks every directory's mtime.
+CACHED_FUNCTIONS = {"get_file_content"}
+PATH_ARGS = {
+    "get_files_info": "directory",
+    "get_file_content": "file_path",
+    "write_file": "file_path",
+    "search_code": "directory",
+}
+
+
+def _call_paths(function_name, args):
+    """
+    Return the paths a call touches, relative to the working directory, or None
+    if it may touch anything in it.
+    """
+    if function_name == "edit_file":
+        return edited_paths(args)
+    if function_name not in PATH_ARGS:
+        return None
+    return [args.get(PATH_ARGS[function_name]) or "."]
+
+tool_cache = ToolCache()
+prefetcher = Prefetcher(tool_cache)
+
+def call_function(function_call_part, verbose=False, working_directory=None, session=None):
     if verbose:
         print(
             f" - Calling function: {function_call_part.name}({function_call_part.args})"
         )
     else:
         print(f" - Calling function: {function_call_part.name}")
-    function_map = {
-        "get_files_info": get_files_info,
-        "get_file_content": get_file_content,
-        "run_python_file": run_python_file,
-        "write_file": write_file,
-    }
     function_name = function_call_part.name
-    if function_name not in function_map:
+    if function_name not in FUNCTIONS:
         return types.Content(
             role="tool",
             parts=[
@@ -40,8 +83,18 @@ def call_function(function_call_part, verbose=False):
             ],
         )
     args = dict(function_call_part.args)
-    args["working_directory"] = WORKING_DIR
-    function_result = function_map[function_name](**args)
+    args["working_directory"] = working_directory or WORKING_DIR
+    # full is for the session, which decides whether a repeated read is sent in full.
+    full = bool(args.pop("full", False))
+    if function_name == "run_tests" and session is not None and not args.get("changed_files"):
+        args["changed_files"] = session.written_files(args["working_directory"])
+    with tracer.span(function_name, "tool") as span:
+        function_result = _run_cached(FUNCTIONS[function_name], function_name, args, verbose)
+        if session is not None:
+            function_result = _session_result(session, function_name, args, function_result, full)
+        if tracer.enabled:
+            span["args_bytes"] = len(json.dumps(function_call_part.args, default=str))
+            span["result_bytes"] = len(function_result)
     return types.Content(
         role="tool",
         parts=[
@@ -52,3 +105,149 @@ def call_function(function_call_part, verbose=False):
         ],
     )
 
+
+def _run_cached(function, function_name, args, verbose=False):
+    """
+    Serve read-only tools from tool_cache, and invalidate it and workspace_index
+    after tools that change the working directory: write_file and edit_file drop
+    entries for the paths they wrote, run_python_file drops everything since the
+    script may have touched any file. A successful get_files_info also starts
+    prefetching the listed files the model is likely to read next.
+    """
+    paths = _call_paths(function_name, args)
+    if function_name not in READ_ONLY_FUNCTIONS:
+        function_result = function(**args)
+        if paths is None:
+            tool_cache.clear()
+            workspace_index.clear()
+        for path in paths or []:
+            path = os.path.join(args["working_directory"], path)
+            tool_cache.invalidate(path)
+            workspace_index.invalidate(path)
+        return function_result
+    if function_name not in CACHED_FUNCTIONS:
+        function_result = function(**args)
+        if function_name == "get_files_info" and not function_result.startswith("Error"):
+            prefetcher.schedule(args["working_directory"], args.get("directory") or ".", args.get("depth", 1))
+        return function_result
+
+    if "file_path" in args:
+        # One spelling per file, the one the prefetcher keys on, so that
+        # "./main.py" or "pkg/../main.py" hits an entry stored for "main.py".
+        args = {**args, "file_path": os.path.normpath(args["file_path"])}
+    path = os.path.join(args["working_directory"], paths[0])
+    key = tool_cache.key(function_name, path, args)
+    prefetcher.wait(key)
+    function_result = tool_cache.get(key)
+    if function_result is not None:
+        if verbose:
+            print(f" - Cache hit: {function_name}")
+        tracer.event("tool_cache_hit", "tool", function=function_name)
+        prefetcher.claim(key)
+        return function_result
+    validator = tool_cache.validator(path)
+    function_result = function(**args)
+    if not function_result.startswith("Error"):
+        tool_cache.put(key, validator, function_result)
+    return function_result
+
+
+def _session_result(session, function_name, args, function_result, full):
+    """
+    Let the session shorten a plain re-read of a file it has already returned,
+    and note the files written by write_file and edit_file.
+    """
+    if function_name in ("write_file", "edit_file"):
+        if not function_result.startswith("Error"):
+            for path in _call_paths(function_name, args) or []:
+                session.record_write(os.path.join(args["working_directory"], path))
+        return function_result
+    if function_name != "get_file_content":
+        return function_result
+    if any(args.get(name) is not None for name in ("start_line", "end_line", "offset", "length")):
+        return function_result
+    file_path = args["file_path"]
+    path = os.path.abspath(os.path.join(args["working_directory"], file_path))
+    return session.file_read(path, file_path, function_result, full)
+
+
+def _call_footprint(function_call_part):
+    """
+    Describe what a function call touches so that calls can be ordered.
+    Returns (paths, writes); paths of None means the call may touch anything
+    in the working directory and must not overlap with any other call.
+    """
+    name = function_call_part.name
+    paths = _call_paths(name, function_call_part.args or {})
+    if paths is None:
+        return None, True
+    return [os.path.normpath(path) for path in paths], name not in READ_ONLY_FUNCTIONS
+
+
+def _paths_overlap(a, b):
+    if a == "." or b == "." or a == b:
+        return True
+    return a.startswith(b + os.sep) or b.startswith(a + os.sep)
+
+
+def _conflicts(first, second):
+    (paths_a, writes_a), (paths_b, writes_b) = first, second
+    if paths_a is None or paths_b is None:
+        return True
+    if not (writes_a or writes_b):
+        return False
+    return any(_paths_overlap(a, b) for a in paths_a for b in paths_b)
+
+
+class ToolDispatcher:
+    """
+    Runs function calls on a bounded thread pool.
+    Read-only calls run concurrently; a write or edit waits for every earlier call
+    on an overlapping path, and run_python_file waits for every earlier call (and
+    every later call waits for it). Results keep the order calls were submitted in.
+    """
+
+    def __init__(self, verbose=False, max_workers=MAX_TOOL_WORKERS, working_directory=None, session=None):
+        self.verbose = verbose
+        self.working_directory = working_directory
+        self.session = session
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._submitted = []
+
+    def submit(self, function_call_part):
+        footprint = _call_footprint(function_call_part)
+        # The executor queue is FIFO, so every dependency has already been
+        # picked up by a worker by the time this call starts waiting on it.
+        depends_on = [
+            future
+            for earlier, future in self._submitted
+            if _conflicts(earlier, footprint)
+        ]
+        future = self._executor.submit(
+            self._run, function_call_part, depends_on
+        )
+        self._submitted.append((footprint, future))
+        return future
+
+    def _run(self, function_call_part, depends_on):
+        wait(depends_on)
+        return call_function(function_call_part, self.verbose, self.working_directory, self.session)
+
+    def results(self):
+        try:
+            return [future.result() for _, future in self._submitted]
+        finally:
+            self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._executor.shutdown()
+
+
+def call_functions(function_call_parts, verbose=False, max_workers=MAX_TOOL_WORKERS, working_directory=None, session=None):
+    with ToolDispatcher(verbose, max_workers, working_directory, session) as dispatcher:
+        for function_call_part in function_call_parts:
+            dispatcher.submit(function_call_part)
+        return dispatcher.results()
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import re
+import secrets
+import time
+
+from google.genai import types
+
+from config import CHECKPOINT_DIR, CHECKPOINT_BLOB_MIN_BYTES, CHECKPOINT_KEEP
+from fileio import atomic_write
+
+BLOB_KEY = "$blob"
+BLOB_REFERENCE = re.compile(r'"\$blob":"([0-9a-f]{64})"')
+
+
+class SessionNotFound(Exception):
+    pass
+
+
+def new_session_id():
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+
+
+class SessionLog:
+    """
+    Append-only checkpoint of a session's messages in <directory>/<session_id>.jsonl.
+    Each line is {"index": i, "content": {...}}, and replaying it drops the
+    messages from index i on before appending the content. A new turn costs one
+    line, and a turn rewritten by history compaction is recorded by logging the
+    messages again from its index. Strings of blob_min_bytes or more (tool
+    output, file contents) are stored once under blobs/ by sha256 and
+    referenced as {"$blob": hash}, so a file read again and again takes up no
+    more room. Once a log has been written to, the directory is pruned down to
+    the `keep` most recently written sessions (None keeps them all).
+    """
+
+    def __init__(self, session_id=None, directory=CHECKPOINT_DIR, blob_min_bytes=CHECKPOINT_BLOB_MIN_BYTES, keep=CHECKPOINT_KEEP):
+        self.session_id = session_id or new_session_id()
+        self.directory = directory
+        self.blob_min_bytes = blob_min_bytes
+        self.keep = keep
+        self.path = os.path.join(directory, self.session_id + ".jsonl")
+        self._recorded = []
+        self._pruned = False
+
+    def _blob_path(self, key):
+        return os.path.join(self.directory, "blobs", key[:2], key)
+
+    def _pack(self, value):
+        if isinstance(value, str) and len(value) >= self.blob_min_bytes:
+            key = hashlib.sha256(value.encode("utf-8")).hexdigest()
+            path = self._blob_path(key)
+            try:
+                # Touched when reused, so prune() sees it as in use.
+                os.utime(path)
+            except FileNotFoundError:
+                atomic_write(path, value)
+            return {BLOB_KEY: key}
+        if isinstance(value, dict):
+            return {k: self._pack(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._pack(v) for v in value]
+        return value
+
+    def _unpack(self, value):
+        if isinstance(value, dict):
+            if len(value) == 1 and BLOB_KEY in value:
+                with open(self._blob_path(value[BLOB_KEY]), encoding="utf-8") as f:
+                    return f.read()
+            return {k: self._unpack(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._unpack(v) for v in value]
+        return value
+
+    def checkpoint(self, messages):
+        """Append whatever changed in messages since the last checkpoint."""
+        # Messages are replaced rather than modified, so identity tells which
+        # ones have already been recorded.
+        common = min(len(self._recorded), len(messages))
+        start = next((i for i in range(common) if self._recorded[i] is not messages[i]), common)
+        if start == len(self._recorded) == len(messages):
+            return
+        records = [
+            {"index": i, "content": self._pack(content.model_dump(mode="json", exclude_none=True))}
+            for i, content in enumerate(messages[start:], start)
+        ]
+        if not records:
+            records = [{"index": start}]
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(
+                json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n" for record in records
+            ))
+            f.flush()
+            os.fsync(f.fileno())
+        self._recorded = list(messages)
+        if not self._pruned:
+            self._pruned = True
+            self.prune()
+
+    def prune(self):
+        """
+        Delete all but the `keep` most recently written session logs, then the
+        blobs that no remaining log refers to. A blob written or reused since
+        the oldest remaining log was last written may belong to a checkpoint
+        that is still being made, so it is left alone.
+        """
+        if self.keep is None:
+            return
+        logs = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".jsonl") and entry.is_file():
+                logs.append((entry.stat().st_mtime, entry.path))
+        logs.sort(reverse=True)
+        if len(logs) <= self.keep:
+            return
+        for _, path in logs[self.keep:]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        kept = logs[:self.keep]
+        referenced = set()
+        for _, path in kept:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    referenced.update(BLOB_REFERENCE.findall(f.read()))
+            except FileNotFoundError:
+                pass
+        cutoff = min((mtime for mtime, _ in kept), default=float("inf"))
+        for root, _, files in os.walk(os.path.join(self.directory, "blobs")):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if name not in referenced and os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    @classmethod
+    def resume(cls, session_id, directory=CHECKPOINT_DIR):
+        """
+        Rebuild a session's messages from its log, without calling the model or
+        any tools. Returns (log, messages); later checkpoints append to the same log.
+        """
+        log = cls(session_id, directory)
+        if os.path.basename(session_id) != session_id:
+            raise SessionNotFound(f"invalid session id: {session_id}")
+        messages = []
+        good = 0
+        try:
+            with open(log.path, "rb") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line) if line.endswith(b"\n") else None
+                    except json.JSONDecodeError:
+                        record = None
+                    if record is None:
+                        break
+                    del messages[record["index"]:]
+                    if "content" in record:
+                        messages.append(types.Content.model_validate(log._unpack(record["content"])))
+                    good += len(line)
+        except FileNotFoundError:
+            raise SessionNotFound(f"no checkpoint for session {session_id} in {directory}")
+        if good < os.path.getsize(log.path):
+            # The last write was cut short; drop it so appends start on a fresh line.
+            os.truncate(log.path, good)
+        log._recorded = list(messages)
+        return log, messages
@@ -1,3 +1,59 @@
 MAX_CHARS = 10_000
 WORKING_DIR = "./calculator"
-MAX_ITERS = 20
\ No newline at end of file
+MAX_ITERS = 20
+MAX_TOOL_WORKERS = 4
+MODEL = "gemini-2.0-flash-001"
+BATCH_CONCURRENCY = 8
+TOOL_CACHE_MAX_BYTES = 4 * 1024 * 1024
+HISTORY_KEEP_RECENT = 4
+HISTORY_STUB_CHARS = 500
+# Warm interpreters for run_python_file; 0 starts a fresh interpreter per call.
+# Only preload modules that the agent won't edit, since workers keep them loaded.
+PYTHON_POOL_SIZE = 0
+PYTHON_POOL_PRELOAD = ()
+FILES_INFO_PAGE_SIZE = 200
+MMAP_MIN_BYTES = 1024 * 1024
+SEARCH_MAX_RESULTS = 20
+SEARCH_MAX_FILE_BYTES = 1024 * 1024
+RESPONSE_CACHE_DIR = ".response_cache"
+RESPONSE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+RESPONSE_CACHE_MODES = ("record", "replay", "passthrough")
+# Retries of failed model calls (rate limits and server errors), apart from MAX_ITERS.
+RETRY_MAX_ATTEMPTS = 6
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 60.0
+# Model requests per minute shared by all sessions in a process; 0 means unlimited.
+REQUESTS_PER_MINUTE = 0
+# run_python_file keeps the first and last bytes of each output stream and kills
+# the script once both streams together pass RUN_OUTPUT_MAX_BYTES. Output that
+# was cut is kept in full under RUN_OUTPUT_LOG_DIR (None to disable) so the
+# model can page through it; only the newest RUN_OUTPUT_LOG_KEEP logs are kept.
+RUN_OUTPUT_HEAD_BYTES = 4000
+RUN_OUTPUT_TAIL_BYTES = 4000
+RUN_OUTPUT_MAX_BYTES = 16 * 1024 * 1024
+RUN_OUTPUT_LOG_DIR = ".agent/logs"
+RUN_OUTPUT_LOG_KEEP = 20
+# Sessions are checkpointed after every iteration under CHECKPOINT_DIR (None to
+# disable); strings of CHECKPOINT_BLOB_MIN_BYTES or more are stored out of line.
+# Only the CHECKPOINT_KEEP most recent sessions are kept.
+CHECKPOINT_DIR = ".agent/sessions"
+CHECKPOINT_BLOB_MIN_BYTES = 1024
+CHECKPOINT_KEEP = 50
+# daemon.py listens on this Unix socket (mode 0600) unless given a TCP port, which
+# needs the shared token in $AGENT_DAEMON_TOKEN. Sessions may only work in or
+# below DAEMON_ALLOWED_ROOTS.
+DAEMON_SOCKET = ".agent/daemon.sock"
+DAEMON_ALLOWED_ROOTS = (WORKING_DIR,)
+# After get_files_info, the PREFETCH_TOP_N likeliest files of the listing (0 to
+# disable) are read into the tool cache in the background.
+PREFETCH_TOP_N = 4
+PREFETCH_MAX_FILE_BYTES = 256 * 1024
+PREFETCH_WORKERS = 2
+# A repeated read of a changed file is sent as a diff if it is at most this
+# fraction of the file's size, and in full otherwise.
+SESSION_DIFF_MAX_RATIO = 0.5
+# run_tests runs up to RUN_TESTS_WORKERS test files at once, each in its own
+# process, and lists at most RUN_TESTS_MAX_FAILURES failing tests.
+RUN_TESTS_WORKERS = 4
+RUN_TESTS_TIMEOUT = 120
+RUN_TESTS_MAX_FAILURES = 10
\ No newline at end of file
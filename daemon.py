@@ -0,0 +1,263 @@
+import os
+import sys
+import hmac
+import json
+import signal
+import socket
+import asyncio
+import argparse
+
+from config import WORKING_DIR, BATCH_CONCURRENCY, DAEMON_SOCKET, DAEMON_ALLOWED_ROOTS, RESPONSE_CACHE_DIR, RESPONSE_CACHE_MODES, REQUESTS_PER_MINUTE
+
+TOKEN_ENV = "AGENT_DAEMON_TOKEN"
+
+_loaded = False
+
+def _load():
+    """
+    Import the SDK and the agent modules. The `ask` client only talks to the
+    socket, so it starts without them.
+    """
+    global _loaded, load_dotenv, genai, CachedClient, ResponseCache, make_limiter, run_session, tool_cache, prefetcher, current_python_pool, workspace_index
+    if _loaded:
+        return
+    from dotenv import load_dotenv
+    from google import genai
+    from response_cache import CachedClient, ResponseCache
+    from retry import make_limiter
+    from batch import run_session
+    from call_function import tool_cache, prefetcher
+    from functions.python_pool import current_python_pool
+    from functions.workspace_index import workspace_index
+    _loaded = True
+
+class AgentDaemon:
+    """
+    Serves agent sessions from one long-lived process, so the SDK import, the
+    client's connection pool and the workspace caches (tool_cache,
+    workspace_index) are paid for once rather than per prompt.
+    Requests and responses are JSON objects, one per line. A request has a
+    "prompt" and optionally an "id", a "working_directory" (which must be in or
+    below one of `allowed_roots`) and the shared "token" if the daemon has one;
+    the response is run_session's result record with the request's id. A connection may send
+    several requests, whose responses come back as they finish.
+    At most `concurrency` sessions run at once. Sessions in the same working
+    directory share a lock around their tool calls, so their model calls overlap
+    but their tools never do.
+    Listings of a working directory are dropped when a request for it arrives.
+    A file rewritten in place by an editor or by git keeps its directory's mtime,
+    so between requests that is the only way to see its new size.
+    """
+
+    def __init__(self, client, concurrency=BATCH_CONCURRENCY, verbose=False, parallel_tools=False, token_budget=None, limiter=None,
+                 allowed_roots=DAEMON_ALLOWED_ROOTS, token=None, summarize_history=False):
+        self.client = client
+        self.verbose = verbose
+        self.parallel_tools = parallel_tools
+        self.token_budget = token_budget
+        self.summarize_history = summarize_history
+        self.limiter = limiter
+        self.allowed_roots = [os.path.realpath(root) for root in allowed_roots]
+        self.token = token
+        self.sessions = 0
+        self._slots = asyncio.Semaphore(concurrency)
+        self._locks = {}
+
+    def is_allowed(self, working_directory):
+        return any(
+            working_directory == root or working_directory.startswith(root.rstrip(os.sep) + os.sep)
+            for root in self.allowed_roots
+        )
+
+    def workspace_lock(self, working_directory):
+        return self._locks.setdefault(working_directory, asyncio.Lock())
+
+    async def handle(self, request):
+        """Run the session a request asks for and return the response record."""
+        request_id = request.get("id")
+        token = request.get("token")
+        if self.token is not None and not (
+            isinstance(token, str) and hmac.compare_digest(token.encode("utf-8"), self.token.encode("utf-8"))
+        ):
+            return {"id": request_id, "response": None, "error": "invalid or missing token"}
+        prompt = request.get("prompt")
+        if not isinstance(prompt, str) or not prompt:
+            return {"id": request_id, "response": None, "error": '"prompt" must be a non-empty string'}
+        # Resolved through symlinks so neither they nor ".." can leave the allowed roots.
+        working_directory = os.path.realpath(request.get("working_directory") or WORKING_DIR)
+        if not self.is_allowed(working_directory):
+            return {"id": request_id, "response": None, "error": f"working directory is outside the allowed roots: {working_directory}"}
+        if not os.path.isdir(working_directory):
+            return {"id": request_id, "response": None, "error": f"not a directory: {working_directory}"}
+        async with self._slots:
+            self.sessions += 1
+            workspace_index.clear_tree(working_directory)
+            result = await run_session(
+                self.client, prompt, self.verbose, self.parallel_tools, self.token_budget,
+                self.limiter, working_directory, self.workspace_lock(working_directory), self.summarize_history,
+            )
+        return {"id": request_id, **result}
+
+    async def serve_connection(self, reader, writer):
+        pending = set()
+
+        async def respond(line):
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("expected a JSON object")
+            except ValueError as e:
+                record = {"id": None, "response": None, "error": f"invalid request: {e}"}
+            else:
+                record = await self.handle(request)
+            writer.write((json.dumps(record) + "\n").encode("utf-8"))
+            await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(respond(line))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            await asyncio.gather(*pending)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+async def serve(daemon, socket_path=DAEMON_SOCKET, port=None):
+    """
+    Accept connections on socket_path, or on localhost:port if a port is given,
+    until cancelled. Any local user can reach a TCP port, so one is only opened
+    for a daemon with a token.
+    """
+    if port is not None:
+        if daemon.token is None:
+            raise RuntimeError(f"listening on a TCP port needs a token (set ${TOKEN_ENV})")
+        server = await asyncio.start_server(daemon.serve_connection, "127.0.0.1", port)
+    else:
+        if os.path.exists(socket_path):
+            if _connect(socket_path, None, timeout=1) is not None:
+                raise RuntimeError(f"a daemon is already listening on {socket_path}")
+            os.remove(socket_path)
+        os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+        # Create the socket as 0600 so only this user can connect, with no
+        # window between bind and a chmod.
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(daemon.serve_connection, socket_path)
+        finally:
+            os.umask(umask)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if port is None and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+def _connect(socket_path, port, timeout=None):
+    """Open a connection to the daemon, or return None if nothing is listening."""
+    try:
+        if port is not None:
+            return socket.create_connection(("127.0.0.1", port), timeout=timeout)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        return sock
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+
+def ask(prompt, working_directory=None, socket_path=DAEMON_SOCKET, port=None, timeout=None, token=None):
+    """Send one prompt to a running daemon and return its response record."""
+    sock = _connect(socket_path, port, timeout)
+    if sock is None:
+        raise ConnectionError(f"no agent daemon is listening on {socket_path if port is None else port}")
+    request = {"prompt": prompt}
+    if working_directory:
+        request["working_directory"] = os.path.abspath(working_directory)
+    if token is not None:
+        request["token"] = token
+    with sock, sock.makefile("rwb") as stream:
+        stream.write((json.dumps(request) + "\n").encode("utf-8"))
+        stream.flush()
+        line = stream.readline()
+    if not line:
+        raise ConnectionError("the agent daemon closed the connection")
+    return json.loads(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve agent sessions from a long-running process, or send one a prompt.")
+    address = argparse.ArgumentParser(add_help=False)
+    address.add_argument("--socket", default=DAEMON_SOCKET, help=f"Unix socket to listen on or connect to (default {DAEMON_SOCKET}).")
+    address.add_argument("--port", type=int, help=f"Use this localhost TCP port instead of the Unix socket; needs ${TOKEN_ENV} on both ends.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", parents=[address], help="Run the daemon.")
+    serve_parser.add_argument("--allow-root", action="append", metavar="DIR", help=f"Let sessions work in or below DIR; may be repeated (default {', '.join(DAEMON_ALLOWED_ROOTS)}).")
+    serve_parser.add_argument("-j", "--concurrency", type=int, default=BATCH_CONCURRENCY, help="Maximum number of sessions running at once.")
+    serve_parser.add_argument("--verbose", action="store_true", help="Enable verbose output (prints extra details).")
+    serve_parser.add_argument("--parallel-tools", action="store_true", help="Run independent function calls from one model turn concurrently.")
+    serve_parser.add_argument("--token-budget", type=int, help="Compact each session's history once it grows past this many prompt tokens.")
+    serve_parser.add_argument("--summarize-history", action="store_true", help="With --token-budget, fold old turns into a summary when stubbing tool output is not enough.")
+    serve_parser.add_argument("--requests-per-minute", type=int, default=REQUESTS_PER_MINUTE, help="Limit model requests across all sessions to this rate (0, the default, means unlimited).")
+    serve_parser.add_argument("--cache-mode", choices=RESPONSE_CACHE_MODES, default="passthrough", help="Record model responses to the response cache, replay them from it without calling the API, or bypass it (default).")
+    serve_parser.add_argument("--cache-dir", default=RESPONSE_CACHE_DIR, help=f"Directory of the response cache (default {RESPONSE_CACHE_DIR}).")
+    ask_parser = commands.add_parser("ask", parents=[address], help="Send a prompt to the daemon and print the response.")
+    ask_parser.add_argument("prompt", help="The input prompt for the AI model.")
+    ask_parser.add_argument("-C", "--working-directory", help=f"Directory the agent works in (default {WORKING_DIR}, relative to the daemon).")
+    args = parser.parse_args()
+    token = os.environ.get(TOKEN_ENV) or None
+
+    if args.command == "ask":
+        try:
+            result = ask(args.prompt, args.working_directory, args.socket, args.port, token=token)
+        except ConnectionError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        if result.get("response") is None:
+            print(f"Error: {result.get('error')}")
+            sys.exit(1)
+        print(result["response"])
+        return
+
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.port is not None and token is None:
+        parser.error(f"--port needs a shared token in ${TOKEN_ENV}")
+    _load()
+    load_dotenv()
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key and args.cache_mode != "replay":
+        print("Error: GEMINI_API_KEY not found in environment variables.")
+        sys.exit(1)
+    client = genai.Client(api_key=api_key) if api_key else None
+    if args.cache_mode != "passthrough":
+        client = CachedClient(client, ResponseCache(args.cache_dir), args.cache_mode)
+    daemon = AgentDaemon(
+        client, args.concurrency, args.verbose, args.parallel_tools, args.token_budget,
+        make_limiter(args.requests_per_minute), args.allow_root or DAEMON_ALLOWED_ROOTS, token,
+        args.summarize_history,
+    )
+    print(f"Agent daemon listening on {args.socket if args.port is None else f'127.0.0.1:{args.port}'}")
+    # Stop on SIGTERM the way Ctrl-C does, removing the socket on the way out.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        asyncio.run(serve(daemon, args.socket, args.port))
+    except KeyboardInterrupt:
+        if args.verbose:
+            print(f"Served {daemon.sessions} sessions")
+            print(tool_cache.stats())
+            print(prefetcher.stats())
+            if current_python_pool():
+                print(current_python_pool().stats())
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        prefetcher.close()
+
+if __name__ == "__main__":
+    main()
+else:
+    # Importers (the tests) use the daemon's classes directly.
+    _load()
@@ -0,0 +1,32 @@
+import os
+import tempfile
+
+
+def atomic_write(abs_file_path, content):
+    """Write content to a temporary file next to abs_file_path, fsync it and rename it into place."""
+    directory = os.path.dirname(abs_file_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(abs_file_path)}.")
+    try:
+        with os.fdopen(fd, "w", newline="") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(abs_file_path).st_mode)
+        except FileNotFoundError:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, abs_file_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
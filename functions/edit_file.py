@@ -0,0 +1,245 @@
+import os
+import re
+from google.genai import types
+from fileio import atomic_write
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class EditError(Exception):
+    pass
+
+
+def edit_file(working_directory: str, edits: list = None, patch: str = None) -> str:
+    abs_working_dir = os.path.abspath(working_directory)
+    if not edits and not patch:
+        return "Error: edit_file needs either edits or a patch"
+
+    try:
+        changes = []
+        for edit in edits or []:
+            changes.append((edit["file_path"], _search_replace(edit), 1))
+        if patch:
+            changes.extend(_parse_patch(patch))
+    except (EditError, KeyError, TypeError) as e:
+        return f"Error: invalid edit: {e}"
+
+    # Apply every change in memory first, so nothing is written unless all of them apply.
+    originals = {}
+    updated = {}
+    for file_path, apply, _ in changes:
+        abs_file_path = os.path.abspath(os.path.join(working_directory, file_path))
+        if not abs_file_path.startswith(abs_working_dir):
+            return f'Error: Cannot edit "{file_path}" as it is outside the permitted working directory'
+        if abs_file_path not in updated:
+            try:
+                with open(abs_file_path, "r", newline="") as f:
+                    originals[abs_file_path] = f.read()
+            except FileNotFoundError:
+                originals[abs_file_path] = None
+            except Exception as e:
+                return f'Error reading file "{file_path}": {e}'
+            updated[abs_file_path] = (file_path, originals[abs_file_path])
+        try:
+            content = apply(updated[abs_file_path][1])
+        except EditError as e:
+            return f'Error: could not apply edit to "{file_path}": {e}. No files were changed.'
+        updated[abs_file_path] = (file_path, content)
+
+    written = []
+    try:
+        for abs_file_path, (file_path, content) in updated.items():
+            atomic_write(abs_file_path, content)
+            written.append(abs_file_path)
+    except Exception as e:
+        for abs_file_path in written:
+            _restore(abs_file_path, originals[abs_file_path])
+        return f'Error: writing "{file_path}" failed, all edits were rolled back: {e}'
+
+    edited = ", ".join(f'"{file_path}"' for file_path, _ in updated.values())
+    return f"Successfully edited {edited} ({sum(count for _, _, count in changes)} change(s) applied)"
+
+
+def _restore(abs_file_path, original):
+    if original is None:
+        os.remove(abs_file_path)
+    else:
+        atomic_write(abs_file_path, original)
+
+
+def _search_replace(edit):
+    old_text = edit["old_text"]
+    new_text = edit["new_text"]
+
+    def apply(content):
+        if content is None:
+            if old_text:
+                raise EditError("file does not exist")
+            return new_text
+        count = content.count(old_text) if old_text else 0
+        if count != 1:
+            raise EditError(f"old_text must match exactly once but matched {count} times")
+        return content.replace(old_text, new_text, 1)
+
+    return apply
+
+
+def edited_paths(args):
+    """Return the file paths an edit_file call would touch, or None if they can't be determined."""
+    try:
+        paths = [edit["file_path"] for edit in args.get("edits") or []]
+        if args.get("patch"):
+            paths.extend(file_path for file_path, _, _ in _parse_patch(args["patch"]))
+        return paths or None
+    except (EditError, KeyError, TypeError):
+        return None
+
+
+def _parse_patch(patch):
+    """Split a unified diff into (file_path, apply, hunk_count) triples, one per file."""
+    changes = []
+    lines = patch.splitlines()
+    i = 0
+    while i < len(lines):
+        if not lines[i].startswith("--- "):
+            i += 1
+            continue
+        if i + 1 >= len(lines) or not lines[i + 1].startswith("+++ "):
+            raise EditError(f"expected '+++' after '{lines[i]}'")
+        old_path = _diff_path(lines[i][4:])
+        new_path = _diff_path(lines[i + 1][4:])
+        if new_path is None:
+            raise EditError(f"deleting files is not supported ({old_path})")
+        i += 2
+        hunks = []
+        while i < len(lines) and lines[i].startswith("@@"):
+            # A header without line numbers ("@@ @@") is matched anywhere in the file.
+            match = HUNK_HEADER.match(lines[i])
+            start = int(match.group(1)) if match else 1
+            header = lines[i]
+            i += 1
+            body = []
+            while i < len(lines) and lines[i][:1] in (" ", "-", "+", "\\", ""):
+                if lines[i].startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ "):
+                    break
+                body.append(lines[i])
+                i += 1
+            # Blank lines after the last hunk are usually padding rather than context.
+            while body and body[-1] == "":
+                body.pop()
+            old, new = _hunk_sides(body)
+            hunks.append((start, header, old, new))
+        if not hunks:
+            raise EditError(f"no hunks for {new_path}")
+        changes.append((new_path, _hunk_applier(hunks, old_path is None), len(hunks)))
+    if not changes:
+        raise EditError("patch contains no file headers")
+    return changes
+
+
+def _hunk_sides(body):
+    """Return the (old, new) lines of a hunk body, with line endings."""
+    old, new = [], []
+    sides = (old, new)
+    for line in body:
+        if line.startswith("\\"):
+            # "\ No newline at end of file" applies to the line before it.
+            for side in sides:
+                if side:
+                    side[-1] = side[-1].rstrip("\n")
+            continue
+        marker, text = line[:1] or " ", line[1:] + "\n"
+        sides = {" ": (old, new), "-": (old,), "+": (new,)}[marker]
+        for side in sides:
+            side.append(text)
+    return old, new
+
+
+def _diff_path(header):
+    path = header.split("\t")[0].strip()
+    if path == "/dev/null":
+        return None
+    if path.startswith(("a/", "b/")):
+        path = path[2:]
+    return path
+
+
+def _hunk_applier(hunks, creates_file):
+    def apply(content):
+        if content is None and not creates_file:
+            raise EditError("file does not exist")
+        lines = (content or "").splitlines(keepends=True)
+        shift = 0
+        for start, header, old, new in hunks:
+            expected = max(start - 1, 0) + shift
+            position = _find_block(lines, old, expected)
+            if position is None:
+                raise EditError(f"hunk '{header}' does not match the current content")
+            replaced = lines[position:position + len(old)]
+            if replaced and new:
+                # Keep the file's own line endings, including a missing final newline.
+                newline = _line_ending(replaced[0]) or "\n"
+                new = [line.rstrip("\r\n") + newline for line in new]
+                new[-1] = new[-1].rstrip("\r\n") + _line_ending(replaced[-1])
+            lines[position:position + len(old)] = new
+            shift += len(new) - len(old)
+        return "".join(lines)
+
+    return apply
+
+
+def _line_ending(line):
+    return line[len(line.rstrip("\r\n")):]
+
+
+def _find_block(lines, block, expected):
+    """
+    Find block in lines, trying the expected position first and then the
+    nearest match. Line endings are ignored when comparing.
+    """
+    if not block:
+        return min(expected, len(lines))
+    stripped = [line.rstrip("\r\n") for line in lines]
+    block = [line.rstrip("\r\n") for line in block]
+    candidates = sorted(range(len(lines) - len(block) + 1), key=lambda i: abs(i - expected))
+    for i in candidates:
+        if stripped[i:i + len(block)] == block:
+            return i
+    return None
+
+
+schema_edit_file = types.FunctionDeclaration(
+    name="edit_file",
+    description="Edits one or more existing files within the working directory without resending their whole content, either with search/replace edits or with a unified diff. All changes are checked first and written atomically; if any of them does not apply, no file is changed.",
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "edits": types.Schema(
+                type=types.Type.ARRAY,
+                description="Search/replace edits, applied in order.",
+                items=types.Schema(
+                    type=types.Type.OBJECT,
+                    properties={
+                        "file_path": types.Schema(
+                            type=types.Type.STRING,
+                            description="Path to the file to edit, relative to the working directory.",
+                        ),
+                        "old_text": types.Schema(
+                            type=types.Type.STRING,
+                            description="Exact text to replace. It must occur exactly once in the file; include surrounding lines to make it unique. Leave empty to create a new file.",
+                        ),
+                        "new_text": types.Schema(
+                            type=types.Type.STRING,
+                            description="Text to put in its place.",
+                        ),
+                    },
+                    required=["file_path", "old_text", "new_text"],
+                ),
+            ),
+            "patch": types.Schema(
+                type=types.Type.STRING,
+                description="A unified diff (as produced by 'diff -u' or 'git diff') with paths relative to the working directory.",
+            ),
+        },
+    ),
+)
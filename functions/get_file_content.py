@@ -1,8 +1,15 @@
 import os
-from config import MAX_CHARS
+import mmap
+import bisect
+import threading
+from collections import OrderedDict
+from config import MAX_CHARS, MMAP_MIN_BYTES
 from google.genai import types
 
-def get_file_content(working_directory: str, file_path: str) -> str:
+LINE_INDEX_BLOCK = 64 * 1024
+LINE_INDEX_CACHE_SIZE = 16
+
+def get_file_content(working_directory: str, file_path: str, offset: int = None, length: int = None, start_line: int = None, end_line: int = None) -> str:
     abs_working_dir = os.path.abspath(working_directory)
     abs_file_path = os.path.abspath(os.path.join(working_directory, file_path))
     
@@ -12,6 +19,9 @@ def get_file_content(working_directory: str, file_path: str) -> str:
     if not os.path.isfile(abs_file_path):
         return f'Error: File not found or is not a regular file: "{file_path}"'
 
+    if start_line is not None or end_line is not None or offset is not None or length is not None:
+        return _read_window(abs_file_path, file_path, offset, length, start_line, end_line)
+
     try:
         with open(abs_file_path, 'r') as f:
             content = f.read(MAX_CHARS)
@@ -25,9 +35,132 @@ def get_file_content(working_directory: str, file_path: str) -> str:
     except Exception as e:
         return f'Error reading file "{file_path}": {e}'
 
+
+def _read_window(abs_file_path, file_path, offset, length, start_line, end_line):
+    """
+    Read at most MAX_CHARS bytes from a byte range or a line range of the file.
+    Files of MMAP_MIN_BYTES or more are mapped rather than read, so only the
+    pages around the window are touched.
+    """
+    try:
+        with open(abs_file_path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if st.st_size == 0:
+                return ""
+            if st.st_size >= MMAP_MIN_BYTES:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                data = f.read()
+            try:
+                if start_line is not None or end_line is not None:
+                    index = _line_index(abs_file_path, st, data)
+                    return _read_lines(data, index, file_path, start_line, end_line)
+                return _read_bytes(data, file_path, offset, length)
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+    except Exception as e:
+        return f'Error reading file "{file_path}": {e}'
+
+
+def _read_bytes(data, file_path, offset, length):
+    size = len(data)
+    offset = max(int(offset or 0), 0)
+    length = MAX_CHARS if length is None else min(max(int(length), 0), MAX_CHARS)
+    if offset >= size:
+        return f'Error: offset {offset} is past the end of "{file_path}" ({size} bytes)'
+    end = min(offset + length, size)
+    content = data[offset:end].decode("utf-8", errors="replace")
+    if end < size:
+        content += (
+            f'[...File "{file_path}": showing bytes {offset}-{end} of {size}; '
+            f'call again with offset={end} for more]'
+        )
+    return content
+
+
+def _read_lines(data, index, file_path, start_line, end_line):
+    total = index.total_lines
+    start = max(int(start_line or 1), 1)
+    end = total if end_line is None else min(int(end_line), total)
+    if start > total:
+        return f'Error: start_line {start} is past the end of "{file_path}" ({total} lines)'
+    if end < start:
+        return f'Error: end_line {end} is before start_line {start}'
+
+    begin = index.line_offset(data, start)
+    pos, line = begin, start
+    while line <= end:
+        newline = data.find(b"\n", pos)
+        next_pos = len(data) if newline == -1 else newline + 1
+        if next_pos - begin > MAX_CHARS:
+            break
+        pos, line = next_pos, line + 1
+
+    if pos == begin:
+        # A single line longer than MAX_CHARS: return its start.
+        content = data[begin:begin + MAX_CHARS].decode("utf-8", errors="replace")
+        return content + (
+            f'[...File "{file_path}": line {start} truncated at {MAX_CHARS} characters; '
+            f'use offset={begin + MAX_CHARS} to read the rest of it]'
+        )
+    content = data[begin:pos].decode("utf-8", errors="replace")
+    if line - 1 < end or end < total:
+        content += (
+            f'[...File "{file_path}": showing lines {start}-{line - 1} of {total}; '
+            f'call again with start_line={line} for more]'
+        )
+    return content
+
+
+class LineIndex:
+    """
+    Sparse line index: the number of newlines before the start of every
+    LINE_INDEX_BLOCK-sized block. Finding where a line starts costs a binary
+    search plus a scan of at most one block.
+    """
+
+    def __init__(self, data):
+        self.newlines_before = []
+        count = 0
+        for block_start in range(0, len(data), LINE_INDEX_BLOCK):
+            self.newlines_before.append(count)
+            count += data[block_start:block_start + LINE_INDEX_BLOCK].count(b"\n")
+        self.total_lines = count + (0 if data[-1:] == b"\n" else 1)
+
+    def line_offset(self, data, line):
+        """Return the byte offset at which 1-based line starts."""
+        if line <= 1:
+            return 0
+        block = bisect.bisect_left(self.newlines_before, line - 1) - 1
+        pos = block * LINE_INDEX_BLOCK
+        for _ in range(line - 1 - self.newlines_before[block]):
+            pos = data.find(b"\n", pos) + 1
+        return pos
+
+
+_line_indexes = OrderedDict()
+_line_indexes_lock = threading.Lock()
+
+
+def _line_index(abs_file_path, st, data):
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _line_indexes_lock:
+        cached = _line_indexes.get(abs_file_path)
+        if cached and cached[0] == stamp:
+            _line_indexes.move_to_end(abs_file_path)
+            return cached[1]
+    index = LineIndex(data)
+    with _line_indexes_lock:
+        _line_indexes[abs_file_path] = (stamp, index)
+        while len(_line_indexes) > LINE_INDEX_CACHE_SIZE:
+            _line_indexes.popitem(last=False)
+    return index
+
+
 schema_get_file_content = types.FunctionDeclaration(
     name="get_file_content",
-    description=f"Reads and returns the first {MAX_CHARS} characters of the content from a specified file within the working directory.",
+    description=f"Reads and returns the first {MAX_CHARS} characters of the content from a specified file within the working directory. Use start_line/end_line or offset/length to read any other part of a large file, up to {MAX_CHARS} characters at a time.",
     parameters=types.Schema(
         type=types.Type.OBJECT,
         properties={
@@ -35,6 +168,26 @@ schema_get_file_content = types.FunctionDeclaration(
                 type=types.Type.STRING,
                 description="The path to the file whose content should be read, relative to the working directory.",
             ),
+            "start_line": types.Schema(
+                type=types.Type.INTEGER,
+                description="Optional 1-based line to start reading from.",
+            ),
+            "end_line": types.Schema(
+                type=types.Type.INTEGER,
+                description="Optional last line to read (inclusive). Defaults to reading as many lines as fit.",
+            ),
+            "offset": types.Schema(
+                type=types.Type.INTEGER,
+                description="Optional byte offset to start reading from, when not reading by lines.",
+            ),
+            "length": types.Schema(
+                type=types.Type.INTEGER,
+                description=f"Optional number of bytes to read from offset, at most {MAX_CHARS}.",
+            ),
+            "full": types.Schema(
+                type=types.Type.BOOLEAN,
+                description="Return the whole file even if it was read earlier in this session. Otherwise a repeated read returns only a note that the file is unchanged, or a diff against the version read before.",
+            ),
         },
         required=["file_path"],
     ),
@@ -1,29 +1,51 @@
 import os
+import fnmatch
 from google.genai import types
+from config import FILES_INFO_PAGE_SIZE
+from functions.workspace_index import IgnoreRules, workspace_index
 
 
-def get_files_info(working_directory: str, directory:str) -> str:
+def get_files_info(working_directory: str, directory: str = ".", depth: int = 1, pattern: str = None, offset: int = 0, limit: int = FILES_INFO_PAGE_SIZE) -> str:
     abs_working_dir = os.path.abspath(working_directory)
     target_dir = os.path.abspath(os.path.join(working_directory, directory))
-    
+
     if not target_dir.startswith(abs_working_dir):
         return f'Error: Cannot list "{directory}" as it is outside the permitted working directory'
-    
+
     if not os.path.isdir(target_dir):
-        return f'Error: "{directory}" is not a directory'    
+        return f'Error: "{directory}" is not a directory'
 
-    if len(os.listdir(target_dir)) == 0:
-        return f'Error: "{directory}" is empty'
-    
     try:
+        if not workspace_index.list_dir(target_dir):
+            return f'Error: "{directory}" is empty'
+
+        depth, offset, limit = int(depth), max(int(offset), 0), max(int(limit), 1)
+        ignore = IgnoreRules.for_root(abs_working_dir)
+        entries = workspace_index.walk(abs_working_dir, target_dir, depth, ignore)
+        if pattern:
+            entries = (
+                entry for entry in entries
+                if not entry[1]
+                and (fnmatch.fnmatch(entry[0], pattern) or fnmatch.fnmatch(os.path.basename(entry[0]), pattern))
+            )
+
         files_info = []
-        for filename in os.listdir(target_dir):
-            filepath = os.path.join(target_dir, filename)
-            file_size = 0
-            is_dir = os.path.isdir(filepath)
-            file_size = os.path.getsize(filepath)
+        total = 0
+        for rel_path, is_dir, file_size in entries:
+            if offset <= total < offset + limit:
+                files_info.append(
+                    f"- {rel_path}: file_size={file_size} bytes, is_dir={is_dir}"
+                )
+            total += 1
+
+        if not files_info:
+            if total:
+                return f'Error: offset {offset} is past the last of {total} entries in "{directory}"'
+            return f'No entries in "{directory}" match the given filters'
+        if total > offset + limit:
             files_info.append(
-                f"- {filename}: file_size={file_size} bytes, is_dir={is_dir}"
+                f"[Showing entries {offset + 1}-{offset + len(files_info)} of {total}; "
+                f"call again with offset={offset + limit} for more]"
             )
         return "\n".join(files_info)
     except Exception as e:
@@ -31,7 +53,7 @@ def get_files_info(working_directory: str, directory:str) -> str:
 
 schema_get_files_info = types.FunctionDeclaration(
     name="get_files_info",
-    description="Lists files in the specified directory along with their sizes, constrained to the working directory.",
+    description="Lists files in the specified directory along with their sizes, constrained to the working directory. Can list subdirectories recursively and filter by a glob pattern; ignored paths (.gitignore, .venv, __pycache__) are skipped.",
     parameters=types.Schema(
         type=types.Type.OBJECT,
         properties={
@@ -39,6 +61,18 @@ schema_get_files_info = types.FunctionDeclaration(
                 type=types.Type.STRING,
                 description="The directory to list files from, relative to the working directory. If not provided, lists files in the working directory itself.",
             ),
+            "depth": types.Schema(
+                type=types.Type.INTEGER,
+                description="How many directory levels to list. 1 (the default) lists only the directory's own entries; 0 lists the whole tree.",
+            ),
+            "pattern": types.Schema(
+                type=types.Type.STRING,
+                description="Optional glob such as '*.py' or 'pkg/*.py'. Only files matching it are listed.",
+            ),
+            "offset": types.Schema(
+                type=types.Type.INTEGER,
+                description=f"Number of entries to skip, for paging through long listings. At most {FILES_INFO_PAGE_SIZE} entries are returned per call by default.",
+            ),
         },
     ),
-)
\ No newline at end of file
+)
@@ -0,0 +1,122 @@
+import os
+import subprocess
+import threading
+
+from config import RUN_OUTPUT_HEAD_BYTES, RUN_OUTPUT_TAIL_BYTES
+
+READ_CHUNK = 64 * 1024
+# How long to wait for the reader threads once the process is gone; a
+# grandchild may still hold the pipes open.
+DRAIN_TIMEOUT = 5
+
+
+class BoundedOutput:
+    """
+    Captures a stream in bounded memory: the first head_bytes and the last
+    tail_bytes are kept and everything in between is only counted. With a
+    spill_path, every byte is also written to that file.
+    """
+
+    def __init__(self, head_bytes=RUN_OUTPUT_HEAD_BYTES, tail_bytes=RUN_OUTPUT_TAIL_BYTES, spill_path=None):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+        self.spill_path = spill_path
+        self._spill = open(spill_path, "wb") if spill_path else None
+
+    @classmethod
+    def from_file(cls, path, head_bytes=RUN_OUTPUT_HEAD_BYTES, tail_bytes=RUN_OUTPUT_TAIL_BYTES):
+        """Read just the head and tail of a file that already holds the whole stream."""
+        output = cls(head_bytes, tail_bytes)
+        output.spill_path = path
+        with open(path, "rb") as f:
+            output.head += f.read(head_bytes)
+            output.total = os.fstat(f.fileno()).st_size
+            if output.total > head_bytes:
+                f.seek(max(head_bytes, output.total - tail_bytes))
+                output.tail += f.read(tail_bytes)
+        return output
+
+    def write(self, data):
+        self.total += len(data)
+        if self._spill:
+            self._spill.write(data)
+        room = self.head_bytes - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data:
+            self.tail += data
+            if len(self.tail) > self.tail_bytes:
+                del self.tail[:len(self.tail) - self.tail_bytes]
+
+    def close(self):
+        if self._spill:
+            self._spill.close()
+            self._spill = None
+
+    @property
+    def truncated(self):
+        return self.total > len(self.head) + len(self.tail)
+
+    def text(self, spill_name=None):
+        """
+        Decode what was kept. If anything was dropped, a marker with the number
+        of omitted bytes and the total size goes between head and tail, naming
+        spill_name as the place to read the full output.
+        """
+        head = self.head.decode("utf-8", errors="replace")
+        tail = self.tail.decode("utf-8", errors="replace")
+        if not self.truncated:
+            return head + tail
+        omitted = self.total - len(self.head) - len(self.tail)
+        marker = f"\n[... {omitted} bytes omitted; {self.total} bytes in total"
+        if spill_name:
+            marker += f'; the full output is in "{spill_name}", read it with get_file_content using start_line and end_line'
+        return f"{head}{marker} ...]\n{tail}"
+
+
+def run_captured(commands, cwd, timeout, stdout, stderr, max_bytes):
+    """
+    Run commands, streaming stdout and stderr into the given BoundedOutputs as
+    they are produced. The process is killed as soon as the two streams
+    together exceed max_bytes. Returns (returncode, exceeded); raises
+    subprocess.TimeoutExpired like subprocess.run when timeout runs out.
+    """
+    process = subprocess.Popen(
+        commands,
+        cwd=cwd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    exceeded = threading.Event()
+
+    def pump(pipe, sink):
+        with pipe:
+            for chunk in iter(lambda: pipe.read1(READ_CHUNK), b""):
+                sink.write(chunk)
+                if stdout.total + stderr.total > max_bytes and not exceeded.is_set():
+                    exceeded.set()
+                    process.kill()
+
+    readers = [
+        threading.Thread(target=pump, args=(process.stdout, stdout), daemon=True),
+        threading.Thread(target=pump, args=(process.stderr, stderr), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    try:
+        returncode = process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        for reader in readers:
+            reader.join(DRAIN_TIMEOUT)
+        stdout.close()
+        stderr.close()
+    return returncode, exceeded.is_set()
@@ -0,0 +1,242 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import select
+import signal
+import time
+import tempfile
+import threading
+import subprocess
+
+# Each worker is a long-lived interpreter running this file. It imports the
+# preload modules once, then for every request forks a child that runs the
+# script with the requested argv and cwd, so the worker itself never changes
+# between runs. Requests and replies are JSON lines over the worker's stdin/stdout.
+
+
+def serve(preload):
+    # A module that fails to import is only a missed speedup, since the script
+    # imports it itself. The error goes back with each reply for the pool to record.
+    preload_errors = {}
+    for module in preload:
+        try:
+            __import__(module)
+        except Exception as e:
+            preload_errors[module] = f"{type(e).__name__}: {e}"
+    requests = sys.stdin.buffer
+    for line in requests:
+        request = json.loads(line)
+        pid = os.fork()
+        if pid == 0:
+            _run_child(request)
+        os.write(1, (json.dumps({"pid": pid, "preload_errors": preload_errors}) + "\n").encode())
+        _, status = os.waitpid(pid, 0)
+        returncode = os.waitstatus_to_exitcode(status)
+        os.write(1, (json.dumps({"returncode": returncode}) + "\n").encode())
+
+
+def _run_child(request):
+    import runpy
+    import traceback
+
+    code = 0
+    try:
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        for fd, path in ((1, request["stdout"]), (2, request["stderr"])):
+            os.dup2(os.open(path, os.O_WRONLY), fd)
+        sys.stdin = open(0, closefd=False)
+        os.chdir(request["cwd"])
+        sys.argv = list(request["argv"])
+        sys.path[0] = os.path.dirname(sys.argv[0])
+        runpy.run_path(sys.argv[0], run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+KILL_GRACE = 5
+OUTPUT_POLL_INTERVAL = 0.05
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class _Worker:
+    def __init__(self, preload):
+        self.process = subprocess.Popen(
+            ["python", os.path.abspath(__file__), *preload],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            bufsize=0,
+        )
+        self._buffer = b""
+
+    def send(self, message):
+        self.process.stdin.write((json.dumps(message) + "\n").encode())
+
+    def receive(self, timeout):
+        """Read one reply, or return None if none arrives within timeout seconds."""
+        fd = self.process.stdout.fileno()
+        while b"\n" not in self._buffer:
+            ready, _, _ = select.select([fd], [], [], max(timeout, 0))
+            if not ready:
+                return None
+            data = os.read(fd, 4096)
+            if not data:
+                raise EOFError("python worker exited")
+            self._buffer += data
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return json.loads(line)
+
+    def close(self):
+        self.process.kill()
+        self.process.wait()
+        self.process.stdin.close()
+        self.process.stdout.close()
+
+
+class PythonWorkerPool:
+    """
+    Pool of pre-started interpreters that run Python files by forking.
+    run() mirrors subprocess.run(capture_output=True, text=True, timeout=...):
+    it returns a CompletedProcess and raises TimeoutExpired when the script runs
+    too long. Workers are started lazily, up to `size` of them.
+    Preload modules that failed to import are recorded in preload_errors.
+    """
+
+    def __init__(self, size, preload=()):
+        self.size = size
+        self.preload = list(preload)
+        self.preload_errors = {}
+        self._idle = queue.Queue()
+        self._started = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle.empty() and self._started < self.size:
+                self._started += 1
+                return _Worker(self.preload)
+        return self._idle.get()
+
+    def _discard(self, worker):
+        worker.close()
+        with self._lock:
+            self._started -= 1
+
+    def run(self, commands, cwd, timeout, stdout_path=None, stderr_path=None, max_bytes=None):
+        """
+        Run commands in a worker. By default the output is read back into the
+        CompletedProcess; with stdout_path and stderr_path the script writes to
+        those files and is left for the caller to read (stdout and stderr are
+        then None). With max_bytes, the script is killed once the two files
+        together grow past it.
+        """
+        deadline = time.monotonic() + timeout
+        worker = self._acquire()
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                keep_files = stdout_path is not None
+                stdout_path = stdout_path or os.path.join(tmp, "stdout")
+                stderr_path = stderr_path or os.path.join(tmp, "stderr")
+                for path in (stdout_path, stderr_path):
+                    open(path, "w").close()
+                worker.send({
+                    "argv": commands[1:],
+                    "cwd": cwd,
+                    "stdout": stdout_path,
+                    "stderr": stderr_path,
+                })
+                started = worker.receive(deadline - time.monotonic())
+                if started is None:
+                    raise RuntimeError("python worker did not respond")
+                pid = started["pid"]
+                self.preload_errors.update(started["preload_errors"])
+                while True:
+                    remaining = deadline - time.monotonic()
+                    reply = worker.receive(min(remaining, OUTPUT_POLL_INTERVAL) if max_bytes else remaining)
+                    if reply is not None:
+                        break
+                    timed_out = time.monotonic() >= deadline
+                    if timed_out or _size(stdout_path) + _size(stderr_path) > max_bytes:
+                        os.kill(pid, signal.SIGKILL)
+                        # The worker still reports the killed child's exit status.
+                        reply = worker.receive(KILL_GRACE)
+                        if reply is None:
+                            raise RuntimeError("python worker did not respond")
+                        if timed_out:
+                            self._idle.put(worker)
+                            worker = None
+                            raise subprocess.TimeoutExpired(commands, timeout)
+                        break
+                stdout = stderr = None
+                if not keep_files:
+                    with open(stdout_path, errors="replace") as f:
+                        stdout = f.read()
+                    with open(stderr_path, errors="replace") as f:
+                        stderr = f.read()
+        except BaseException:
+            if worker is not None:
+                self._discard(worker)
+            raise
+        self._idle.put(worker)
+        return subprocess.CompletedProcess(commands, reply["returncode"], stdout, stderr)
+
+    def stats(self):
+        if not self.preload_errors:
+            return f"Python pool: preloaded {', '.join(self.preload) or 'nothing'}"
+        failed = "; ".join(f"{module} ({error})" for module, error in sorted(self.preload_errors.items()))
+        return f"Python pool: could not preload {failed}"
+
+    def close(self):
+        while not self._idle.empty():
+            self._discard(self._idle.get())
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_python_pool():
+    """Return the shared pool, or None when PYTHON_POOL_SIZE is 0 or fork is unavailable."""
+    global _pool
+    # Imported here because workers run this file as a script, outside the project.
+    from config import PYTHON_POOL_SIZE, PYTHON_POOL_PRELOAD
+
+    if PYTHON_POOL_SIZE <= 0 or not hasattr(os, "fork"):
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = PythonWorkerPool(PYTHON_POOL_SIZE, PYTHON_POOL_PRELOAD)
+            atexit.register(_pool.close)
+    return _pool
+
+
+def current_python_pool():
+    """The shared pool if a script has run in it, without starting one."""
+    return _pool
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1:])
@@ -1,6 +1,37 @@
 import os
-import subprocess
+import shutil
+import tempfile
+import time
 from google.genai import types
+from config import RUN_OUTPUT_HEAD_BYTES, RUN_OUTPUT_TAIL_BYTES, RUN_OUTPUT_MAX_BYTES, RUN_OUTPUT_LOG_DIR, RUN_OUTPUT_LOG_KEEP
+from functions.output_capture import BoundedOutput, run_captured
+from functions.python_pool import get_python_pool
+
+def _keep_log(abs_working_dir, file_path, stream, spill_path):
+    """Move the spill file of a stream that was cut into RUN_OUTPUT_LOG_DIR and return its new path."""
+    log_dir = os.path.join(abs_working_dir, RUN_OUTPUT_LOG_DIR)
+    os.makedirs(log_dir, exist_ok=True)
+    prefix = f"{os.path.splitext(os.path.basename(file_path))[0]}-{time.strftime('%Y%m%d-%H%M%S')}-"
+    fd, path = tempfile.mkstemp(suffix=f".{stream}.log", prefix=prefix, dir=log_dir)
+    os.close(fd)
+    # The spill file is in the system temporary directory, which may be on another filesystem.
+    shutil.move(spill_path, path)
+    return path
+
+
+def _prune_logs(log_dir):
+    """Remove all but the newest RUN_OUTPUT_LOG_KEEP logs."""
+    try:
+        entries = [entry for entry in os.scandir(log_dir) if entry.name.endswith(".log")]
+    except FileNotFoundError:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+    for entry in entries[RUN_OUTPUT_LOG_KEEP:]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
 
 def run_python_file(working_directory: str, file_path: str, args=None) -> str:
     abs_working_dir = os.path.abspath(working_directory)
@@ -18,23 +49,54 @@ def run_python_file(working_directory: str, file_path: str, args=None) -> str:
         if args:
             commands.extend(args)
 
-        result = subprocess.run(
-            commands,
-            capture_output=True,
-            text=True,
-            timeout=30,
-            cwd=abs_working_dir,
-        )
+        # Output is streamed into files or bounded buffers rather than read
+        # into memory whole, so a script that floods its output costs at most
+        # the head and tail of each stream. The files live outside the working
+        # directory; only a stream that was cut is kept, under RUN_OUTPUT_LOG_DIR.
+        pool = get_python_pool()
+        kept = []
         output = []
-        
-        if result.stdout:
-            output.append(f"STDOUT:\n{result.stdout}")
-            
-        if result.stderr:
-            output.append(f"STDERR:\n{result.stderr}")
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = (os.path.join(tmp, "stdout"), os.path.join(tmp, "stderr"))
+            if pool:
+                result = pool.run(
+                    commands,
+                    abs_working_dir,
+                    timeout=30,
+                    stdout_path=paths[0],
+                    stderr_path=paths[1],
+                    max_bytes=RUN_OUTPUT_MAX_BYTES,
+                )
+                stdout, stderr = (
+                    BoundedOutput.from_file(path, RUN_OUTPUT_HEAD_BYTES, RUN_OUTPUT_TAIL_BYTES)
+                    for path in paths
+                )
+                returncode = result.returncode
+                exceeded = stdout.total + stderr.total > RUN_OUTPUT_MAX_BYTES
+            else:
+                stdout, stderr = (
+                    BoundedOutput(RUN_OUTPUT_HEAD_BYTES, RUN_OUTPUT_TAIL_BYTES, path if RUN_OUTPUT_LOG_DIR else None)
+                    for path in paths
+                )
+                returncode, exceeded = run_captured(
+                    commands, abs_working_dir, 30, stdout, stderr, RUN_OUTPUT_MAX_BYTES
+                )
+
+            for name, stream in (("STDOUT", stdout), ("STDERR", stderr)):
+                if not stream.total:
+                    continue
+                spill_name = None
+                if RUN_OUTPUT_LOG_DIR and stream.truncated:
+                    kept.append(_keep_log(abs_working_dir, file_path, name.lower(), stream.spill_path))
+                    spill_name = os.path.relpath(kept[-1], abs_working_dir)
+                output.append(f"{name}:\n{stream.text(spill_name)}")
+        if kept:
+            _prune_logs(os.path.dirname(kept[0]))
 
-        if result.returncode != 0:
-            output.append(f"Process exited with code {result.returncode}")
+        if exceeded:
+            output.append(f"Process killed after producing more than {RUN_OUTPUT_MAX_BYTES} bytes of output")
+        elif returncode != 0:
+            output.append(f"Process exited with code {returncode}")
 
         return "\n".join(output) if output else "No output produced."
     except Exception as e:
@@ -42,7 +104,7 @@ def run_python_file(working_directory: str, file_path: str, args=None) -> str:
 
 schema_run_python_file = types.FunctionDeclaration(
     name="run_python_file",
-    description="Executes a Python file within the working directory and returns the output from the interpreter.",
+    description="Executes a Python file within the working directory and returns the output from the interpreter. Long output is cut to its beginning and end; the full output is saved to a log file that can be read with get_file_content.",
     parameters=types.Schema(
         type=types.Type.OBJECT,
         properties={
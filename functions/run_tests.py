@@ -0,0 +1,257 @@
+import os
+import re
+import ast
+import sys
+import fnmatch
+import threading
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from google.genai import types
+from config import RUN_TESTS_WORKERS, RUN_TESTS_TIMEOUT, RUN_TESTS_MAX_FAILURES
+from functions.workspace_index import IgnoreRules, workspace_index
+
+TEST_FILE_PATTERNS = ("test_*.py", "*_test.py", "tests.py")
+RAN = re.compile(r"^Ran (\d+) tests? in ([\d.]+)s$", re.MULTILINE)
+RESULT = re.compile(r"^(OK|FAILED|NO TESTS RAN)(?: \((.*)\))?$", re.MULTILINE)
+FAILURE = re.compile(r"^(FAIL|ERROR): (.+)$")
+
+
+def _imported_modules(source, module_package):
+    """
+    Absolute names of the modules a file imports, including the packages
+    they are in. For `from a import b` both a and a.b are included, since b
+    may be a submodule.
+    """
+    modules = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            modules.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:
+                parts = module_package.split(".") if module_package else []
+                if node.level - 1 > len(parts):
+                    continue
+                parts = parts[:len(parts) - (node.level - 1)]
+                base = ".".join(parts + ([base] if base else []))
+            if base:
+                modules.add(base)
+            modules.update(f"{base}.{alias.name}" if base else alias.name for alias in node.names)
+    return {".".join(parts[:i]) for parts in (m.split(".") for m in modules) for i in range(1, len(parts) + 1)}
+
+
+class ImportGraph:
+    """
+    Which Python files below a root import which others, from an AST parse of
+    each file. refresh() re-parses only files whose (mtime, size) changed.
+    A module name is resolved the way the interpreter would find it when a
+    file is run from its own directory or from the root: as a .py file or a
+    package __init__.py below either one.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        ignore = IgnoreRules.for_root(self.root)
+        seen = set()
+        with self._lock:
+            for rel_path, is_dir, _ in workspace_index.walk(self.root, self.root, 0, ignore):
+                if is_dir or not rel_path.endswith(".py"):
+                    continue
+                seen.add(rel_path)
+                try:
+                    st = os.stat(os.path.join(self.root, rel_path))
+                except OSError:
+                    continue
+                stamp = (st.st_mtime_ns, st.st_size)
+                if self._files.get(rel_path, (None,))[0] != stamp:
+                    self._files[rel_path] = (stamp, self._parse(rel_path))
+            for rel_path in set(self._files) - seen:
+                del self._files[rel_path]
+
+    def _parse(self, rel_path):
+        package = os.path.dirname(rel_path).replace("/", ".")
+        try:
+            with open(os.path.join(self.root, rel_path), encoding="utf-8", errors="replace") as f:
+                return _imported_modules(f.read(), package)
+        except (OSError, SyntaxError, ValueError):
+            return set()
+
+    def files(self):
+        with self._lock:
+            return sorted(self._files)
+
+    def dependencies(self, rel_path):
+        """Files below the root that rel_path imports directly."""
+        with self._lock:
+            modules = self._files[rel_path][1]
+            known = self._files
+        found = set()
+        for directory in {os.path.dirname(rel_path), ""}:
+            for module in modules:
+                path = module.replace(".", "/")
+                for candidate in (f"{path}.py", f"{path}/__init__.py"):
+                    candidate = os.path.normpath(os.path.join(directory, candidate))
+                    if candidate in known and candidate != rel_path:
+                        found.add(candidate)
+        return found
+
+    def affected(self, changed):
+        """Every file that imports one of the changed files, directly or not, along with the changed files."""
+        importers = {}
+        for rel_path in self.files():
+            for dependency in self.dependencies(rel_path):
+                importers.setdefault(dependency, set()).add(rel_path)
+        affected = set(changed)
+        pending = list(changed)
+        while pending:
+            for importer in importers.get(pending.pop(), ()):
+                if importer not in affected:
+                    affected.add(importer)
+                    pending.append(importer)
+        return affected
+
+
+_graphs = {}
+_graphs_lock = threading.Lock()
+
+
+def get_import_graph(root):
+    root = os.path.abspath(root)
+    with _graphs_lock:
+        if root not in _graphs:
+            _graphs[root] = ImportGraph(root)
+        return _graphs[root]
+
+
+def is_test_file(rel_path):
+    name = os.path.basename(rel_path)
+    return any(fnmatch.fnmatch(name, pattern) for pattern in TEST_FILE_PATTERNS)
+
+
+def _run_test_file(abs_working_dir, rel_path):
+    """
+    Run one test file the way `python -m unittest` would from its directory and
+    summarize the result. The working directory is put on PYTHONPATH as well,
+    since ImportGraph resolves imports against both.
+    """
+    directory = os.path.join(abs_working_dir, os.path.dirname(rel_path))
+    module = os.path.splitext(os.path.basename(rel_path))[0]
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [abs_working_dir, env.get("PYTHONPATH")]))
+    try:
+        result = subprocess.run(
+            [sys.executable, "-m", "unittest", module],
+            cwd=directory,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            text=True,
+            timeout=RUN_TESTS_TIMEOUT,
+        )
+    except subprocess.TimeoutExpired:
+        return {"file": rel_path, "tests": 0, "status": f"timed out after {RUN_TESTS_TIMEOUT}s", "failures": []}
+    output = result.stderr
+    ran = RAN.search(output)
+    verdict = RESULT.search(output)
+    failures = []
+    for block in output.split("=" * 70 + "\n")[1:]:
+        # The last block runs on into the "Ran N tests" trailer.
+        header, _, traceback = block.partition("-" * 70 + "\n")
+        traceback = traceback.split("-" * 70)[0]
+        match = FAILURE.match(header.strip())
+        if match:
+            # The last traceback line holds the exception, e.g. AssertionError: 5 != 6.
+            detail = next((line for line in reversed(traceback.splitlines()) if line.strip()), "")
+            failures.append(f"{match.group(1)}: {match.group(2)}\n    {detail.strip()}")
+    tests = int(ran.group(1)) if ran else 0
+    if verdict and tests == 0 and verdict.group(1) != "FAILED":
+        # Newer Pythons say NO TESTS RAN (and exit with 5), older ones say OK.
+        status = "no tests"
+    elif verdict:
+        status = verdict.group(1) + (f" ({verdict.group(2)})" if verdict.group(2) else "")
+    else:
+        last = output.strip().splitlines()[-1:] or [f"exit code {result.returncode}"]
+        status = f"did not finish: {last[0]}"
+    return {"file": rel_path, "tests": tests, "status": status, "failures": failures}
+
+
+def run_tests(working_directory: str, changed_files=None, run_all: bool = False) -> str:
+    abs_working_dir = os.path.abspath(working_directory)
+    changed = []
+    for file_path in changed_files or []:
+        abs_file_path = os.path.abspath(os.path.join(working_directory, file_path))
+        if not abs_file_path.startswith(abs_working_dir):
+            return f'Error: Cannot test "{file_path}" as it is outside the permitted working directory'
+        changed.append(os.path.relpath(abs_file_path, abs_working_dir))
+
+    try:
+        graph = get_import_graph(abs_working_dir)
+        graph.refresh()
+        test_files = [rel_path for rel_path in graph.files() if is_test_file(rel_path)]
+        if not test_files:
+            return "No test files (test_*.py, *_test.py, tests.py) found in the working directory."
+
+        # Tests can't be traced to a change outside the Python files (data,
+        # config), so such a change runs everything, as does having no changes.
+        if run_all or not changed or any(not path.endswith(".py") for path in changed):
+            selected = test_files
+            scope = "all"
+        else:
+            affected = graph.affected(changed)
+            selected = [rel_path for rel_path in test_files if rel_path in affected]
+            scope = f"affected by {', '.join(changed)}"
+            if not selected:
+                return (
+                    f"No tests are affected by {', '.join(changed)} "
+                    f"({len(test_files)} test files checked); pass run_all=true to run every test."
+                )
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(min(RUN_TESTS_WORKERS, len(selected))) as executor:
+            results = list(executor.map(lambda rel_path: _run_test_file(abs_working_dir, rel_path), selected))
+        elapsed = time.perf_counter() - start
+
+        failing = [r for r in results if not r["status"].startswith(("OK", "no tests"))]
+        total = sum(r["tests"] for r in results)
+        lines = [
+            f"Ran {total} tests in {len(selected)} of {len(test_files)} test files ({scope}) in {elapsed:.1f}s: "
+            + ("all passed." if not failing else f"{len(failing)} files failing.")
+        ]
+        shown = 0
+        for r in results:
+            lines.append(f"{r['file']}: {r['status']}, {r['tests']} tests")
+            for failure in r["failures"]:
+                if shown == RUN_TESTS_MAX_FAILURES:
+                    break
+                lines.append(f"  {failure}")
+                shown += 1
+        hidden = sum(len(r["failures"]) for r in results) - shown
+        if hidden:
+            lines.append(f"  [{hidden} more failures not shown; run the test file with run_python_file for details]")
+        return "\n".join(lines)
+    except Exception as e:
+        return f"Error: running tests: {e}"
+
+schema_run_tests = types.FunctionDeclaration(
+    name="run_tests",
+    description="Runs the unittest test files (test_*.py, *_test.py, tests.py) affected by changed files, found by following imports, in parallel, and returns a pass/fail summary with the failing tests. Without changed_files, the files written this session are used; if there are none, every test runs.",
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "changed_files": types.Schema(
+                type=types.Type.ARRAY,
+                items=types.Schema(type=types.Type.STRING),
+                description="Optional paths of changed files, relative to the working directory. Defaults to the files written this session.",
+            ),
+            "run_all": types.Schema(
+                type=types.Type.BOOLEAN,
+                description="Run every test file instead of only the affected ones.",
+            ),
+        },
+    ),
+)
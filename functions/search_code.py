@@ -0,0 +1,250 @@
+import os
+import re
+import threading
+from collections import defaultdict
+from google.genai import types
+from config import SEARCH_MAX_RESULTS, SEARCH_MAX_FILE_BYTES
+from functions.workspace_index import IgnoreRules, workspace_index
+
+WORD = re.compile(r"\w{3,}")
+DEFINITION = re.compile(r"^\s*(?:async\s+def|def|class)\s+(\w+)|^\s*([\w.]+)\s*(?::[^=]*)?=(?!=)")
+
+
+def _trigrams(text):
+    """Trigrams of the lowercased word tokens in text."""
+    return {
+        token[i:i + 3]
+        for token in set(WORD.findall(text.lower()))
+        for i in range(len(token) - 2)
+    }
+
+
+class CodeIndex:
+    """
+    Trigram index over the text files below a root directory.
+    refresh() re-reads only files whose (mtime, size) changed since they were
+    indexed and drops files that disappeared, so keeping it current costs a stat
+    per file. Trigrams come from word tokens only; queries use the trigrams of
+    their word runs, which always narrows to a superset of the true matches.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self._files = {}
+        self._postings = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        ignore = IgnoreRules.for_root(self.root)
+        seen = set()
+        with self._lock:
+            for rel_path, is_dir, size in workspace_index.walk(self.root, self.root, 0, ignore):
+                if is_dir or size > SEARCH_MAX_FILE_BYTES:
+                    continue
+                seen.add(rel_path)
+                try:
+                    st = os.stat(os.path.join(self.root, rel_path))
+                except OSError:
+                    continue
+                stamp = (st.st_mtime_ns, st.st_size)
+                if self._files.get(rel_path, (None,))[0] != stamp:
+                    self._index_file(rel_path, stamp)
+            for rel_path in set(self._files) - seen:
+                self._remove(rel_path)
+
+    def _index_file(self, rel_path, stamp):
+        self._remove(rel_path)
+        text = read_text(os.path.join(self.root, rel_path))
+        trigrams = _trigrams(text) if text is not None else set()
+        self._files[rel_path] = (stamp, trigrams)
+        for trigram in trigrams:
+            self._postings[trigram].add(rel_path)
+
+    def _remove(self, rel_path):
+        entry = self._files.pop(rel_path, None)
+        if entry:
+            for trigram in entry[1]:
+                self._postings[trigram].discard(rel_path)
+
+    def candidates(self, literals):
+        """Return files that may contain every literal, or all indexed files."""
+        required = set()
+        for literal in literals:
+            required |= _trigrams(literal)
+        with self._lock:
+            if not required:
+                return sorted(self._files)
+            sets = sorted((self._postings.get(t, set()) for t in required), key=len)
+            return sorted(set.intersection(*sets))
+
+
+def read_text(path):
+    """Return the file's text, or None for binary or unreadable files."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if b"\0" in data[:8192]:
+        return None
+    return data.decode("utf-8", errors="replace")
+
+
+def required_literals(pattern):
+    """
+    Return literal strings that every match of the regex must contain. Only
+    literals outside groups and character classes count, and a pattern with
+    alternation requires nothing, so the result is always safe to filter on.
+    """
+    if "|" in pattern:
+        return []
+    runs, current = [], ""
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        literal = None
+        if c == "\\" and i + 1 < len(pattern):
+            if not pattern[i + 1].isalnum():
+                literal = pattern[i + 1]
+            i += 2
+        elif c == "[":
+            end = pattern.find("]", i + 2)
+            i = len(pattern) if end == -1 else end + 1
+        elif c in "*?{":
+            # The previous character was optional after all.
+            current = current[:-1]
+            end = pattern.find("}", i) if c == "{" else i
+            i = len(pattern) if end == -1 else end + 1
+        elif c == "(":
+            depth += 1
+            i += 1
+        elif c == ")":
+            depth -= 1
+            i += 1
+        elif c in ".^$+":
+            i += 1
+        else:
+            literal = c
+            i += 1
+        if literal is not None and depth == 0:
+            current += literal
+        else:
+            runs.append(current)
+            current = ""
+    runs.append(current)
+    return [run for run in runs if run]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_code_index(root):
+    root = os.path.abspath(root)
+    with _indexes_lock:
+        if root not in _indexes:
+            _indexes[root] = CodeIndex(root)
+        return _indexes[root]
+
+
+def _defines(line, pattern):
+    """Whether line defines or assigns a name that matches pattern."""
+    match = DEFINITION.match(line)
+    return bool(match) and bool(pattern.search(match.group(1) or match.group(2)))
+
+
+def search_code(working_directory: str, query: str, regex: bool = False, ignore_case: bool = False, directory: str = ".", max_results: int = SEARCH_MAX_RESULTS, context_lines: int = 0) -> str:
+    abs_working_dir = os.path.abspath(working_directory)
+    target_dir = os.path.abspath(os.path.join(working_directory, directory))
+
+    if not target_dir.startswith(abs_working_dir):
+        return f'Error: Cannot search "{directory}" as it is outside the permitted working directory'
+    if not query:
+        return "Error: query must not be empty"
+
+    flags = re.IGNORECASE if ignore_case else 0
+    try:
+        pattern = re.compile(query if regex else re.escape(query), flags)
+    except re.error as e:
+        return f"Error: invalid regular expression: {e}"
+    max_results = min(max(int(max_results), 1), 100)
+    context_lines = min(max(int(context_lines), 0), 3)
+
+    try:
+        index = get_code_index(abs_working_dir)
+        index.refresh()
+        prefix = os.path.relpath(target_dir, abs_working_dir).replace(os.sep, "/")
+        files = index.candidates(required_literals(query) if regex else [query])
+        if prefix != ".":
+            files = [f for f in files if f.startswith(prefix + "/")]
+
+        ranked = []
+        for rel_path in files:
+            text = read_text(os.path.join(abs_working_dir, rel_path))
+            if text is None:
+                continue
+            lines = text.splitlines()
+            hits = [n for n, line in enumerate(lines) if pattern.search(line)]
+            if hits:
+                definitions = sum(1 for n in hits if _defines(lines[n], pattern))
+                ranked.append((-definitions, -len(hits), rel_path, lines, hits))
+    except Exception as e:
+        return f"Error searching code: {e}"
+
+    if not ranked:
+        return f'No matches for "{query}"'
+    ranked.sort(key=lambda r: r[:3])
+
+    output = []
+    shown = 0
+    total = sum(len(r[4]) for r in ranked)
+    for _, _, rel_path, lines, hits in ranked:
+        if shown >= max_results:
+            break
+        last = -1
+        for n in hits[:max_results - shown]:
+            for m in range(max(n - context_lines, last + 1), min(n + context_lines + 1, len(lines))):
+                separator = ":" if m == n else "-"
+                output.append(f"{rel_path}{separator}{m + 1}{separator} {lines[m].rstrip()}")
+            last = n + context_lines
+            shown += 1
+    if total > shown:
+        output.append(f"[{total - shown} more matches not shown; narrow the query or raise max_results]")
+    return "\n".join(output)
+
+
+schema_search_code = types.FunctionDeclaration(
+    name="search_code",
+    description="Searches the text files in the working directory for a literal string or a regular expression, line by line, and returns matching lines as file:line: text. Files with definitions matching the query are listed first.",
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "query": types.Schema(
+                type=types.Type.STRING,
+                description="The text to search for, or a Python regular expression if regex is true.",
+            ),
+            "regex": types.Schema(
+                type=types.Type.BOOLEAN,
+                description="Treat the query as a regular expression. Defaults to false.",
+            ),
+            "ignore_case": types.Schema(
+                type=types.Type.BOOLEAN,
+                description="Match case-insensitively. Defaults to false.",
+            ),
+            "directory": types.Schema(
+                type=types.Type.STRING,
+                description="Optional directory to limit the search to, relative to the working directory.",
+            ),
+            "context_lines": types.Schema(
+                type=types.Type.INTEGER,
+                description="Number of lines of context to show around each match (default 0, at most 3).",
+            ),
+            "max_results": types.Schema(
+                type=types.Type.INTEGER,
+                description=f"Maximum number of matching lines to return (default {SEARCH_MAX_RESULTS}, at most 100).",
+            ),
+        },
+        required=["query"],
+    ),
+)
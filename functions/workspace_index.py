@@ -0,0 +1,119 @@
+import os
+import fnmatch
+import threading
+
+DEFAULT_IGNORES = (".git", ".venv", "venv", "__pycache__", ".agent")
+
+
+class IgnoreRules:
+    """
+    A small subset of .gitignore matching: blank lines and comments are skipped,
+    negations are not supported, a trailing "/" matches directories only, and a
+    pattern containing "/" is matched against the path relative to the root.
+    """
+
+    def __init__(self, patterns=()):
+        self.rules = []
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern or pattern.startswith(("#", "!")):
+                continue
+            dir_only = pattern.endswith("/")
+            pattern = pattern.strip("/")
+            if pattern:
+                self.rules.append((pattern, dir_only, "/" in pattern))
+
+    @classmethod
+    def for_root(cls, root):
+        patterns = list(DEFAULT_IGNORES)
+        try:
+            with open(os.path.join(root, ".gitignore")) as f:
+                patterns.extend(f.read().splitlines())
+        except OSError:
+            pass
+        return cls(patterns)
+
+    def ignored(self, rel_path, is_dir):
+        rel_path = rel_path.replace(os.sep, "/")
+        name = rel_path.rsplit("/", 1)[-1]
+        for pattern, dir_only, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if fnmatch.fnmatch(rel_path if anchored else name, pattern):
+                return True
+        return False
+
+
+class WorkspaceIndex:
+    """
+    Directory listings built with os.scandir and kept per directory.
+    A cached listing is reused while the directory's mtime is unchanged, which
+    covers entries being added, removed or renamed. File sizes can change without
+    touching the directory's mtime, so writers must call invalidate().
+    """
+
+    def __init__(self):
+        self._dirs = {}
+        self._lock = threading.Lock()
+
+    def list_dir(self, path):
+        """Return sorted (name, is_dir, size) tuples for the entries of path."""
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            cached = self._dirs.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        entries = []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    size = entry.stat().st_size
+                except OSError:
+                    size = 0
+                entries.append((entry.name, entry.is_dir(), size))
+        entries.sort()
+        with self._lock:
+            self._dirs[path] = (mtime, entries)
+        return entries
+
+    def walk(self, root, directory, depth=1, ignore=None):
+        """
+        Yield (relative path, is_dir, size) for entries under directory, descending
+        at most depth levels (0 for no limit). Paths are relative to directory;
+        ignore rules are matched against paths relative to root.
+        """
+        def visit(path, prefix, level):
+            for name, is_dir, size in self.list_dir(path):
+                child = os.path.join(path, name)
+                if ignore and ignore.ignored(os.path.relpath(child, root), is_dir):
+                    continue
+                yield prefix + name, is_dir, size
+                # Symlinked directories are listed but not descended into, to avoid cycles.
+                if is_dir and (depth <= 0 or level < depth) and not os.path.islink(child):
+                    yield from visit(child, prefix + name + "/", level + 1)
+
+        yield from visit(os.path.abspath(directory), "", 1)
+
+    def invalidate(self, path):
+        """Forget listings of path and every directory above it."""
+        path = os.path.abspath(path)
+        with self._lock:
+            for cached_path in list(self._dirs):
+                if path == cached_path or path.startswith(cached_path.rstrip(os.sep) + os.sep):
+                    del self._dirs[cached_path]
+
+    def clear_tree(self, path):
+        """Forget listings of path and every directory below it."""
+        path = os.path.abspath(path)
+        prefix = path.rstrip(os.sep) + os.sep
+        with self._lock:
+            for cached_path in list(self._dirs):
+                if cached_path == path or cached_path.startswith(prefix):
+                    del self._dirs[cached_path]
+
+    def clear(self):
+        with self._lock:
+            self._dirs.clear()
+
+
+workspace_index = WorkspaceIndex()
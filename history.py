@@ -0,0 +1,138 @@
+from google.genai import types
+
+from config import HISTORY_KEEP_RECENT, HISTORY_STUB_CHARS
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(content):
+    """Rough token count for a Content, at about four characters per token."""
+    chars = 0
+    for part in content.parts or []:
+        if part.text:
+            chars += len(part.text)
+        if part.function_call:
+            chars += len(part.function_call.name or "") + len(str(part.function_call.args))
+        if part.function_response:
+            chars += len(str(part.function_response.response))
+    return chars // CHARS_PER_TOKEN + 1
+
+
+class HistoryManager:
+    """
+    Keeps the conversation sent to the model under a token budget.
+    Once the budget is exceeded, large tool results outside the last `keep_recent`
+    messages are replaced by short stubs. If that is not enough and `summarize` is
+    set, older turns are folded into a summary attached to the first user message.
+    """
+
+    def __init__(self, token_budget, keep_recent=HISTORY_KEEP_RECENT, summarize=False, stub_chars=HISTORY_STUB_CHARS):
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.summarize = summarize
+        self.stub_chars = stub_chars
+        self.summary = []
+        self._measured_tokens = None
+        self._measured_count = 0
+
+    def record_usage(self, usage_metadata, message_count):
+        """Remember the prompt token count the API reported for the first message_count messages."""
+        prompt_tokens = getattr(usage_metadata, "prompt_token_count", None)
+        if isinstance(prompt_tokens, int):
+            self._measured_tokens = prompt_tokens
+            self._measured_count = message_count
+
+    def count_tokens(self, messages):
+        if self._measured_tokens is None or self._measured_count > len(messages):
+            return sum(estimate_tokens(content) for content in messages)
+        return self._measured_tokens + sum(
+            estimate_tokens(content) for content in messages[self._measured_count:]
+        )
+
+    def compact(self, messages):
+        """
+        Shrink messages in place until it fits the budget or nothing more can be
+        done. Returns whether messages was over budget and has been compacted.
+        """
+        if self.count_tokens(messages) <= self.token_budget:
+            return False
+        self._measured_tokens = None
+        old = len(messages) - self.keep_recent
+        for i in range(old):
+            messages[i] = self._elide(messages[i])
+        if self.summarize and self.count_tokens(messages) > self.token_budget:
+            self._fold(messages)
+        return True
+
+    def _elide(self, content):
+        parts = []
+        changed = False
+        for part in content.parts or []:
+            call = part.function_call
+            response = part.function_response
+            result = response.response.get("result") if response and response.response else None
+            if isinstance(result, str) and len(result) > self.stub_chars:
+                part = types.Part.from_function_response(
+                    name=response.name,
+                    response={
+                        "result": f"[{len(result)} characters of output elided to save context; "
+                        f"call {response.name} again if it is still needed]"
+                    },
+                )
+                changed = True
+            elif call and any(
+                isinstance(v, str) and len(v) > self.stub_chars for v in (call.args or {}).values()
+            ):
+                args = {
+                    k: f"[{len(v)} characters elided to save context]"
+                    if isinstance(v, str) and len(v) > self.stub_chars else v
+                    for k, v in call.args.items()
+                }
+                part = types.Part(function_call=types.FunctionCall(id=call.id, name=call.name, args=args))
+                changed = True
+            parts.append(part)
+        return types.Content(role=content.role, parts=parts) if changed else content
+
+    def _fold(self, messages):
+        # The turn after the first user message has to be a model turn, so fold
+        # up to the last model turn that is not among the recent messages (with
+        # keep_recent 0, that can be the last message).
+        cut = None
+        for i in range(len(messages) - max(self.keep_recent, 1), 1, -1):
+            if messages[i].role == "model":
+                cut = i
+                break
+        if cut is None:
+            return
+        for content in messages[1:cut]:
+            self.summary.extend(_summarize(content))
+        prompt_parts = [part for part in messages[0].parts if not _is_summary(part)]
+        summary_part = types.Part(text=SUMMARY_HEADER + "\n".join(self.summary))
+        messages[0:cut] = [types.Content(role=messages[0].role, parts=prompt_parts + [summary_part])]
+
+
+SUMMARY_HEADER = "Summary of earlier steps, whose messages were removed to save context:\n"
+
+
+def _is_summary(part):
+    return bool(part.text) and part.text.startswith(SUMMARY_HEADER)
+
+
+def _summarize(content):
+    lines = []
+    for part in content.parts or []:
+        if part.function_call:
+            args = ", ".join(
+                f"{k}={_shorten(repr(v))}" for k, v in (part.function_call.args or {}).items()
+            )
+            lines.append(f"- called {part.function_call.name}({args})")
+        elif part.function_response:
+            result = str((part.function_response.response or {}).get("result", ""))
+            lines.append(f"  -> {part.function_response.name} returned {len(result)} characters")
+        elif part.text and content.role == "model":
+            lines.append(f"- said: {part.text[:200]}")
+    return lines
+
+
+def _shorten(text, limit=80):
+    return text if len(text) <= limit else text[:limit] + "..."
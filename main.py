@@ -1,72 +1,227 @@
 import os
 import sys
+import time
 import argparse
+import functools
 
-from dotenv import load_dotenv
-from google import genai
-from google.genai import types
+from config import MAX_ITERS, MODEL, MAX_TOOL_WORKERS, RESPONSE_CACHE_DIR, RESPONSE_CACHE_MODES, CHECKPOINT_DIR
+from tracing import tracer, usage_attrs
 
-from config import MAX_ITERS
-from prompts import system_prompt
-from call_function import available_functions, call_function
+_loaded = False
+
+def _load():
+    """
+    Import the SDK and the modules built on it. This takes most of the startup
+    time, so when main.py runs as a script it is deferred until the arguments
+    have been parsed, and --help or a usage error returns without it.
+    """
+    global _loaded, load_dotenv, genai, types, system_prompt, HistoryManager
+    global CachedClient, ResponseCache, ResponseCacheMiss, RetryPolicy, make_limiter
+    global SessionLog, SessionNotFound, SessionState, current_python_pool
+    global available_functions, call_function, call_functions, tool_cache, prefetcher, ToolDispatcher
+    if _loaded:
+        return
+    from dotenv import load_dotenv
+    from google import genai
+    from google.genai import types
+    from prompts import system_prompt
+    from history import HistoryManager
+    from response_cache import CachedClient, ResponseCache, ResponseCacheMiss
+    from retry import RetryPolicy, make_limiter
+    from checkpoint import SessionLog, SessionNotFound
+    from session_state import SessionState
+    from functions.python_pool import current_python_pool
+    from call_function import available_functions, call_function, call_functions, tool_cache, prefetcher, ToolDispatcher
+    _loaded = True
 
 def main():
     # Set up argument parser
     parser = argparse.ArgumentParser(description="Generate content using Google's Gemini API.")
-    parser.add_argument("prompt", type=str, help="The input prompt for the AI model.")
+    parser.add_argument("prompt", type=str, nargs="?", help="The input prompt for the AI model. Optional with --resume, where it continues the session.")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose output (prints extra details).")
+    parser.add_argument("--parallel-tools", action="store_true", help="Run independent function calls from one model turn concurrently.")
+    parser.add_argument("--token-budget", type=int, help="Compact the conversation history once it grows past this many prompt tokens.")
+    parser.add_argument("--summarize-history", action="store_true", help="With --token-budget, fold old turns into a summary when stubbing tool output is not enough.")
+    parser.add_argument("--stream", action="store_true", help="Stream the model's output and start function calls as soon as they arrive.")
+    parser.add_argument("--cache-mode", choices=RESPONSE_CACHE_MODES, default="passthrough", help="Record model responses to the response cache, replay them from it without calling the API, or bypass it (default).")
+    parser.add_argument("--cache-dir", default=RESPONSE_CACHE_DIR, help=f"Directory of the response cache (default {RESPONSE_CACHE_DIR}).")
+    parser.add_argument("--trace", metavar="FILE", help="Write a trace of model calls and tool calls to FILE: Chrome trace-event format if it ends in .json, JSONL otherwise.")
+    parser.add_argument("--resume", metavar="SESSION_ID", help="Rebuild the history of a checkpointed session and carry on from where it stopped.")
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR, help=f"Directory of session checkpoints (default {CHECKPOINT_DIR}).")
     args = parser.parse_args()
+    if not args.prompt and not args.resume:
+        parser.error("a prompt is required unless --resume is given")
+    _load()
   
      # Load environment variables from .env file
     load_dotenv()
     api_key = os.environ.get("GEMINI_API_KEY")
-    if not api_key:
+    replay = args.cache_mode == "replay"
+    if not api_key and not replay:
         print("Error: GEMINI_API_KEY not found in environment variables.")
         sys.exit(1)
                 
-    if args.verbose:
+    if args.verbose and args.prompt:
         print(f"User prompt: {args.prompt}")
        
     # Get the prompt from command line arguments
     api_key = os.environ.get("GEMINI_API_KEY")
-    client = genai.Client(api_key=api_key)
+    client = genai.Client(api_key=api_key) if api_key else None
+    response_cache = None
+    if args.cache_mode in ("record", "replay"):
+        response_cache = ResponseCache(args.cache_dir)
+        client = CachedClient(client, response_cache, args.cache_mode)
 
     user_prompt = args.prompt
     
-    messages = [
-        types.Content(role="user", parts=[types.Part(text=user_prompt)]),
-    ]
-    
-    for iters in range(1, MAX_ITERS + 1):   
+    session = None
+    messages = []
+    if args.resume:
         try:
-            final_response = generate_content(client, messages, args.verbose)
-            if final_response:
-                print("Final response:")
-                print(final_response)
-                return final_response
-        except Exception as e:
-            print(f"Error in generate_content: {e}")
+            session, messages = SessionLog.resume(args.resume, args.checkpoint_dir)
+        except SessionNotFound as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    elif args.checkpoint_dir:
+        session = SessionLog(directory=args.checkpoint_dir)
+    if session:
+        print(f"Session: {session.session_id}")
+    session_state = SessionState()
+    if messages and messages[-1].role == "model":
+        pending_calls = [part.function_call for part in messages[-1].parts or [] if part.function_call]
+        if pending_calls:
+            # The session stopped before the tools the model asked for had run
+            # (or before their results were recorded), so run them now.
+            run_function_calls(pending_calls, messages, args.verbose, args.parallel_tools, session=session_state)
+            session.checkpoint(messages)
+        elif not user_prompt:
+            # The session had already finished; there is nothing left to run.
+            final_response = "".join(part.text for part in messages[-1].parts or [] if part.text)
+            print("Final response:")
+            print(final_response)
+            return final_response
+    if user_prompt:
+        messages.append(types.Content(role="user", parts=[types.Part(text=user_prompt)]))
+        prefetcher.note_prompt(user_prompt)
+    history = None
+    if args.token_budget:
+        history = HistoryManager(args.token_budget, summarize=args.summarize_history)
+    retry_policy = RetryPolicy(limiter=make_limiter(), verbose=args.verbose)
     
-    print(f"Maximum iterations ({MAX_ITERS}) reached.")
-    sys.exit(1)
+    if args.trace:
+        tracer.enable()
+    try:
+        for iters in range(1, MAX_ITERS + 1):   
+            try:
+                with tracer.span("iteration", iteration=iters):
+                    if args.stream:
+                        final_response = generate_content_stream(
+                            client, messages, args.verbose, args.parallel_tools, history, retry_policy, session_state
+                        )
+                    else:
+                        final_response = generate_content(
+                            client, messages, args.verbose, args.parallel_tools, history, retry_policy, session_state
+                        )
+                if final_response:
+                    if session:
+                        session.checkpoint(messages)
+                    if args.verbose:
+                        print(f"Model retries: {retry_policy.retries}")
+                        print(tool_cache.stats())
+                        print(prefetcher.stats())
+                        if current_python_pool():
+                            print(current_python_pool().stats())
+                        if response_cache:
+                            print(response_cache.stats())
+                    if not args.stream:
+                        print("Final response:")
+                        print(final_response)
+                    return final_response
+            except ResponseCacheMiss as e:
+                print(f"Error: {e}")
+                sys.exit(1)
+            except Exception as e:
+                print(f"Error in generate_content: {e}")
+            if session:
+                session.checkpoint(messages)
+    
+        if args.verbose:
+            print(f"Model retries: {retry_policy.retries}")
+            print(tool_cache.stats())
+            print(prefetcher.stats())
+            if current_python_pool():
+                print(current_python_pool().stats())
+            if response_cache:
+                print(response_cache.stats())
+        print(f"Maximum iterations ({MAX_ITERS}) reached.")
+        if session:
+            print(f"Continue with --resume {session.session_id}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        if session:
+            print(f"Interrupted; continue with --resume {session.session_id}")
+        sys.exit(130)
+    except Exception:
+        if session:
+            print(f"Stopped by an error; continue with --resume {session.session_id}")
+        raise
+    finally:
+        prefetcher.close()
+        if args.trace:
+            tracer.export(args.trace)
 
-def generate_content(client, messages, verbose=False):
+def generate_content(client, messages, verbose=False, parallel_tools=False, history=None, retry_policy=None, session=None):
     """
     Generate content using the provided prompt
     Note: The model 'gemini-2.0-flash-001' is used for demonstration purposes.
     Args:
         client (genai.Client): The GenAI client instance.
         messages (list): A list of Content objects containing the user prompt.
+        parallel_tools (bool): Dispatch the turn's function calls concurrently.
+        history (HistoryManager): Keeps messages under a token budget, if given.
+        retry_policy (RetryPolicy): Retries rate-limited and failed model calls.
+        session (SessionState): Shortens repeated file reads, if given.
     """
+    compact_history(messages, history, session)
     
-    response = client.models.generate_content(
-        model="gemini-2.0-flash-001",
-        contents=messages,
-        config=types.GenerateContentConfig(
-            tools=[available_functions], system_instruction=system_prompt
-        ),
+    retry_policy = retry_policy or RetryPolicy(verbose=verbose)
+    with tracer.span("generate_content", "model", messages=len(messages)) as span:
+        response = retry_policy.call(
+            client.models.generate_content,
+            model=MODEL,
+            contents=messages,
+            config=generate_config(),
+        )
+        span.update(usage_attrs(response.usage_metadata))
+    if history:
+        history.record_usage(response.usage_metadata, len(messages))
+    return process_response(response, messages, verbose, parallel_tools, session=session)
+
+def compact_history(messages, history, session):
+    """
+    Compact messages if a HistoryManager is given, and start the session's next
+    turn. Once old tool output may have been elided, the session forgets what
+    it has shown, so no repeated read refers back to content the model has lost.
+    """
+    if history:
+        with tracer.span("compact_history", messages=len(messages)):
+            if history.compact(messages) and session:
+                session.forget_reads()
+    if session:
+        session.next_turn()
+
+@functools.cache
+def generate_config():
+    return types.GenerateContentConfig(
+        tools=[available_functions], system_instruction=system_prompt
     )
-    
+
+def process_response(response, messages, verbose=False, parallel_tools=False, working_directory=None, session=None):
+    """
+    Record a model response in messages and run the function calls it asks for,
+    in working_directory (config.WORKING_DIR by default) and for the given SessionState.
+    Returns the response text when the model made no function calls, otherwise None.
+    """
     if verbose:
         print("Prompt tokens:", response.usage_metadata.prompt_token_count)
         print("Response tokens:", response.usage_metadata.candidates_token_count)
@@ -79,9 +234,85 @@ def generate_content(client, messages, verbose=False):
     if not response.function_calls:
         return response.text
 
+    run_function_calls(response.function_calls, messages, verbose, parallel_tools, working_directory, session)
+
+def run_function_calls(function_calls, messages, verbose=False, parallel_tools=False, working_directory=None, session=None):
+    """Run the function calls of one model turn and record their results in messages."""
+    if parallel_tools:
+        function_call_results = call_functions(
+            function_calls, verbose, working_directory=working_directory, session=session
+        )
+    else:
+        function_call_results = [
+            call_function(function_call_part, verbose, working_directory, session)
+            for function_call_part in function_calls
+        ]
+
+    record_function_results(function_call_results, messages, verbose)
+
+def generate_content_stream(client, messages, verbose=False, parallel_tools=False, history=None, retry_policy=None, session=None):
+    """
+    Streaming variant of generate_content.
+    Text is printed as it arrives, and each function call is handed to a
+    ToolDispatcher as soon as its part is received, so tools run while the model
+    is still producing the rest of the turn. Without parallel_tools the calls
+    still start early but run one at a time, in order.
+    Returns the full response text when the model made no function calls, otherwise None.
+    """
+    compact_history(messages, history, session)
+
+    retry_policy = retry_policy or RetryPolicy(verbose=verbose)
+    parts = []
+    usage_metadata = None
+    max_workers = MAX_TOOL_WORKERS if parallel_tools else 1
+    with ToolDispatcher(verbose, max_workers, session=session) as dispatcher:
+        with tracer.span("generate_content_stream", "model", messages=len(messages)) as span:
+            start = time.perf_counter()
+            stream = retry_policy.stream(
+                client.models.generate_content_stream,
+                model=MODEL,
+                contents=messages,
+                config=generate_config(),
+            )
+            for chunk in stream:
+                if "first_chunk_ms" not in span:
+                    span["first_chunk_ms"] = (time.perf_counter() - start) * 1000
+                if chunk.usage_metadata:
+                    usage_metadata = chunk.usage_metadata
+                if not chunk.candidates or not chunk.candidates[0].content:
+                    continue
+                for part in chunk.candidates[0].content.parts or []:
+                    if part.function_call:
+                        dispatcher.submit(part.function_call)
+                        parts.append(part)
+                    elif part.text:
+                        print(part.text, end="", flush=True)
+                        # Consecutive text chunks are merged into a single part.
+                        if parts and parts[-1].text is not None and not parts[-1].function_call:
+                            parts[-1] = types.Part(text=parts[-1].text + part.text)
+                        else:
+                            parts.append(types.Part(text=part.text))
+            span.update(usage_attrs(usage_metadata))
+        function_call_results = dispatcher.results()
+
+    if history:
+        history.record_usage(usage_metadata, len(messages))
+    if verbose and usage_metadata:
+        print()
+        print("Prompt tokens:", usage_metadata.prompt_token_count)
+        print("Response tokens:", usage_metadata.candidates_token_count)
+
+    messages.append(types.Content(role="model", parts=parts))
+
+    if not function_call_results:
+        print()
+        return "".join(part.text for part in parts if part.text)
+
+    record_function_results(function_call_results, messages, verbose)
+
+def record_function_results(function_call_results, messages, verbose=False):
     function_responses = []
-    for function_call_part in response.function_calls:
-        function_call_result = call_function(function_call_part, verbose)
+    for function_call_result in function_call_results:
         if (
             not function_call_result.parts
             or not function_call_result.parts[0].function_response
@@ -98,3 +329,6 @@ def generate_content(client, messages, verbose=False):
 
 if __name__ == "__main__":
     main()
+else:
+    # Importers (batch.py, the tests) use the module's functions directly.
+    _load()
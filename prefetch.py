@@ -0,0 +1,154 @@
+import os
+import re
+import fnmatch
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import WORKING_DIR, PREFETCH_TOP_N, PREFETCH_MAX_FILE_BYTES, PREFETCH_WORKERS
+from functions.get_file_content import get_file_content
+from functions.workspace_index import IgnoreRules, workspace_index
+
+# Files the system prompt's usual plan reads right after listing a directory.
+LIKELY_NAMES = ("main.py", "tests.py", "test_*.py", "*_test.py", "config.py", "README.md", "pyproject.toml")
+MENTION = re.compile(r"[\w./-]+")
+
+
+def _mentions(prompt):
+    """Words of the prompt that may name a file: full names like pkg/calculator.py and bare stems like calculator."""
+    names = set()
+    for word in MENTION.findall(prompt.lower()):
+        word = word.strip("./-")
+        if word:
+            names.add(word)
+            names.add(os.path.basename(word))
+    return names
+
+
+class Prefetcher:
+    """
+    Reads the files the model is likely to ask for next into tool_cache while
+    its next call is in flight. After get_files_info lists a directory, its
+    files are ranked: names mentioned in the prompt first, then the files the
+    usual plan reads (main.py, tests, config), then the most recently modified.
+    The top `top_n` are read in the background with get_file_content's default
+    arguments, so a later plain read of one of them is a cache hit. A read that
+    arrives while its prefetch is still running waits for it rather than
+    reading the file a second time.
+    """
+
+    def __init__(self, cache, top_n=PREFETCH_TOP_N, max_file_bytes=PREFETCH_MAX_FILE_BYTES, workers=PREFETCH_WORKERS):
+        self.cache = cache
+        self.top_n = top_n
+        self.max_file_bytes = max_file_bytes
+        self.workers = workers
+        self.prefetched = 0
+        self.used = 0
+        self._executor = None
+        self._pending = {}
+        self._unused = set()
+        self._mentions = {}
+        self._lock = threading.Lock()
+
+    def note_prompt(self, prompt, working_directory=None):
+        """Remember the file names a session's prompt mentions, to rank them first."""
+        key = os.path.abspath(working_directory or WORKING_DIR)
+        with self._lock:
+            self._mentions[key] = _mentions(prompt)
+
+    def rank(self, files, mentions=()):
+        """
+        Order (path, size, mtime) candidates, paths relative to the working
+        directory, from most to least likely to be read next.
+        """
+        newest = sorted({mtime for _, _, mtime in files}, reverse=True)
+        recency = {mtime: i for i, mtime in enumerate(newest)}
+
+        def score(candidate):
+            path, _, mtime = candidate
+            name = os.path.basename(path).lower()
+            stem = os.path.splitext(name)[0]
+            mentioned = path.lower() in mentions or name in mentions or stem in mentions
+            likely = any(fnmatch.fnmatch(name, pattern.lower()) for pattern in LIKELY_NAMES)
+            return (not mentioned, not likely, recency[mtime], path)
+
+        return [path for path, _, _ in sorted(files, key=score)]
+
+    def schedule(self, working_directory, directory=".", depth=1):
+        """Prefetch the likeliest files of a directory that get_files_info just listed."""
+        if self.top_n <= 0:
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="prefetch")
+            mentions = self._mentions.get(os.path.abspath(working_directory), set())
+        self._executor.submit(self._schedule, working_directory, directory, depth, mentions)
+
+    def _schedule(self, working_directory, directory, depth, mentions):
+        abs_working_dir = os.path.abspath(working_directory)
+        target_dir = os.path.join(abs_working_dir, directory)
+        files = []
+        for rel_path, is_dir, size in workspace_index.walk(
+            abs_working_dir, target_dir, int(depth), IgnoreRules.for_root(abs_working_dir)
+        ):
+            if is_dir or size > self.max_file_bytes:
+                continue
+            path = os.path.normpath(os.path.join(directory, rel_path))
+            try:
+                mtime = os.stat(os.path.join(abs_working_dir, path)).st_mtime_ns
+            except OSError:
+                continue
+            files.append((path, size, mtime))
+        for path in self.rank(files, mentions)[:self.top_n]:
+            key = self.key(working_directory, path)
+            with self._lock:
+                if key in self._pending or self._executor is None:
+                    continue
+                self._pending[key] = self._executor.submit(self._prefetch, working_directory, path, key)
+
+    def key(self, working_directory, path):
+        """The tool_cache key of a plain get_file_content call for path."""
+        args = {"file_path": os.path.normpath(path), "working_directory": working_directory}
+        return self.cache.key("get_file_content", os.path.join(working_directory, path), args)
+
+    def _prefetch(self, working_directory, path, key):
+        try:
+            if key in self.cache:
+                return
+            validator = self.cache.validator(key[1])
+            result = get_file_content(working_directory, path)
+            if not result.startswith("Error"):
+                self.cache.put(key, validator, result)
+                with self._lock:
+                    self.prefetched += 1
+                    self._unused.add(key)
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def wait(self, key):
+        """Block until a prefetch of key, if one is running, has finished."""
+        with self._lock:
+            future = self._pending.get(key)
+        if future is not None:
+            future.exception()
+
+    def claim(self, key):
+        """Count a cache hit on key as a prefetch hit if the entry was prefetched."""
+        with self._lock:
+            if key in self._unused:
+                self._unused.discard(key)
+                self.used += 1
+
+    def close(self):
+        """Stop the background reads, cancelling those not yet started."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            # Cancelled reads never ran to remove themselves.
+            self._pending.clear()
+
+    def stats(self):
+        rate = f" ({self.used / self.prefetched:.0%})" if self.prefetched else ""
+        return f"Prefetch: {self.prefetched} files read ahead, {self.used} used{rate}"
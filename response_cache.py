@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import threading
+from types import SimpleNamespace
+
+from google.genai import types
+
+from config import RESPONSE_CACHE_DIR, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_MODES
+from fileio import atomic_write
+
+MODES = RESPONSE_CACHE_MODES
+
+
+class ResponseCacheMiss(Exception):
+    pass
+
+
+def _canonical(value):
+    if hasattr(value, "model_dump"):
+        value = value.model_dump(mode="json", exclude_none=True)
+    return value
+
+
+def request_key(model, contents, config):
+    """
+    Content-addressed key for a model call: a sha256 over the model name, the
+    config (system prompt and tool declarations included) and every message,
+    serialized canonically so that equal requests always hash the same.
+    """
+    request = {
+        "model": model,
+        "config": _canonical(config),
+        "contents": [_canonical(content) for content in contents],
+    }
+    data = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk cache of model responses, one JSON file per request key. A hit
+    refreshes the file's mtime, and once the directory grows past max_bytes the
+    least recently used files are removed.
+    """
+
+    def __init__(self, directory=RESPONSE_CACHE_DIR, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = None
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key):
+        """The recorded response for key, or None if there is none or it can't be read."""
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                response = types.GenerateContentResponse.model_validate_json(f.read())
+            os.utime(path)
+        except (OSError, ValueError):
+            # A truncated or corrupt file (ValidationError is a ValueError) is
+            # a miss; recording again overwrites it.
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return response
+
+    def put(self, key, response):
+        data = response.model_dump_json(exclude_none=True)
+        path = self._path(key)
+        atomic_write(path, data)
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes += len(data.encode("utf-8"))
+            over = self._size() > self.max_bytes
+        if over:
+            self.evict()
+
+    def _size(self):
+        if self._bytes is None:
+            self._bytes = sum(size for _, _, size in self._entries())
+        return self._bytes
+
+    def _entries(self):
+        entries = []
+        for dirpath, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                if not filename.endswith(".json"):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime_ns, path, st.st_size))
+        return entries
+
+    def evict(self):
+        """Remove the least recently used responses until the cache fits in max_bytes."""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, _, size in entries)
+            for _, path, size in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+            self._bytes = total
+
+    def stats(self):
+        return f"Response cache: {self.hits} hits, {self.misses} misses"
+
+
+def _merge_chunks(chunks):
+    """Combine streamed chunks into one response, as if it had not been streamed."""
+    parts = []
+    usage_metadata = None
+    for chunk in chunks:
+        if chunk.usage_metadata:
+            usage_metadata = chunk.usage_metadata
+        if not chunk.candidates or not chunk.candidates[0].content:
+            continue
+        for part in chunk.candidates[0].content.parts or []:
+            if part.text is not None and not part.function_call and parts and parts[-1].text is not None:
+                parts[-1] = types.Part(text=parts[-1].text + part.text)
+            else:
+                parts.append(part)
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+        usage_metadata=usage_metadata,
+    )
+
+
+class CachedModels:
+    """
+    Drop-in for client.models. In record mode responses are served from the
+    cache when present and otherwise fetched and stored; in replay mode only the
+    cache is used and a miss raises ResponseCacheMiss; passthrough skips the cache.
+    """
+
+    def __init__(self, models, cache, mode):
+        if mode not in MODES:
+            raise ValueError(f"unknown response cache mode: {mode}")
+        self._models = models
+        self.cache = cache
+        self.mode = mode
+
+    def _lookup(self, model, contents, config):
+        if self.mode == "passthrough":
+            return None, None
+        key = request_key(model, contents, config)
+        response = self.cache.get(key)
+        if response is None and self.mode == "replay":
+            raise ResponseCacheMiss(f"no recorded response for request {key[:12]} in {self.cache.directory}")
+        return key, response
+
+    def generate_content(self, model, contents, config=None):
+        key, response = self._lookup(model, contents, config)
+        if response is None:
+            response = self._models.generate_content(model=model, contents=contents, config=config)
+            if key:
+                self.cache.put(key, response)
+        return response
+
+    def generate_content_stream(self, model, contents, config=None):
+        key, response = self._lookup(model, contents, config)
+        if response is not None:
+            yield response
+            return
+        chunks = []
+        for chunk in self._models.generate_content_stream(model=model, contents=contents, config=config):
+            chunks.append(chunk)
+            yield chunk
+        if key:
+            self.cache.put(key, _merge_chunks(chunks))
+
+
+class AsyncCachedModels(CachedModels):
+    """Drop-in for client.aio.models."""
+
+    async def generate_content(self, model, contents, config=None):
+        key, response = self._lookup(model, contents, config)
+        if response is None:
+            response = await self._models.generate_content(model=model, contents=contents, config=config)
+            if key:
+                self.cache.put(key, response)
+        return response
+
+
+class CachedClient:
+    """
+    Wraps a genai.Client so that model calls go through a ResponseCache. The
+    client may be None in replay mode, which never reaches the API.
+    """
+
+    def __init__(self, client, cache, mode="record"):
+        self.cache = cache
+        self.models = CachedModels(client.models if client else None, cache, mode)
+        self.aio = SimpleNamespace(
+            models=AsyncCachedModels(client.aio.models if client else None, cache, mode)
+        )
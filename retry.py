@@ -0,0 +1,188 @@
+import asyncio
+import email.utils
+import random
+import re
+import threading
+import time
+
+import httpx
+from google.genai import errors
+
+from config import RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY, REQUESTS_PER_MINUTE
+from tracing import tracer
+
+DURATION = re.compile(r"^\s*(\d+(?:\.\d+)?)s\s*$")
+
+
+class TokenBucket:
+    """
+    Rate limiter shared by every session in the process: `rate` requests per
+    second on average, with bursts of up to `capacity`. A caller that finds the
+    bucket empty reserves the next token and sleeps until it is due, so waiting
+    callers are served in order. pause() holds every caller back, which is how a
+    retry-after hint from one session slows down all of them.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take a token and return how long to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def acquire(self):
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def is_retryable(error):
+    """Rate limits, server errors and dropped connections are worth retrying; other errors are not."""
+    if isinstance(error, errors.APIError):
+        return error.code == 429 or 500 <= (error.code or 0) < 600
+    # The SDK sends requests through httpx, whose transport errors (connect,
+    # read timeout, protocol) don't derive from the builtin ones.
+    return isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError))
+
+
+def retry_after(error):
+    """
+    The delay in seconds the server asked for, from a Retry-After header or a
+    google.rpc.RetryInfo retryDelay in the error details, or None.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    if value:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            try:
+                return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                pass
+    delay = _find_retry_delay(getattr(error, "details", None))
+    if delay is not None:
+        match = DURATION.match(delay)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def _find_retry_delay(value):
+    if isinstance(value, dict):
+        if isinstance(value.get("retryDelay"), str):
+            return value["retryDelay"]
+        value = list(value.values())
+    if isinstance(value, list):
+        for item in value:
+            delay = _find_retry_delay(item)
+            if delay is not None:
+                return delay
+    return None
+
+
+class RetryPolicy:
+    """
+    Retries model calls that fail with a retryable error, with exponential
+    backoff and full jitter, waiting at least as long as the server asked for.
+    Every attempt first takes a token from the shared limiter, if any.
+    `retries` counts the retries made through this policy, apart from the
+    agent's iterations.
+    """
+
+    def __init__(self, max_attempts=RETRY_MAX_ATTEMPTS, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY, limiter=None, verbose=False):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limiter = limiter
+        self.verbose = verbose
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def _backoff(self, attempt, error):
+        """Return the delay before the next attempt, or None to give up."""
+        if attempt >= self.max_attempts or not is_retryable(error):
+            return None
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        hint = retry_after(error)
+        if hint is not None:
+            delay = max(delay, hint)
+            if self.limiter:
+                self.limiter.pause(hint)
+        with self._lock:
+            self.retries += 1
+        tracer.event("retry", "model", attempt=attempt, delay_s=delay, error=str(error)[:200])
+        if self.verbose:
+            print(f" - Model call failed ({error}), retrying in {delay:.1f}s")
+        return delay
+
+    def call(self, function, *args, **kwargs):
+        attempt = 1
+        while True:
+            if self.limiter:
+                self.limiter.acquire()
+            try:
+                return function(*args, **kwargs)
+            except Exception as e:
+                delay = self._backoff(attempt, e)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    async def call_async(self, function, *args, **kwargs):
+        attempt = 1
+        while True:
+            if self.limiter:
+                await self.limiter.acquire_async()
+            try:
+                return await function(*args, **kwargs)
+            except Exception as e:
+                delay = self._backoff(attempt, e)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def stream(self, function, *args, **kwargs):
+        """
+        Retry a streaming call until its first chunk arrives, then yield the
+        stream. Failures after that are not retried, since part of the response
+        has already been used.
+        """
+        def first_chunk():
+            chunks = iter(function(*args, **kwargs))
+            return chunks, next(chunks, None)
+
+        chunks, first = self.call(first_chunk)
+        if first is None:
+            return
+        yield first
+        yield from chunks
+
+
+def make_limiter(requests_per_minute=REQUESTS_PER_MINUTE):
+    """A TokenBucket for the given rate, or None if the rate is unlimited (0)."""
+    if not requests_per_minute:
+        return None
+    return TokenBucket(requests_per_minute / 60, capacity=max(1, requests_per_minute // 10))
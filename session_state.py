@@ -0,0 +1,72 @@
+import difflib
+import hashlib
+import os
+import threading
+
+from config import SESSION_DIFF_MAX_RATIO
+
+
+class SessionState:
+    """
+    What one session has been shown so far. Every plain get_file_content result
+    is remembered by path along with the turn it was returned in, so a later
+    read of the same file can answer with a short stub if nothing changed, or
+    with a unified diff against that version if the diff is less than
+    `diff_max_ratio` of the file. Files written through the agent are collected
+    in `written`, for run_tests to pick the tests they affect.
+    """
+
+    def __init__(self, diff_max_ratio=SESSION_DIFF_MAX_RATIO):
+        self.diff_max_ratio = diff_max_ratio
+        self.turn = 0
+        self.written = set()
+        self._reads = {}
+        self._lock = threading.Lock()
+
+    def next_turn(self):
+        with self._lock:
+            self.turn += 1
+
+    def forget_reads(self):
+        """Drop every remembered read, e.g. once old tool output has been elided from the history."""
+        with self._lock:
+            self._reads.clear()
+
+    def record_write(self, abs_path):
+        with self._lock:
+            self.written.add(os.path.abspath(abs_path))
+
+    def written_files(self, working_directory):
+        """Paths written this session below working_directory, relative to it."""
+        root = os.path.abspath(working_directory)
+        with self._lock:
+            return sorted(os.path.relpath(path, root) for path in self.written if path.startswith(root + os.sep))
+
+    def file_read(self, abs_path, file_path, content, full=False):
+        """Return what to send the model for a plain read of abs_path whose current content is content."""
+        if content.startswith("Error"):
+            return content
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        with self._lock:
+            previous = self._reads.get(abs_path)
+            self._reads[abs_path] = (digest, content, self.turn)
+        if full or previous is None:
+            return content
+        previous_digest, previous_content, turn = previous
+        if previous_digest == digest:
+            return (
+                f'[File "{file_path}" is unchanged since you read it in turn {turn}; '
+                f"call get_file_content with full=true if you need it again]"
+            )
+        diff = "".join(difflib.unified_diff(
+            previous_content.splitlines(keepends=True),
+            content.splitlines(keepends=True),
+            fromfile=f"{file_path} (turn {turn})",
+            tofile=f"{file_path} (now)",
+        ))
+        if len(diff) > len(content) * self.diff_max_ratio:
+            return content
+        return (
+            f'[File "{file_path}" changed since you read it in turn {turn}; a unified diff against that '
+            f"version follows. Call get_file_content with full=true for the whole file]\n{diff}"
+        )
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import time
+import unittest
+from io import StringIO
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from batch import run_batch, run_session, read_prompts
+
+
+def make_client(generate_content):
+    client = MagicMock()
+    client.aio.models.generate_content = AsyncMock(side_effect=generate_content)
+    return client
+
+
+def text_response(text):
+    response = MagicMock()
+    response.text = text
+    response.function_calls = None
+    response.candidates = []
+    return response
+
+
+class TestReadPrompts(unittest.TestCase):
+    def test_string_object_and_invalid_lines(self):
+        lines = ['"list files"\n', '\n', '{"id": "a", "prompt": "run tests"}\n', '{"id": 3}\n']
+
+        prompts = list(read_prompts(lines))
+
+        self.assertEqual(prompts[0], (1, "list files", None))
+        self.assertEqual(prompts[1], ("a", "run tests", None))
+        self.assertEqual(prompts[2][:2], (4, None))
+        self.assertIn("line 4", prompts[2][2])
+
+
+class TestRunBatch(unittest.TestCase):
+    def setUp(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def slow_response(self, model, contents, config):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return text_response(f"answer to {contents[0].parts[0].text}")
+
+    def test_concurrency_limit_and_results(self):
+        client = make_client(self.slow_response)
+        lines = [json.dumps({"id": i, "prompt": f"p{i}"}) for i in range(10)]
+        out = StringIO()
+
+        failures = asyncio.run(run_batch(client, lines, out, concurrency=3))
+
+        results = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(failures, 0)
+        self.assertEqual(self.max_in_flight, 3)
+        self.assertEqual(
+            sorted((r["id"], r["response"]) for r in results),
+            [(i, f"answer to p{i}") for i in range(10)],
+        )
+
+    def test_slow_input_does_not_block_running_sessions(self):
+        client = make_client(self.slow_response)
+        out = StringIO()
+        written_before_second = []
+
+        def lines():
+            yield '"first"'
+            # A producer that takes a while for its next line; the first
+            # session should finish in the meantime.
+            time.sleep(0.3)
+            written_before_second.append(out.getvalue())
+            yield '"second"'
+
+        asyncio.run(run_batch(client, lines(), out, concurrency=2))
+
+        self.assertEqual(json.loads(written_before_second[0])["response"], "answer to first")
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+    @patch('batch.MAX_ITERS', 2)
+    def test_session_reports_error_after_max_iters(self):
+        client = make_client(Exception("quota exceeded"))
+
+        with patch('sys.stdout', new=StringIO()):
+            result = asyncio.run(run_session(client, "prompt"))
+
+        self.assertIsNone(result["response"])
+        self.assertEqual(result["iterations"], 2)
+        self.assertEqual(result["error"], "quota exceeded")
+
+    def test_summarize_history_reaches_the_history_manager(self):
+        client = make_client(self.slow_response)
+
+        with patch('batch.HistoryManager') as history_manager:
+            asyncio.run(run_batch(client, ['"p"'], StringIO(), token_budget=100, summarize_history=True))
+
+        history_manager.assert_called_once_with(100, summarize=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
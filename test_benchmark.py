@@ -0,0 +1,35 @@
+import unittest
+
+import call_function
+from benchmark import compare, run_once, session_script, summarize
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_scripted_session(self):
+        run = run_once(files=20)
+
+        self.assertEqual(len(run["iterations"]), len(session_script()))
+        self.assertEqual(run["tools"]["get_file_content"]["calls"], 10)
+        self.assertIn("4 hits", run["tool_cache"])
+        self.assertGreater(run["peak_memory_bytes"], 0)
+        self.assertEqual(call_function.WORKING_DIR, "./calculator")
+
+    def test_streaming_session(self):
+        run = run_once(files=20, parallel_tools=True, stream=True)
+
+        self.assertEqual(len(run["iterations"]), len(session_script()))
+        self.assertEqual(run["tools"]["run_python_file"]["calls"], 1)
+
+    def test_compare_flags_regressions(self):
+        old = summarize([run_once(files=5)])
+        new = summarize([run_once(files=5)])
+        new["message_bytes"] = old["message_bytes"] * 2
+
+        lines, regressions = compare(old, new, threshold=0.5)
+
+        self.assertIn("message_bytes", regressions)
+        self.assertEqual(len(lines), 3 + 2 * len(old["tools"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
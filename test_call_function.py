@@ -0,0 +1,93 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from call_function import call_functions, _call_footprint, _conflicts
+
+
+def make_call(name, **args):
+    function_call_part = MagicMock()
+    function_call_part.name = name
+    function_call_part.args = args
+    return function_call_part
+
+
+class TestCallFunctions(unittest.TestCase):
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.events = []
+
+    def fake_call_function(self, function_call_part, verbose=False, working_directory=None, session=None):
+        with self.lock:
+            self.events.append(("start", function_call_part.name))
+        time.sleep(0.05)
+        with self.lock:
+            self.events.append(("end", function_call_part.name))
+        return function_call_part.name
+
+    @patch('call_function.call_function')
+    def test_results_keep_call_order(self, mock_call_function):
+        mock_call_function.side_effect = lambda part, verbose=False, working_directory=None, session=None: part.args["file_path"]
+        calls = [make_call("get_file_content", file_path=f"f{i}.py") for i in range(6)]
+
+        results = call_functions(calls, max_workers=3)
+
+        self.assertEqual(results, [f"f{i}.py" for i in range(6)])
+
+    @patch('call_function.call_function')
+    def test_reads_run_concurrently(self, mock_call_function):
+        mock_call_function.side_effect = self.fake_call_function
+        calls = [make_call("get_file_content", file_path=f"f{i}.py") for i in range(4)]
+
+        start = time.perf_counter()
+        call_functions(calls, max_workers=4)
+        elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 0.15)
+
+    @patch('call_function.call_function')
+    def test_run_python_file_is_a_barrier(self, mock_call_function):
+        mock_call_function.side_effect = self.fake_call_function
+        calls = [
+            make_call("write_file", file_path="main.py", content=""),
+            make_call("run_python_file", file_path="main.py"),
+            make_call("get_file_content", file_path="lorem.txt"),
+        ]
+
+        call_functions(calls, max_workers=3)
+
+        self.assertEqual(
+            self.events,
+            [
+                ("start", "write_file"), ("end", "write_file"),
+                ("start", "run_python_file"), ("end", "run_python_file"),
+                ("start", "get_file_content"), ("end", "get_file_content"),
+            ],
+        )
+
+    def test_conflicts(self):
+        read_pkg = _call_footprint(make_call("get_files_info", directory="pkg"))
+        read_root = _call_footprint(make_call("get_files_info"))
+        read_file = _call_footprint(make_call("get_file_content", file_path="lorem.txt"))
+        write_pkg_file = _call_footprint(make_call("write_file", file_path="pkg/render.py"))
+
+        self.assertFalse(_conflicts(read_pkg, read_file))
+        self.assertFalse(_conflicts(read_file, write_pkg_file))
+        self.assertTrue(_conflicts(read_pkg, write_pkg_file))
+        self.assertTrue(_conflicts(read_root, write_pkg_file))
+
+    def test_edit_file_conflicts_with_every_edited_path(self):
+        edit = _call_footprint(make_call("edit_file", edits=[
+            {"file_path": "main.py", "old_text": "a", "new_text": "b"},
+            {"file_path": "pkg/render.py", "old_text": "a", "new_text": "b"},
+        ]))
+        read_render = _call_footprint(make_call("get_file_content", file_path="pkg/render.py"))
+        read_lorem = _call_footprint(make_call("get_file_content", file_path="lorem.txt"))
+
+        self.assertTrue(_conflicts(edit, read_render))
+        self.assertFalse(_conflicts(edit, read_lorem))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,195 @@
+import os
+import sys
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+from google.genai import types
+
+from checkpoint import SessionLog, SessionNotFound
+from history import HistoryManager
+from main import main
+
+
+def user(text):
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def call(name, **args):
+    return types.Content(role="model", parts=[types.Part.from_function_call(name=name, args=args)])
+
+
+def result(name, text):
+    return types.Content(role="tool", parts=[types.Part.from_function_response(name=name, response={"result": text})])
+
+
+class TestSessionLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_resume_rebuilds_messages(self):
+        big = "x = 1\n" * 1000
+        messages = [user("read main.py"), call("get_file_content", file_path="main.py")]
+        log = SessionLog(directory=self.tmp.name)
+        log.checkpoint(messages)
+        messages += [result("get_file_content", big), call("get_file_content", file_path="main.py"), result("get_file_content", big)]
+        log.checkpoint(messages)
+
+        _, resumed = SessionLog.resume(log.session_id, self.tmp.name)
+
+        self.assertEqual(
+            [m.model_dump(exclude_none=True) for m in resumed],
+            [m.model_dump(exclude_none=True) for m in messages],
+        )
+        # The file contents went out of line, once.
+        self.assertLess(os.path.getsize(log.path), len(big))
+        blobs = [f for _, _, files in os.walk(os.path.join(self.tmp.name, "blobs")) for f in files]
+        self.assertEqual(len(blobs), 1)
+
+    def test_checkpoint_appends_only_new_turns(self):
+        messages = [user("hi")]
+        log = SessionLog(directory=self.tmp.name)
+        log.checkpoint(messages)
+        log.checkpoint(messages)
+        messages.append(call("get_files_info"))
+        log.checkpoint(messages)
+
+        with open(log.path) as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_compacted_history_is_recorded(self):
+        messages = [user("go"), call("get_file_content", file_path="a.py"), result("get_file_content", "y" * 5000)]
+        messages += [call("get_files_info"), result("get_files_info", "ok")]
+        log = SessionLog(directory=self.tmp.name)
+        log.checkpoint(messages)
+        HistoryManager(10, keep_recent=2).compact(messages)
+        log.checkpoint(messages)
+
+        _, resumed = SessionLog.resume(log.session_id, self.tmp.name)
+
+        self.assertIn("elided", resumed[2].parts[0].function_response.response["result"])
+        self.assertEqual(len(resumed), len(messages))
+
+    def test_torn_last_line_is_dropped(self):
+        log = SessionLog(directory=self.tmp.name)
+        log.checkpoint([user("hi")])
+        with open(log.path, "a") as f:
+            f.write('{"index": 1, "content": {"ro')
+
+        resumed_log, resumed = SessionLog.resume(log.session_id, self.tmp.name)
+        resumed.append(call("get_files_info"))
+        resumed_log.checkpoint(resumed)
+        _, again = SessionLog.resume(log.session_id, self.tmp.name)
+
+        self.assertEqual([m.role for m in again], ["user", "model"])
+
+    def test_old_sessions_are_pruned(self):
+        shared = "shared\n" * 500
+        logs = []
+        for i in range(3):
+            log = SessionLog(directory=self.tmp.name, keep=None)
+            log.checkpoint([user("go"), result("get_file_content", shared), result("get_file_content", f"{i}\n" * 600)])
+            os.utime(log.path, (1000 + i, 1000 + i))
+            logs.append(log)
+        for root, _, files in os.walk(os.path.join(self.tmp.name, "blobs")):
+            for name in files:
+                os.utime(os.path.join(root, name), (500, 500))
+
+        logs[2].keep = 2
+        logs[2].prune()
+
+        self.assertEqual([os.path.exists(log.path) for log in logs], [False, True, True])
+        blobs = [f for _, _, files in os.walk(os.path.join(self.tmp.name, "blobs")) for f in files]
+        self.assertEqual(len(blobs), 3)
+        _, resumed = SessionLog.resume(logs[1].session_id, self.tmp.name)
+        self.assertEqual(resumed[1].parts[0].function_response.response["result"], shared)
+
+    def test_unknown_session(self):
+        with self.assertRaises(SessionNotFound):
+            SessionLog.resume("missing", self.tmp.name)
+        with self.assertRaises(SessionNotFound):
+            SessionLog.resume("../missing", self.tmp.name)
+
+
+class TestResume(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = patch.dict("os.environ", {"GEMINI_API_KEY": "key"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.output = StringIO()
+        patcher = patch.object(sys, "stdout", self.output)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_main(self, client, prompt=None, resume=None):
+        args = MagicMock(
+            prompt=prompt, resume=resume, checkpoint_dir=self.tmp.name, verbose=False,
+            parallel_tools=False, token_budget=None, stream=False, cache_mode="passthrough", trace=None,
+        )
+        with patch("main.argparse.ArgumentParser.parse_args", return_value=args), \
+                patch("main.load_dotenv"), patch("main.genai.Client", return_value=client):
+            return main()
+
+    def test_resume_continues_without_repeating_turns(self):
+        log = SessionLog(directory=self.tmp.name)
+        log.checkpoint([user("list files"), call("get_files_info"), result("get_files_info", "a.py")])
+        client = MagicMock()
+        client.models.generate_content.return_value = types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text="a.py")]))]
+        )
+
+        response = self.run_main(client, resume=log.session_id)
+
+        self.assertEqual(response, "a.py")
+        contents = client.models.generate_content.call_args.kwargs["contents"]
+        self.assertEqual([m.role for m in contents], ["user", "model", "tool", "model"])
+        _, resumed = SessionLog.resume(log.session_id, self.tmp.name)
+        self.assertEqual(resumed[-1].parts[0].text, "a.py")
+
+    def test_pending_calls_are_run(self):
+        workspace = os.path.join(self.tmp.name, "workspace")
+        os.mkdir(workspace)
+        with open(os.path.join(workspace, "a.py"), "w") as f:
+            f.write("pass\n")
+        log = SessionLog(directory=self.tmp.name)
+        log.checkpoint([user("list files"), call("get_files_info")])
+        client = MagicMock()
+        client.models.generate_content.return_value = types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text="a.py")]))]
+        )
+
+        with patch("call_function.WORKING_DIR", workspace):
+            response = self.run_main(client, resume=log.session_id)
+
+        self.assertEqual(response, "a.py")
+        contents = client.models.generate_content.call_args.kwargs["contents"]
+        self.assertEqual([m.role for m in contents], ["user", "model", "tool", "model"])
+        self.assertIn("a.py", contents[2].parts[0].function_response.response["result"])
+
+    def test_session_id_is_printed_on_error(self):
+        client = MagicMock()
+        client.models.generate_content.side_effect = Exception("boom")
+
+        with patch("main.MAX_ITERS", 1), self.assertRaises(SystemExit):
+            self.run_main(client, prompt="hi")
+
+        session_id = self.output.getvalue().splitlines()[0].removeprefix("Session: ")
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, session_id + ".jsonl")))
+
+    def test_finished_session_is_not_rerun(self):
+        log = SessionLog(directory=self.tmp.name)
+        log.checkpoint([user("hi"), types.Content(role="model", parts=[types.Part(text="hello")])])
+        client = MagicMock()
+
+        response = self.run_main(client, resume=log.session_id)
+
+        self.assertEqual(response, "hello")
+        client.models.generate_content.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
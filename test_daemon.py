@@ -0,0 +1,135 @@
+import asyncio
+import os
+import stat
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock
+
+from google.genai import types
+
+from daemon import AgentDaemon, ask, serve
+
+
+def listing_client():
+    """A client whose model lists the working directory and then answers with the listing."""
+    async def generate_content(model, contents, config):
+        last = contents[-1].parts[0]
+        if last.function_response:
+            text = last.function_response.response["result"]
+            parts = [types.Part(text=text)]
+        else:
+            parts = [types.Part.from_function_call(name="get_files_info", args={})]
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=parts))]
+        )
+
+    client = MagicMock()
+    client.aio.models.generate_content = AsyncMock(side_effect=generate_content)
+    return client
+
+
+class TestAgentDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.workspaces = []
+        for name in ("one", "two"):
+            path = os.path.join(self.tmp.name, name)
+            os.mkdir(path)
+            with open(os.path.join(path, f"{name}.py"), "w") as f:
+                f.write("pass\n")
+            self.workspaces.append(path)
+        self.socket_path = os.path.join(self.tmp.name, "agent.sock")
+
+    async def with_server(self, daemon, requests):
+        server = asyncio.create_task(serve(daemon, self.socket_path))
+        while not os.path.exists(self.socket_path):
+            await asyncio.sleep(0.01)
+        self.assertEqual(stat.S_IMODE(os.stat(self.socket_path).st_mode), 0o600)
+        # The blocking clients get their own threads, leaving the default
+        # executor to the sessions' tool calls.
+        loop = asyncio.get_running_loop()
+        try:
+            with ThreadPoolExecutor(len(requests)) as clients:
+                return await asyncio.gather(*(
+                    loop.run_in_executor(clients, ask, prompt, workspace, self.socket_path, None, 10)
+                    for prompt, workspace in requests
+                ))
+        finally:
+            server.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await server
+
+    def test_sessions_run_in_their_own_workspace(self):
+        daemon = AgentDaemon(listing_client(), allowed_roots=[self.tmp.name])
+        requests = [(f"list {i}", self.workspaces[i % 2]) for i in range(6)]
+
+        results = asyncio.run(self.with_server(daemon, requests))
+
+        for i, result in enumerate(results):
+            expected, other = ("one.py", "two.py") if i % 2 == 0 else ("two.py", "one.py")
+            self.assertIn(expected, result["response"])
+            self.assertNotIn(other, result["response"])
+        self.assertEqual(daemon.sessions, 6)
+        self.assertEqual(set(daemon._locks), set(self.workspaces))
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_bad_requests_get_errors(self):
+        daemon = AgentDaemon(listing_client(), allowed_roots=[self.tmp.name])
+        missing = os.path.join(self.tmp.name, "missing")
+
+        result, = asyncio.run(self.with_server(daemon, [("list", missing)]))
+
+        self.assertIsNone(result["response"])
+        self.assertIn("not a directory", result["error"])
+
+    def test_working_directory_must_be_allowed(self):
+        client = listing_client()
+        daemon = AgentDaemon(client, allowed_roots=[self.workspaces[0]])
+        link = os.path.join(self.workspaces[0], "link")
+        os.symlink(self.workspaces[1], link)
+
+        for outside in (self.workspaces[1], os.path.join(self.workspaces[0], "..", "two"), link, self.tmp.name, "/"):
+            with self.subTest(working_directory=outside):
+                result = asyncio.run(daemon.handle({"prompt": "list", "working_directory": outside}))
+                self.assertIsNone(result["response"])
+                self.assertIn("outside the allowed roots", result["error"])
+        self.assertEqual(daemon.sessions, 0)
+        client.aio.models.generate_content.assert_not_called()
+
+    def test_token(self):
+        daemon = AgentDaemon(listing_client(), allowed_roots=[self.tmp.name], token="secret")
+
+        for token in (None, "wrong"):
+            request = {"prompt": "list", "working_directory": self.workspaces[0], "token": token}
+            self.assertEqual(asyncio.run(daemon.handle(request))["error"], "invalid or missing token")
+        request["token"] = "secret"
+        self.assertIn("one.py", asyncio.run(daemon.handle(request))["response"])
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(serve(AgentDaemon(listing_client()), port=0))
+
+    def test_in_place_edits_show_up_in_the_next_request(self):
+        daemon = AgentDaemon(listing_client(), allowed_roots=[self.tmp.name])
+        workspace = self.workspaces[0]
+        request = {"prompt": "list", "working_directory": workspace}
+
+        first = asyncio.run(daemon.handle(request))["response"]
+        # Rewrite the file in place, leaving the directory's mtime as it was.
+        mtime = os.stat(workspace).st_mtime_ns
+        with open(os.path.join(workspace, "one.py"), "w") as f:
+            f.write("x = 1\n" * 10)
+        os.utime(workspace, ns=(mtime, mtime))
+        second = asyncio.run(daemon.handle(request))["response"]
+
+        self.assertIn("one.py: file_size=5 bytes", first)
+        self.assertIn("one.py: file_size=60 bytes", second)
+
+    def test_ask_without_daemon(self):
+        with self.assertRaises(ConnectionError):
+            ask("hi", socket_path=self.socket_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from functions.edit_file import edit_file
+
+
+class TestEditFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.write("a.py", "def add(a, b):\n    return a - b\n\nprint(add(1, 2))\n")
+        self.write("b.py", "x = 1\ny = 2\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, content):
+        with open(os.path.join(self.tmp.name, path), "w") as f:
+            f.write(content)
+
+    def read(self, path):
+        with open(os.path.join(self.tmp.name, path)) as f:
+            return f.read()
+
+    def test_search_replace_across_files(self):
+        result = edit_file(self.tmp.name, edits=[
+            {"file_path": "a.py", "old_text": "a - b", "new_text": "a + b"},
+            {"file_path": "b.py", "old_text": "y = 2", "new_text": "y = 3"},
+        ])
+
+        self.assertTrue(result.startswith("Successfully edited"))
+        self.assertIn("return a + b", self.read("a.py"))
+        self.assertEqual(self.read("b.py"), "x = 1\ny = 3\n")
+
+    def test_failed_hunk_changes_nothing(self):
+        result = edit_file(self.tmp.name, edits=[
+            {"file_path": "b.py", "old_text": "y = 2", "new_text": "y = 3"},
+            {"file_path": "a.py", "old_text": "not there", "new_text": ""},
+        ])
+
+        self.assertIn("No files were changed", result)
+        self.assertEqual(self.read("b.py"), "x = 1\ny = 2\n")
+
+    def test_ambiguous_match_is_rejected(self):
+        self.write("c.py", "pass\npass\n")
+
+        result = edit_file(self.tmp.name, edits=[{"file_path": "c.py", "old_text": "pass", "new_text": "x"}])
+
+        self.assertIn("matched 2 times", result)
+
+    def test_unified_diff(self):
+        patch_text = (
+            "--- a/a.py\n"
+            "+++ b/a.py\n"
+            "@@ -1,2 +1,2 @@\n"
+            " def add(a, b):\n"
+            "-    return a - b\n"
+            "+    return a + b\n"
+            "--- /dev/null\n"
+            "+++ b/new.py\n"
+            "@@ -0,0 +1 @@\n"
+            "+print('new')\n"
+        )
+
+        result = edit_file(self.tmp.name, patch=patch_text)
+
+        self.assertTrue(result.startswith("Successfully edited"), result)
+        self.assertEqual(self.read("a.py"), "def add(a, b):\n    return a + b\n\nprint(add(1, 2))\n")
+        self.assertEqual(self.read("new.py"), "print('new')\n")
+
+    def test_unified_diff_counts_hunks(self):
+        patch_text = (
+            "--- a/a.py\n"
+            "+++ b/a.py\n"
+            "@@ -1,2 +1,2 @@\n"
+            " def add(a, b):\n"
+            "-    return a - b\n"
+            "+    return a + b\n"
+            "@@ -4 +4 @@\n"
+            "-print(add(1, 2))\n"
+            "+print(add(2, 3))\n"
+        )
+
+        result = edit_file(self.tmp.name, patch=patch_text)
+
+        self.assertEqual(result, 'Successfully edited "a.py" (2 change(s) applied)')
+        self.assertEqual(self.read("a.py"), "def add(a, b):\n    return a + b\n\nprint(add(2, 3))\n")
+
+    def test_unified_diff_with_wrong_line_numbers(self):
+        patch_text = "--- a/b.py\n+++ b/b.py\n@@ -40,1 +40,1 @@\n-y = 2\n+y = 5\n"
+
+        edit_file(self.tmp.name, patch=patch_text)
+
+        self.assertEqual(self.read("b.py"), "x = 1\ny = 5\n")
+
+    def test_write_failure_rolls_back(self):
+        real_replace = os.replace
+        calls = []
+
+        def failing_replace(src, dst):
+            calls.append(dst)
+            if len(calls) == 2:
+                raise OSError("disk full")
+            return real_replace(src, dst)
+
+        with patch('functions.edit_file.os.replace', side_effect=failing_replace):
+            result = edit_file(self.tmp.name, edits=[
+                {"file_path": "b.py", "old_text": "y = 2", "new_text": "y = 3"},
+                {"file_path": "a.py", "old_text": "a - b", "new_text": "a + b"},
+            ])
+
+        self.assertIn("rolled back", result)
+        self.assertEqual(self.read("b.py"), "x = 1\ny = 2\n")
+        self.assertIn("a - b", self.read("a.py"))
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["a.py", "b.py"])
+
+    def test_outside_working_directory(self):
+        result = edit_file(self.tmp.name, edits=[{"file_path": "../x.py", "old_text": "", "new_text": "x"}])
+
+        self.assertIn("outside the permitted working directory", result)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from config import MAX_CHARS
+from functions.get_file_content import get_file_content
+
+
+class TestGetFileContentWindows(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.lines = [f"line {i}" for i in range(1, 5001)]
+        with open(os.path.join(self.tmp.name, "big.txt"), "w") as f:
+            f.write("\n".join(self.lines) + "\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, **kwargs):
+        return get_file_content(self.tmp.name, "big.txt", **kwargs)
+
+    def test_default_read_is_unchanged(self):
+        result = self.read()
+
+        self.assertTrue(result.endswith(f'[...File "big.txt" truncated at {MAX_CHARS} characters]'))
+        self.assertEqual(len(result), MAX_CHARS + len(f'[...File "big.txt" truncated at {MAX_CHARS} characters]'))
+
+    @patch('functions.get_file_content.LINE_INDEX_BLOCK', 64)
+    def test_line_window(self):
+        result = self.read(start_line=4000, end_line=4002)
+
+        self.assertEqual(
+            result,
+            "line 4000\nline 4001\nline 4002\n"
+            '[...File "big.txt": showing lines 4000-4002 of 5000; call again with start_line=4003 for more]',
+        )
+
+    @patch('functions.get_file_content.MMAP_MIN_BYTES', 1)
+    def test_line_window_through_mmap(self):
+        result = self.read(start_line=4999)
+
+        self.assertEqual(result, "line 4999\nline 5000\n")
+
+    def test_line_window_is_capped(self):
+        result = self.read(start_line=1)
+
+        content, marker = result.split("[...", 1)
+        self.assertLessEqual(len(content), MAX_CHARS)
+        self.assertTrue(content.endswith("\n"))
+        next_line = len(content.splitlines()) + 1
+        self.assertIn(f"call again with start_line={next_line} for more", marker)
+
+    def test_byte_range(self):
+        text = "\n".join(self.lines) + "\n"
+
+        result = self.read(offset=100, length=20)
+
+        self.assertTrue(result.startswith(text[100:120] + "[...File"))
+        self.assertIn("call again with offset=120", result)
+
+    def test_out_of_range(self):
+        self.assertIn("past the end", self.read(start_line=9999))
+        self.assertIn("past the end", self.read(offset=10**9))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+from unittest.mock import MagicMock
+
+from google.genai import types
+
+from history import HistoryManager, SUMMARY_HEADER, estimate_tokens
+
+
+def user(text):
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def model_call(name, **args):
+    return types.Content(
+        role="model",
+        parts=[types.Part(function_call=types.FunctionCall(name=name, args=args))],
+    )
+
+
+def tool_result(name, result):
+    return types.Content(
+        role="tool",
+        parts=[types.Part.from_function_response(name=name, response={"result": result})],
+    )
+
+
+def result_of(content):
+    return content.parts[0].function_response.response["result"]
+
+
+class TestHistoryManager(unittest.TestCase):
+    def setUp(self):
+        self.messages = [user("fix the bug")]
+        for i in range(4):
+            self.messages.append(model_call("get_file_content", file_path=f"f{i}.py"))
+            self.messages.append(tool_result("get_file_content", "x" * 4000))
+
+    def test_under_budget_is_untouched(self):
+        history = HistoryManager(token_budget=100_000)
+        before = list(self.messages)
+
+        history.compact(self.messages)
+
+        self.assertEqual(self.messages, before)
+
+    def test_elides_old_tool_results_only(self):
+        history = HistoryManager(token_budget=1000, keep_recent=2)
+
+        history.compact(self.messages)
+
+        self.assertIn("elided", result_of(self.messages[2]))
+        self.assertIn("elided", result_of(self.messages[6]))
+        self.assertEqual(result_of(self.messages[8]), "x" * 4000)
+
+    def test_uses_reported_usage(self):
+        history = HistoryManager(token_budget=1000, keep_recent=2)
+        usage = MagicMock()
+        usage.prompt_token_count = 50
+        history.record_usage(usage, len(self.messages) - 1)
+
+        self.assertEqual(
+            history.count_tokens(self.messages),
+            50 + estimate_tokens(self.messages[-1]),
+        )
+
+    def test_fold_into_summary(self):
+        history = HistoryManager(token_budget=10, keep_recent=2, summarize=True)
+
+        history.compact(self.messages)
+
+        self.assertEqual(len(self.messages), 3)
+        self.assertEqual([m.role for m in self.messages], ["user", "model", "tool"])
+        self.assertEqual(self.messages[0].parts[0].text, "fix the bug")
+        summary = self.messages[0].parts[1].text
+        self.assertTrue(summary.startswith(SUMMARY_HEADER))
+        self.assertIn("called get_file_content(file_path='f0.py')", summary)
+        self.assertEqual(self.messages[1].parts[0].function_call.args, {"file_path": "f3.py"})
+
+    def test_fold_without_recent_messages(self):
+        history = HistoryManager(token_budget=10, keep_recent=0, summarize=True)
+        self.messages.append(model_call("get_files_info"))
+
+        history.compact(self.messages)
+
+        self.assertEqual([m.role for m in self.messages], ["user", "model"])
+        self.assertEqual(self.messages[1].parts[0].function_call.name, "get_files_info")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,9 @@ import os
 import sys
 import argparse
 from io import StringIO
-from main import main, generate_content
+import threading
+from main import main, generate_content, generate_content_stream
+from google.genai import types
 
 from config import MAX_ITERS 
 
@@ -42,6 +44,13 @@ class TestMain(unittest.TestCase):
         mock_args = MagicMock()
         mock_args.prompt = self.test_prompt
         mock_args.verbose = False
+        mock_args.parallel_tools = False
+        mock_args.token_budget = None
+        mock_args.stream = False
+        mock_args.cache_mode = "passthrough"
+        mock_args.trace = None
+        mock_args.resume = None
+        mock_args.checkpoint_dir = None
         mock_parse.return_value = mock_args
         
         # Setup mock client and response
@@ -79,6 +88,13 @@ class TestMain(unittest.TestCase):
         mock_args = MagicMock()
         mock_args.prompt = self.test_prompt
         mock_args.verbose = False
+        mock_args.parallel_tools = False
+        mock_args.token_budget = None
+        mock_args.stream = False
+        mock_args.cache_mode = "passthrough"
+        mock_args.trace = None
+        mock_args.resume = None
+        mock_args.checkpoint_dir = None
         mock_parse.return_value = mock_args
         
         # Make generate_content always return None to trigger max iters
@@ -186,5 +202,54 @@ class TestGenerateContent(unittest.TestCase):
         self.assertIn("Prompt tokens: 10", output)
         self.assertIn("Response tokens: 20", output)
 
+class TestGenerateContentStream(unittest.TestCase):
+    def setUp(self):
+        self.mock_client = MagicMock()
+        self.messages = []
+
+    def chunk(self, part):
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=[part]))]
+        )
+
+    def test_stream_prints_text_as_it_arrives(self):
+        chunks = [self.chunk(types.Part(text="Hello, ")), self.chunk(types.Part(text="world"))]
+        self.mock_client.models.generate_content_stream.return_value = iter(chunks)
+
+        with patch('sys.stdout', new=StringIO()) as fake_out:
+            result = generate_content_stream(self.mock_client, self.messages)
+
+        self.assertEqual(result, "Hello, world")
+        self.assertIn("Hello, world", fake_out.getvalue())
+        self.assertEqual(len(self.messages), 1)
+        self.assertEqual(self.messages[0].parts[0].text, "Hello, world")
+
+    @patch('call_function.call_function')
+    def test_function_call_starts_before_stream_ends(self, mock_call_function):
+        started = threading.Event()
+        started_before_end = []
+
+        def fake_call_function(function_call_part, verbose=False, working_directory=None, session=None):
+            started.set()
+            return types.Content(
+                role="tool",
+                parts=[types.Part.from_function_response(name=function_call_part.name, response={"result": "ok"})],
+            )
+        mock_call_function.side_effect = fake_call_function
+
+        def stream(**kwargs):
+            yield self.chunk(types.Part(function_call=types.FunctionCall(name="get_files_info", args={})))
+            started_before_end.append(started.wait(timeout=1))
+            yield self.chunk(types.Part(text="done looking"))
+        self.mock_client.models.generate_content_stream.side_effect = stream
+
+        with patch('sys.stdout', new=StringIO()):
+            result = generate_content_stream(self.mock_client, self.messages)
+
+        self.assertIsNone(result)
+        self.assertEqual(started_before_end, [True])
+        self.assertEqual([m.role for m in self.messages], ["model", "tool"])
+        self.assertEqual(self.messages[1].parts[0].function_response.response, {"result": "ok"})
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
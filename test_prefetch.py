@@ -0,0 +1,100 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from google.genai import types
+
+import call_function
+from prefetch import Prefetcher
+from tool_cache import ToolCache
+
+
+def make_call(name, **args):
+    return types.FunctionCall(name=name, args=args)
+
+
+def result_of(content):
+    return content.parts[0].function_response.response["result"]
+
+
+class TestPrefetcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for name in ("main.py", "tests.py", "helpers.py", "notes.txt", "pkg/calculator.py"):
+            path = os.path.join(self.tmp.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(f"# {name}\n")
+        self.cache = ToolCache()
+        self.prefetcher = Prefetcher(self.cache, top_n=2)
+        patcher = patch.multiple(call_function, tool_cache=self.cache, prefetcher=self.prefetcher)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def call(self, name, **args):
+        return result_of(call_function.call_function(make_call(name, **args), working_directory=self.tmp.name))
+
+    def wait_for_prefetch(self, count):
+        deadline = time.monotonic() + 5
+        while self.prefetcher.prefetched < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_rank(self):
+        files = [("notes.txt", 1, 4), ("helpers.py", 1, 3), ("main.py", 1, 1), ("pkg/calculator.py", 1, 2), ("tests.py", 1, 0)]
+
+        ranked = self.prefetcher.rank(files, {"fix", "the", "calculator"})
+
+        self.assertEqual(ranked, ["pkg/calculator.py", "main.py", "tests.py", "notes.txt", "helpers.py"])
+
+    def test_listing_prefetches_likely_reads(self):
+        self.prefetcher.note_prompt("fix helpers.py", self.tmp.name)
+
+        self.call("get_files_info")
+        self.wait_for_prefetch(2)
+        content = self.call("get_file_content", file_path="helpers.py")
+        self.call("get_file_content", file_path="notes.txt")
+
+        self.assertEqual(content, "# helpers.py\n")
+        self.assertEqual((self.prefetcher.prefetched, self.prefetcher.used), (2, 1))
+        self.assertEqual(self.prefetcher.stats(), "Prefetch: 2 files read ahead, 1 used (50%)")
+
+    def test_prefetched_file_changed_by_a_write(self):
+        self.call("get_files_info")
+        self.wait_for_prefetch(2)
+        self.call("write_file", file_path="main.py", content="print('new')\n")
+
+        self.assertEqual(self.call("get_file_content", file_path="main.py"), "print('new')\n")
+        self.assertEqual(self.prefetcher.used, 0)
+
+    def test_other_spellings_hit_prefetched_reads(self):
+        self.prefetcher.note_prompt("fix helpers.py and pkg/calculator.py", self.tmp.name)
+
+        self.call("get_files_info", depth=2)
+        self.wait_for_prefetch(2)
+        self.call("get_file_content", file_path="./helpers.py")
+        self.call("get_file_content", file_path="pkg/../pkg/calculator.py")
+
+        self.assertEqual(self.prefetcher.used, 2)
+
+    def test_close(self):
+        self.call("get_files_info")
+        self.wait_for_prefetch(2)
+
+        self.prefetcher.close()
+
+        self.assertIsNone(self.prefetcher._executor)
+        self.assertEqual(self.call("get_file_content", file_path="main.py"), "# main.py\n")
+
+    def test_disabled(self):
+        self.prefetcher.top_n = 0
+
+        self.call("get_files_info")
+
+        self.assertIsNone(self.prefetcher._executor)
+
+
+if __name__ == '__main__':
+    unittest.main()
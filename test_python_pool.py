@@ -0,0 +1,100 @@
+import os
+import subprocess
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from functions.python_pool import PythonWorkerPool
+from functions.run_python import run_python_file
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "python worker pool needs fork")
+class TestPythonWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pool = PythonWorkerPool(1)
+
+    def tearDown(self):
+        self.pool.close()
+        self.tmp.cleanup()
+
+    def write_script(self, name, source):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(source)
+        return path
+
+    def test_matches_fresh_interpreter(self):
+        self.write_script("helper.py", "VALUE = 42\n")
+        path = self.write_script(
+            "script.py",
+            "import os, sys\n"
+            "from helper import VALUE\n"
+            "print(VALUE, sys.argv[1:], os.path.basename(os.getcwd()))\n"
+            "print('oops', file=sys.stderr)\n"
+            "sys.exit(3)\n",
+        )
+        commands = ["python", path, "a", "b c"]
+
+        expected = subprocess.run(commands, capture_output=True, text=True, cwd=self.tmp.name)
+        result = self.pool.run(commands, self.tmp.name, timeout=30)
+
+        self.assertEqual(
+            (result.returncode, result.stdout, result.stderr),
+            (expected.returncode, expected.stdout, expected.stderr),
+        )
+
+    def test_runs_do_not_leak_state(self):
+        path = self.write_script(
+            "script.py",
+            "import sys\n"
+            "print(hasattr(sys, 'leaked'))\n"
+            "sys.leaked = True\n",
+        )
+
+        first = self.pool.run(["python", path], self.tmp.name, timeout=30)
+        second = self.pool.run(["python", path], self.tmp.name, timeout=30)
+
+        self.assertEqual(first.stdout, "False\n")
+        self.assertEqual(second.stdout, "False\n")
+
+    def test_uncaught_exception(self):
+        path = self.write_script("script.py", "raise ValueError('bad')\n")
+
+        result = self.pool.run(["python", path], self.tmp.name, timeout=30)
+
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("ValueError: bad", result.stderr)
+
+    def test_timeout_kills_script_and_keeps_worker(self):
+        slow = self.write_script("slow.py", "import time\ntime.sleep(60)\n")
+        fast = self.write_script("fast.py", "print('ok')\n")
+
+        with self.assertRaises(subprocess.TimeoutExpired):
+            self.pool.run(["python", slow], self.tmp.name, timeout=0.5)
+        result = self.pool.run(["python", fast], self.tmp.name, timeout=30)
+
+        self.assertEqual(result.stdout, "ok\n")
+
+    def test_preload_failures_are_recorded(self):
+        pool = PythonWorkerPool(1, preload=["json", "no_such_module"])
+        self.addCleanup(pool.close)
+        path = self.write_script("script.py", "print('ok')\n")
+
+        result = pool.run(["python", path], self.tmp.name, timeout=30)
+
+        self.assertEqual(result.stdout, "ok\n")
+        self.assertEqual(list(pool.preload_errors), ["no_such_module"])
+        self.assertIn("could not preload no_such_module (ModuleNotFoundError", pool.stats())
+
+    @patch('config.PYTHON_POOL_SIZE', 1)
+    def test_run_python_file_output_format(self):
+        self.write_script("script.py", "print('hi')\nraise SystemExit(2)\n")
+
+        result = run_python_file(self.tmp.name, "script.py")
+
+        self.assertEqual(result, "STDOUT:\nhi\n\nProcess exited with code 2")
+
+
+if __name__ == '__main__':
+    unittest.main()
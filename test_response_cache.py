@@ -0,0 +1,134 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from google.genai import types
+
+from main import generate_config
+from response_cache import CachedClient, ResponseCache, ResponseCacheMiss, request_key
+
+
+def user(text):
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def response(text):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]))],
+    )
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(self.tmp.name)
+        self.client = MagicMock()
+        self.client.models.generate_content.side_effect = lambda model, contents, config: response(
+            f"answer to {contents[-1].parts[0].text}"
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_request_key(self):
+        config = generate_config()
+        key = request_key("model", [user("hi")], config)
+
+        self.assertEqual(key, request_key("model", [user("hi")], generate_config()))
+        self.assertNotEqual(key, request_key("model", [user("hello")], config))
+        self.assertNotEqual(key, request_key("other-model", [user("hi")], config))
+        self.assertNotEqual(key, request_key("model", [user("hi")], types.GenerateContentConfig()))
+
+    def test_record_then_replay_without_client(self):
+        recorder = CachedClient(self.client, self.cache, "record")
+        recorded = recorder.models.generate_content(model="m", contents=[user("q")], config=generate_config())
+        recorder.models.generate_content(model="m", contents=[user("q")], config=generate_config())
+
+        replayer = CachedClient(None, ResponseCache(self.tmp.name), "replay")
+        replayed = replayer.models.generate_content(model="m", contents=[user("q")], config=generate_config())
+
+        self.assertEqual(self.client.models.generate_content.call_count, 1)
+        self.assertEqual(replayed.text, recorded.text)
+        with self.assertRaises(ResponseCacheMiss):
+            replayer.models.generate_content(model="m", contents=[user("other")], config=generate_config())
+
+    def test_corrupt_entry_is_a_miss(self):
+        key = request_key("m", [user("q")], generate_config())
+        recorder = CachedClient(self.client, self.cache, "record")
+        recorder.models.generate_content(model="m", contents=[user("q")], config=generate_config())
+        with open(self.cache._path(key), "r+") as f:
+            f.truncate(10)
+
+        replayer = CachedClient(None, ResponseCache(self.tmp.name), "replay")
+        with self.assertRaises(ResponseCacheMiss):
+            replayer.models.generate_content(model="m", contents=[user("q")], config=generate_config())
+        recorded = recorder.models.generate_content(model="m", contents=[user("q")], config=generate_config())
+
+        self.assertEqual(recorded.text, "answer to q")
+        self.assertEqual(self.client.models.generate_content.call_count, 2)
+        self.assertEqual(replayer.models.generate_content(model="m", contents=[user("q")], config=generate_config()).text, "answer to q")
+
+    def test_passthrough_does_not_store(self):
+        client = CachedClient(self.client, self.cache, "passthrough")
+        client.models.generate_content(model="m", contents=[user("q")])
+
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_streamed_responses_are_recorded_whole(self):
+        self.client.models.generate_content_stream.return_value = iter([
+            response("Hello, "),
+            response("world"),
+            types.GenerateContentResponse(
+                candidates=[types.Candidate(content=types.Content(role="model", parts=[
+                    types.Part(function_call=types.FunctionCall(name="get_files_info", args={})),
+                ]))],
+            ),
+        ])
+        recorder = CachedClient(self.client, self.cache, "record")
+        chunks = list(recorder.models.generate_content_stream(model="m", contents=[user("q")]))
+
+        replayer = CachedClient(None, self.cache, "replay")
+        replayed = list(replayer.models.generate_content_stream(model="m", contents=[user("q")]))
+
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(len(replayed), 1)
+        parts = replayed[0].candidates[0].content.parts
+        self.assertEqual(parts[0].text, "Hello, world")
+        self.assertEqual(parts[1].function_call.name, "get_files_info")
+
+    def test_async_record(self):
+        self.client.aio.models.generate_content = AsyncMock(return_value=response("async"))
+        client = CachedClient(self.client, self.cache, "record")
+
+        async def twice():
+            first = await client.aio.models.generate_content(model="m", contents=[user("q")])
+            second = await client.aio.models.generate_content(model="m", contents=[user("q")])
+            return first, second
+
+        first, second = asyncio.run(twice())
+
+        self.assertEqual((first.text, second.text), ("async", "async"))
+        self.assertEqual(self.client.aio.models.generate_content.await_count, 1)
+
+    def test_least_recently_used_responses_are_evicted(self):
+        size = len(response("answer to q0").model_dump_json(exclude_none=True))
+        cache = ResponseCache(self.tmp.name, max_bytes=size * 2)
+        client = CachedClient(self.client, cache, "record")
+        for i in range(2):
+            client.models.generate_content(model="m", contents=[user(f"q{i}")])
+            time.sleep(0.01)
+        # Touching q0 makes q1 the oldest entry.
+        client.models.generate_content(model="m", contents=[user("q0")])
+        time.sleep(0.01)
+        client.models.generate_content(model="m", contents=[user("q2")])
+
+        self.assertIsNotNone(cache.get(request_key("m", [user("q0")], None)))
+        self.assertIsNone(cache.get(request_key("m", [user("q1")], None)))
+        self.assertIsNotNone(cache.get(request_key("m", [user("q2")], None)))
+
+
+if __name__ == '__main__':
+    unittest.main()
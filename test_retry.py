@@ -0,0 +1,117 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+from google.genai import errors
+
+from retry import RetryPolicy, TokenBucket, is_retryable, retry_after
+
+
+def api_error(code, details=None, headers=None):
+    response = httpx.Response(code, headers=headers or {}) if headers else None
+    return errors.APIError(code, details or {"error": {"code": code, "status": "ERROR"}}, response)
+
+
+RATE_LIMITED = api_error(429, {"error": {"code": 429, "details": [
+    {"@type": "type.googleapis.com/google.rpc.QuotaFailure"},
+    {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "17s"},
+]}})
+
+
+class TestRetryHints(unittest.TestCase):
+    def test_retryable_errors(self):
+        self.assertTrue(is_retryable(RATE_LIMITED))
+        self.assertTrue(is_retryable(api_error(503)))
+        self.assertTrue(is_retryable(ConnectionError()))
+        self.assertTrue(is_retryable(httpx.ReadTimeout("timed out")))
+        self.assertFalse(is_retryable(api_error(400)))
+        self.assertFalse(is_retryable(ValueError("bad")))
+
+    def test_retry_after(self):
+        self.assertEqual(retry_after(RATE_LIMITED), 17.0)
+        self.assertEqual(retry_after(api_error(503, headers={"Retry-After": "3"})), 3.0)
+        self.assertIsNone(retry_after(api_error(503)))
+
+
+@patch("retry.time.sleep")
+class TestRetryPolicy(unittest.TestCase):
+    def test_retries_until_success(self, mock_sleep):
+        function = MagicMock(side_effect=[api_error(503), RATE_LIMITED, "ok"])
+        policy = RetryPolicy(base_delay=0.5)
+
+        self.assertEqual(policy.call(function, model="m"), "ok")
+
+        self.assertEqual(policy.retries, 2)
+        function.assert_called_with(model="m")
+        delays = [call.args[0] for call in mock_sleep.call_args_list]
+        self.assertLessEqual(delays[0], 0.5)
+        self.assertGreaterEqual(delays[1], 17.0)
+
+    def test_gives_up(self, mock_sleep):
+        policy = RetryPolicy(max_attempts=3)
+        with self.assertRaises(errors.APIError):
+            policy.call(MagicMock(side_effect=api_error(500)))
+        self.assertEqual(policy.retries, 2)
+
+        with self.assertRaises(ValueError):
+            policy.call(MagicMock(side_effect=ValueError("bad request")))
+        self.assertEqual(policy.retries, 2)
+
+    def test_stream_is_retried_until_the_first_chunk(self, mock_sleep):
+        def failing_stream():
+            raise api_error(503)
+            yield
+
+        streams = iter([failing_stream(), iter(["a", "b"])])
+        policy = RetryPolicy()
+
+        self.assertEqual(list(policy.stream(lambda: next(streams))), ["a", "b"])
+        self.assertEqual(policy.retries, 1)
+
+    def test_async_call(self, mock_sleep):
+        function = AsyncMock(side_effect=[api_error(429), "ok"])
+        policy = RetryPolicy(base_delay=0)
+
+        with patch("retry.asyncio.sleep", new=AsyncMock()) as mock_async_sleep:
+            result = asyncio.run(policy.call_async(function))
+
+        self.assertEqual(result, "ok")
+        self.assertEqual(policy.retries, 1)
+        mock_async_sleep.assert_awaited_once()
+
+    def test_transport_errors_are_retried(self, mock_sleep):
+        request = httpx.Request("POST", "https://example.invalid")
+        failures = [
+            httpx.ConnectError("connection refused", request=request),
+            httpx.ReadTimeout("timed out", request=request),
+            httpx.RemoteProtocolError("server disconnected", request=request),
+        ]
+        policy = RetryPolicy(base_delay=0)
+
+        self.assertEqual(policy.call(MagicMock(side_effect=failures + ["ok"])), "ok")
+        with patch("retry.asyncio.sleep", new=AsyncMock()):
+            self.assertEqual(asyncio.run(policy.call_async(AsyncMock(side_effect=failures + ["ok"]))), "ok")
+
+        self.assertEqual(policy.retries, 6)
+
+    def test_retry_after_pauses_the_shared_limiter(self, mock_sleep):
+        limiter = TokenBucket(rate=1000, capacity=10)
+        policy = RetryPolicy(limiter=limiter)
+        policy.call(MagicMock(side_effect=[RATE_LIMITED, "ok"]))
+
+        self.assertGreater(limiter._reserve(), 16)
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_rate(self):
+        limiter = TokenBucket(rate=100, capacity=1)
+        start = time.monotonic()
+        for _ in range(4):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.025)
+
+
+if __name__ == '__main__':
+    unittest.main()
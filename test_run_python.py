@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from functions.output_capture import BoundedOutput
+from functions.python_pool import PythonWorkerPool
+from functions.run_python import run_python_file
+from functions.get_file_content import get_file_content
+from functions.get_files_info import get_files_info
+
+
+class TestBoundedOutput(unittest.TestCase):
+    def test_keeps_head_and_tail(self):
+        output = BoundedOutput(head_bytes=4, tail_bytes=3)
+        for chunk in (b"ab", b"cdefg", b"hij"):
+            output.write(chunk)
+
+        self.assertEqual((bytes(output.head), bytes(output.tail), output.total), (b"abcd", b"hij", 10))
+        self.assertTrue(output.truncated)
+        self.assertEqual(output.text(), "abcd\n[... 3 bytes omitted; 10 bytes in total ...]\nhij")
+
+    def test_short_output_is_not_marked(self):
+        output = BoundedOutput(head_bytes=4, tail_bytes=3)
+        output.write(b"abcdefg")
+
+        self.assertFalse(output.truncated)
+        self.assertEqual(output.text(), "abcdefg")
+
+    def test_from_file_matches_streaming(self):
+        data = bytes(range(256)) * 10
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(data)
+            f.flush()
+            streamed = BoundedOutput(head_bytes=100, tail_bytes=50)
+            streamed.write(data)
+            read = BoundedOutput.from_file(f.name, head_bytes=100, tail_bytes=50)
+
+        self.assertEqual(
+            (read.head, read.tail, read.total),
+            (streamed.head, streamed.tail, streamed.total),
+        )
+
+
+class TestRunPythonOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmp.name, "flood.py"), "w") as f:
+            f.write("for i in range(100000):\n    print(f'line {i}')\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def log_dir(self):
+        return os.path.join(self.tmp.name, ".agent", "logs")
+
+    @patch("functions.run_python.RUN_OUTPUT_HEAD_BYTES", 20)
+    @patch("functions.run_python.RUN_OUTPUT_TAIL_BYTES", 20)
+    def test_long_output_is_cut_and_logged(self):
+        result = run_python_file(self.tmp.name, "flood.py")
+
+        self.assertTrue(result.startswith("STDOUT:\nline 0\nline 1\n"))
+        self.assertIn("bytes omitted; 1088890 bytes in total", result)
+        self.assertTrue(result.endswith("line 99999\n"))
+        logs = os.listdir(self.log_dir())
+        self.assertEqual(len(logs), 1)
+        log = os.path.join(".agent", "logs", logs[0])
+        self.assertIn(f'"{log}"', result)
+        self.assertIn("line 5000\n", get_file_content(self.tmp.name, log, start_line=5001, end_line=5001))
+
+    def test_short_output_leaves_no_log(self):
+        with open(os.path.join(self.tmp.name, "hello.py"), "w") as f:
+            f.write("print('hi')\n")
+
+        result = run_python_file(self.tmp.name, "hello.py")
+
+        self.assertEqual(result, "STDOUT:\nhi\n")
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["flood.py", "hello.py"])
+
+    @patch("functions.run_python.RUN_OUTPUT_HEAD_BYTES", 20)
+    @patch("functions.run_python.RUN_OUTPUT_TAIL_BYTES", 20)
+    def test_logs_are_not_listed(self):
+        run_python_file(self.tmp.name, "flood.py")
+
+        self.assertEqual(len(os.listdir(self.log_dir())), 1)
+        self.assertEqual(get_files_info(self.tmp.name, depth=0), "- flood.py: file_size=47 bytes, is_dir=False")
+
+    @patch("functions.run_python.RUN_OUTPUT_MAX_BYTES", 10000)
+    def test_flood_is_killed_at_cap(self):
+        with open(os.path.join(self.tmp.name, "forever.py"), "w") as f:
+            f.write("while True:\n    print('x' * 100)\n")
+
+        result = run_python_file(self.tmp.name, "forever.py")
+
+        self.assertIn("bytes omitted", result)
+        self.assertTrue(result.endswith("Process killed after producing more than 10000 bytes of output"))
+
+    @unittest.skipUnless(hasattr(os, "fork"), "python worker pool needs fork")
+    @patch("functions.run_python.RUN_OUTPUT_MAX_BYTES", 10000)
+    def test_pool_flood_is_killed_at_cap(self):
+        with open(os.path.join(self.tmp.name, "forever.py"), "w") as f:
+            f.write("while True:\n    print('x' * 100)\n")
+        pool = PythonWorkerPool(1)
+        self.addCleanup(pool.close)
+
+        with patch("functions.run_python.get_python_pool", return_value=pool):
+            result = run_python_file(self.tmp.name, "forever.py")
+
+        self.assertIn("bytes omitted", result)
+        self.assertTrue(result.endswith("Process killed after producing more than 10000 bytes of output"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from google.genai import types
+
+import call_function
+from functions.run_tests import get_import_graph, run_tests
+from session_state import SessionState
+from tool_cache import ToolCache
+
+FILES = {
+    "pkg/__init__.py": "",
+    "pkg/shapes.py": "def area(w, h):\n    return w * h\n",
+    "pkg/report.py": "from .shapes import area\n\ndef report(w, h):\n    return f'area {area(w, h)}'\n",
+    "util.py": "def double(x):\n    return 2 * x\n",
+    "test_shapes.py": (
+        "import unittest\nfrom pkg.shapes import area\n\n"
+        "class TestShapes(unittest.TestCase):\n"
+        "    def test_area(self):\n        self.assertEqual(area(2, 3), 6)\n"
+    ),
+    "tests/test_report.py": (
+        "import unittest\nimport util\nfrom pkg import report\n\n"
+        "class TestReport(unittest.TestCase):\n"
+        "    def test_report(self):\n        self.assertEqual(report.report(2, 3), 'area 6')\n"
+        "    def test_other(self):\n        self.assertTrue(True)\n"
+    ),
+    "test_util.py": (
+        "import unittest\nimport util\n\n"
+        "class TestUtil(unittest.TestCase):\n"
+        "    def test_double(self):\n        self.assertEqual(util.double(2), 4)\n"
+    ),
+}
+
+
+class TestRunTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for name, source in FILES.items():
+            self.write(name, source)
+
+    def write(self, name, source):
+        path = os.path.join(self.tmp.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(source)
+
+    def test_import_graph(self):
+        graph = get_import_graph(self.tmp.name)
+        graph.refresh()
+
+        self.assertEqual(graph.dependencies("pkg/report.py"), {"pkg/__init__.py", "pkg/shapes.py"})
+        self.assertEqual(graph.dependencies("test_shapes.py"), {"pkg/__init__.py", "pkg/shapes.py"})
+        self.assertEqual(
+            graph.affected(["pkg/shapes.py"]),
+            {"pkg/shapes.py", "pkg/report.py", "test_shapes.py", "tests/test_report.py"},
+        )
+        self.assertEqual(graph.dependencies("tests/test_report.py"), {"util.py", "pkg/__init__.py", "pkg/report.py"})
+
+    def test_runs_only_affected_tests(self):
+        result = run_tests(self.tmp.name, ["pkg/report.py"])
+
+        self.assertEqual(result.splitlines(), [
+            "Ran 2 tests in 1 of 3 test files (affected by pkg/report.py) in "
+            + result.split(" in ")[2].split("s:")[0] + "s: all passed.",
+            "tests/test_report.py: OK, 2 tests",
+        ])
+
+    def test_failures_are_summarized(self):
+        self.write("pkg/shapes.py", "def area(w, h):\n    return w + h\n")
+
+        result = run_tests(self.tmp.name, ["pkg/shapes.py"])
+
+        self.assertIn("2 files failing", result)
+        self.assertIn("test_shapes.py: FAILED (failures=1), 1 tests", result)
+        self.assertIn("  FAIL: test_area (test_shapes.TestShapes.test_area)\n    AssertionError: 5 != 6", result)
+        self.assertIn("tests/test_report.py: FAILED (failures=1), 2 tests", result)
+
+    def test_unaffected_and_all(self):
+        self.write("notes.py", "x = 1\n")
+
+        self.assertIn("No tests are affected by notes.py", run_tests(self.tmp.name, ["notes.py"]))
+        self.assertIn("Ran 4 tests in 3 of 3 test files (all)", run_tests(self.tmp.name, run_all=True))
+        self.write("tests/test_empty.py", "import unittest\n")
+        result = run_tests(self.tmp.name, run_all=True)
+        self.assertIn("in 4 of 4 test files (all)", result)
+        self.assertIn("all passed.", result)
+        self.assertIn("tests/test_empty.py: no tests, 0 tests", result)
+        self.assertIn("(all)", run_tests(self.tmp.name, ["data.json"]))
+
+    def test_outside_working_directory(self):
+        self.assertTrue(run_tests(self.tmp.name, ["../x.py"]).startswith("Error: Cannot test"))
+
+    def test_session_writes_pick_the_tests(self):
+        session = SessionState()
+        patcher = patch.object(call_function, "tool_cache", ToolCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        def call(name, **args):
+            part = types.FunctionCall(name=name, args=args)
+            content = call_function.call_function(part, working_directory=self.tmp.name, session=session)
+            return content.parts[0].function_response.response["result"]
+
+        call("write_file", file_path="util.py", content="def double(x):\n    return x + x\n")
+        result = call("run_tests")
+
+        self.assertEqual(session.written_files(self.tmp.name), ["util.py"])
+        self.assertIn("in 2 of 3 test files (affected by util.py)", result)
+        self.assertIn("test_util.py: OK, 1 tests", result)
+        self.assertIn("tests/test_report.py: OK, 2 tests", result)
+
+
+if __name__ == '__main__':
+    unittest.main()
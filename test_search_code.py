@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+from functions.search_code import CodeIndex, required_literals, search_code
+
+
+class TestSearchCode(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.write("main.py", "from pkg.calc import evaluate\nprint(evaluate('1'))\n")
+        self.write("pkg/calc.py", "def evaluate(expression):\n    return float(expression)\n")
+        self.write("pkg/other.py", "VALUE = 1\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, content):
+        full = os.path.join(self.tmp.name, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w") as f:
+            f.write(content)
+
+    def test_definitions_rank_first(self):
+        result = search_code(self.tmp.name, "evaluate")
+
+        self.assertEqual(
+            result.splitlines(),
+            [
+                "pkg/calc.py:1: def evaluate(expression):",
+                "main.py:1: from pkg.calc import evaluate",
+                "main.py:2: print(evaluate('1'))",
+            ],
+        )
+
+    def test_regex_and_directory(self):
+        result = search_code(self.tmp.name, r"return \w+\(", regex=True, directory="pkg")
+
+        self.assertEqual(result, "pkg/calc.py:2:     return float(expression)")
+
+    def test_results_are_bounded(self):
+        result = search_code(self.tmp.name, "e", max_results=2)
+
+        self.assertEqual(len(result.splitlines()), 3)
+        self.assertIn("more matches not shown", result.splitlines()[-1])
+
+    def test_index_follows_file_changes(self):
+        index = CodeIndex(self.tmp.name)
+        index.refresh()
+        self.assertEqual(index.candidates(["evaluate"]), ["main.py", "pkg/calc.py"])
+
+        self.write("pkg/other.py", "evaluate = None\n" * 2)
+        os.remove(os.path.join(self.tmp.name, "main.py"))
+        index.refresh()
+
+        self.assertEqual(index.candidates(["evaluate"]), ["pkg/calc.py", "pkg/other.py"])
+
+    def test_required_literals(self):
+        self.assertEqual(required_literals(r"def\s+evaluate\("), ["def", "evaluate("])
+        self.assertEqual(required_literals("colou?r"), ["colo", "r"])
+        self.assertEqual(required_literals("foo(bar)?baz"), ["foo", "baz"])
+        self.assertEqual(required_literals("cat|dog"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from google.genai import types
+
+import call_function
+from history import HistoryManager
+from main import compact_history
+from session_state import SessionState
+from tool_cache import ToolCache
+
+
+def make_call(name, **args):
+    return types.FunctionCall(name=name, args=args)
+
+
+def result_of(content):
+    return content.parts[0].function_response.response["result"]
+
+
+class TestSessionState(unittest.TestCase):
+    def setUp(self):
+        self.session = SessionState()
+        self.content = "".join(f"line {i}\n" for i in range(100))
+
+    def test_first_read_is_full(self):
+        self.assertEqual(self.session.file_read("/w/a.py", "a.py", self.content), self.content)
+
+    def test_unchanged_reread_is_a_stub(self):
+        self.session.next_turn()
+        self.session.file_read("/w/a.py", "a.py", self.content)
+        self.session.next_turn()
+
+        result = self.session.file_read("/w/a.py", "a.py", self.content)
+
+        self.assertEqual(
+            result,
+            '[File "a.py" is unchanged since you read it in turn 1; call get_file_content with full=true if you need it again]',
+        )
+        self.assertEqual(self.session.file_read("/w/a.py", "a.py", self.content, full=True), self.content)
+
+    def test_changed_reread_is_a_diff(self):
+        self.session.file_read("/w/a.py", "a.py", self.content)
+        changed = self.content.replace("line 50\n", "line fifty\n")
+
+        result = self.session.file_read("/w/a.py", "a.py", changed)
+
+        self.assertTrue(result.startswith('[File "a.py" changed since you read it in turn 0'))
+        self.assertIn("--- a.py (turn 0)\n+++ a.py (now)\n", result)
+        self.assertIn("-line 50\n+line fifty\n", result)
+        self.assertLess(len(result), len(changed) / 2)
+
+    def test_large_change_is_sent_in_full(self):
+        self.session.file_read("/w/a.py", "a.py", self.content)
+        rewritten = self.content.upper()
+
+        self.assertEqual(self.session.file_read("/w/a.py", "a.py", rewritten), rewritten)
+
+    def test_errors_pass_through(self):
+        error = 'Error: File not found or is not a regular file: "a.py"'
+        self.session.file_read("/w/a.py", "a.py", error)
+
+        self.assertEqual(self.session.file_read("/w/a.py", "a.py", error), error)
+
+    def test_compaction_forgets_reads(self):
+        self.session.file_read("/w/a.py", "a.py", self.content)
+        messages = [types.Content(role="user", parts=[types.Part(text="x" * 400)])]
+
+        compact_history(messages, HistoryManager(1000), self.session)
+        self.assertEqual(self.session.turn, 1)
+        self.assertNotEqual(self.session.file_read("/w/a.py", "a.py", self.content), self.content)
+        compact_history(messages, HistoryManager(10), self.session)
+
+        self.assertEqual(self.session.file_read("/w/a.py", "a.py", self.content), self.content)
+
+
+class TestSessionReads(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        with open(os.path.join(self.tmp.name, "a.py"), "w") as f:
+            f.write("".join(f"x = {i}\n" for i in range(50)))
+        self.session = SessionState()
+        patcher = patch.object(call_function, "tool_cache", ToolCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def call(self, name, **args):
+        part = make_call(name, **args)
+        return result_of(call_function.call_function(part, working_directory=self.tmp.name, session=self.session))
+
+    def test_edit_and_reread(self):
+        full = self.call("get_file_content", file_path="a.py")
+        self.assertIn("unchanged", self.call("get_file_content", file_path="a.py"))
+        self.assertEqual(self.call("get_file_content", file_path="a.py", full=True), full)
+        self.assertTrue(self.call("get_file_content", file_path="a.py", start_line=1, end_line=1).startswith("x = 0\n"))
+
+        self.call("edit_file", edits=[{"file_path": "a.py", "old_text": "x = 7\n", "new_text": "x = 'seven'\n"}])
+        diff = self.call("get_file_content", file_path="a.py")
+
+        self.assertIn("-x = 7\n+x = 'seven'\n", diff)
+
+    def test_without_session(self):
+        part = make_call("get_file_content", file_path="a.py", full=True)
+        first = result_of(call_function.call_function(part, working_directory=self.tmp.name))
+
+        self.assertEqual(result_of(call_function.call_function(part, working_directory=self.tmp.name)), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Import time main.py may spend before it has parsed its arguments, in microseconds.
+IMPORT_BUDGET_US = 50_000
+DEFERRED_MODULES = ("google.genai", "dotenv", "call_function", "functions.get_files_info")
+
+
+def run_main(*args):
+    """
+    Run main.py under -X importtime and return the result along with the
+    cumulative import time of every module imported after interpreter startup.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "main.py", *args],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    imports = {}
+    started = False
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not started:
+            # Everything up to and including site belongs to interpreter startup.
+            started = name.strip() == "site"
+            continue
+        imports[name[1:].rstrip()] = int(cumulative)
+    return result, imports
+
+
+class TestStartup(unittest.TestCase):
+    def assert_deferred(self, imports):
+        names = {name.strip() for name in imports}
+        for module in DEFERRED_MODULES:
+            self.assertNotIn(module, names)
+        top_level = sum(us for name, us in imports.items() if not name.startswith(" "))
+        self.assertLess(top_level, IMPORT_BUDGET_US)
+
+    def test_help_does_not_import_the_sdk(self):
+        result, imports = run_main("--help")
+
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("--trace", result.stdout)
+        self.assert_deferred(imports)
+
+    def test_usage_errors_do_not_import_the_sdk(self):
+        result, imports = run_main("prompt", "--token-budget", "lots")
+
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("invalid int value", result.stderr)
+        self.assert_deferred(imports)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import call_function
+from tool_cache import ToolCache
+
+
+def make_call(name, **args):
+    function_call_part = MagicMock()
+    function_call_part.name = name
+    function_call_part.args = args
+    return function_call_part
+
+
+def result_of(content):
+    return content.parts[0].function_response.response["result"]
+
+
+class TestToolCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "a.txt")
+        with open(self.path, "w") as f:
+            f.write("hello")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hit_until_file_changes(self):
+        cache = ToolCache()
+        key = cache.key("get_file_content", self.path, {})
+        cache.put(key, cache.validator(self.path), "hello")
+
+        self.assertEqual(cache.get(key), "hello")
+        with open(self.path, "w") as f:
+            f.write("hello, world")
+        self.assertIsNone(cache.get(key))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_lru_byte_budget(self):
+        cache = ToolCache(max_bytes=10)
+        validator = cache.validator(self.path)
+        first = cache.key("get_file_content", self.path, {"n": 1})
+        second = cache.key("get_file_content", self.path, {"n": 2})
+        cache.put(first, validator, "x" * 6)
+        cache.put(second, validator, "y" * 6)
+
+        self.assertIsNone(cache.get(first))
+        self.assertEqual(cache.get(second), "y" * 6)
+
+    def test_invalidate_drops_file_and_parent_listings(self):
+        cache = ToolCache()
+        file_key = cache.key("get_file_content", self.path, {})
+        dir_key = cache.key("get_files_info", self.tmp.name, {})
+        cache.put(file_key, cache.validator(self.path), "hello")
+        cache.put(dir_key, cache.validator(self.tmp.name), "- a.txt")
+
+        cache.invalidate(self.path)
+
+        self.assertIsNone(cache.get(file_key))
+        self.assertIsNone(cache.get(dir_key))
+
+
+class TestCallFunctionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmp.name, "lorem.txt"), "w") as f:
+            f.write("lorem ipsum")
+        patchers = [
+            patch('call_function.WORKING_DIR', self.tmp.name),
+            patch('call_function.tool_cache', ToolCache()),
+            patch('sys.stdout', new=StringIO()),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_write_file_invalidates_reads(self):
+        read = make_call("get_file_content", file_path="lorem.txt")
+        call_function.call_function(read)
+        call_function.call_function(read)
+        self.assertEqual(call_function.tool_cache.hits, 1)
+
+        call_function.call_function(make_call("write_file", file_path="lorem.txt", content="x"))
+
+        self.assertEqual(result_of(call_function.call_function(read)), "x")
+        self.assertEqual(call_function.tool_cache.hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
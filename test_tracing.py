@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from call_function import call_function
+from tracing import Tracer, tracer
+
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tracer = Tracer()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_disabled_tracer_records_nothing(self):
+        with self.tracer.span("model") as span:
+            span["prompt_tokens"] = 10
+        self.tracer.event("retry")
+
+        self.assertEqual(self.tracer.events, [])
+
+    def test_spans_from_several_threads(self):
+        self.tracer.enable()
+        barrier = threading.Barrier(3)
+
+        def work(i):
+            with self.tracer.span("tool", "tool", index=i):
+                barrier.wait()
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with self.tracer.span("model", "model") as span:
+            span["prompt_tokens"] = 10
+
+        self.assertEqual(len(self.tracer.events), 4)
+        self.assertEqual(len({event["thread"] for event in self.tracer.events}), 4)
+        self.assertEqual(self.tracer.events[-1]["attrs"], {"prompt_tokens": 10})
+
+    def test_errors_are_recorded(self):
+        self.tracer.enable()
+        with self.assertRaises(ValueError):
+            with self.tracer.span("tool"):
+                raise ValueError("boom")
+
+        self.assertEqual(self.tracer.events[0]["attrs"]["error"], "ValueError: boom")
+
+    def test_export_formats(self):
+        self.tracer.enable()
+        with self.tracer.span("model", "model"):
+            self.tracer.event("retry", attempt=1)
+        jsonl = os.path.join(self.tmp.name, "trace.jsonl")
+        chrome = os.path.join(self.tmp.name, "trace.json")
+
+        self.tracer.export(jsonl)
+        self.tracer.export(chrome)
+
+        with open(jsonl) as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual([line["name"] for line in lines], ["model", "retry"])
+        with open(chrome) as f:
+            trace_events = json.load(f)["traceEvents"]
+        self.assertEqual([e["ph"] for e in trace_events], ["M", "X", "i"])
+        self.assertEqual(trace_events[2]["args"], {"attempt": 1})
+
+    def test_tool_calls_are_traced(self):
+        tracer.enable()
+        self.addCleanup(setattr, tracer, "enabled", False)
+        function_call_part = MagicMock()
+        function_call_part.name = "get_file_content"
+        function_call_part.args = {"file_path": "lorem.txt"}
+
+        call_function(function_call_part)
+
+        span = tracer.events[-1]
+        self.assertEqual((span["name"], span["category"]), ("get_file_content", "tool"))
+        self.assertGreater(span["attrs"]["result_bytes"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
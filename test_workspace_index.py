@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+
+from functions.get_files_info import get_files_info
+from functions.workspace_index import IgnoreRules, WorkspaceIndex
+
+
+class TestWorkspaceIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        for path in ["main.py", "pkg/calc.py", "pkg/deep/util.py", "build/out.txt",
+                     "__pycache__/main.pyc", "notes.log"]:
+            self.write(path, "x")
+        self.write(".gitignore", "build/\n*.log\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, content):
+        full = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w") as f:
+            f.write(content)
+
+    def test_recursive_walk_skips_ignored(self):
+        index = WorkspaceIndex()
+
+        paths = [p for p, _, _ in index.walk(self.root, self.root, 0, IgnoreRules.for_root(self.root))]
+
+        self.assertEqual(
+            paths,
+            [".gitignore", "main.py", "pkg", "pkg/calc.py", "pkg/deep", "pkg/deep/util.py"],
+        )
+
+    def test_depth_limit(self):
+        index = WorkspaceIndex()
+
+        paths = [p for p, _, _ in index.walk(self.root, os.path.join(self.root, "pkg"), 1)]
+
+        self.assertEqual(paths, ["calc.py", "deep"])
+
+    def test_listing_refreshes_on_directory_change(self):
+        index = WorkspaceIndex()
+        pkg = os.path.join(self.root, "pkg")
+        before = index.list_dir(pkg)
+
+        self.write("pkg/new.py", "")
+        os.utime(pkg, ns=(0, os.stat(pkg).st_mtime_ns + 1))
+
+        self.assertEqual(len(index.list_dir(pkg)), len(before) + 1)
+
+    def test_invalidate_refreshes_sizes(self):
+        index = WorkspaceIndex()
+        index.list_dir(self.root)
+        mtime = os.stat(self.root).st_mtime_ns
+        self.write("main.py", "longer content")
+        os.utime(self.root, ns=(mtime, mtime))
+
+        self.assertEqual(dict((n, s) for n, _, s in index.list_dir(self.root))["main.py"], 1)
+        index.invalidate(os.path.join(self.root, "main.py"))
+        self.assertEqual(dict((n, s) for n, _, s in index.list_dir(self.root))["main.py"], 14)
+
+
+class TestGetFilesInfo(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        for i in range(5):
+            with open(os.path.join(self.tmp.name, f"f{i}.py"), "w") as f:
+                f.write("x" * i)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_default_format(self):
+        result = get_files_info(self.tmp.name, ".")
+
+        self.assertEqual(result.splitlines()[2], "- f2.py: file_size=2 bytes, is_dir=False")
+
+    def test_pagination(self):
+        result = get_files_info(self.tmp.name, ".", offset=2, limit=2)
+
+        self.assertEqual(
+            result.splitlines(),
+            [
+                "- f2.py: file_size=2 bytes, is_dir=False",
+                "- f3.py: file_size=3 bytes, is_dir=False",
+                "[Showing entries 3-4 of 5; call again with offset=4 for more]",
+            ],
+        )
+
+    def test_pattern_filter(self):
+        result = get_files_info(self.tmp.name, ".", pattern="f[13].py")
+
+        self.assertEqual(len(result.splitlines()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
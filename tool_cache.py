@@ -0,0 +1,99 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+
+from config import TOOL_CACHE_MAX_BYTES
+
+
+class ToolCache:
+    """
+    LRU cache of tool results with a byte budget.
+    Entries are keyed by tool name, absolute path and the remaining arguments, and
+    are only served while the path's (mtime, size) still matches what it was when
+    the result was produced. A directory's mtime changes when entries are added or
+    removed but not when a file inside it grows, so writes made through the agent
+    must also be reported with invalidate().
+    """
+
+    def __init__(self, max_bytes=TOOL_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(function_name, path, args):
+        other_args = json.dumps(args, sort_keys=True, default=str)
+        return function_name, os.path.abspath(path), other_args
+
+    @staticmethod
+    def validator(path):
+        """Return the (mtime, size) stamp for path, or None if it can't be stat'ed."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def get(self, key):
+        validator = self.validator(key[1])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != validator:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def __contains__(self, key):
+        """Whether get(key) would hit, without counting it as a hit or miss."""
+        validator = self.validator(key[1])
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] == validator
+
+    def put(self, key, validator, result):
+        """
+        Store result under key. The validator must be taken before the tool ran, so
+        a change made while it was running shows up as a miss on the next get().
+        """
+        size = len(result.encode("utf-8"))
+        if validator is None or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (validator, result, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, path):
+        """Drop entries for path, for anything below it and for every directory above it."""
+        path = os.path.abspath(path)
+        with self._lock:
+            for key in list(self._entries):
+                cached_path = key[1]
+                if (
+                    cached_path == path
+                    or path.startswith(cached_path.rstrip(os.sep) + os.sep)
+                    or cached_path.startswith(path + os.sep)
+                ):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        return f"Tool cache: {self.hits} hits, {self.misses} misses, {self._bytes} bytes cached"
+
+    def _remove(self, key):
+        self._bytes -= self._entries.pop(key)[2]
@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Tracer:
+    """
+    Collects timed spans and instant events from any thread. Tracing is off
+    until enable() is called, and while off span() only hands back its
+    attribute dict, so instrumented code pays next to nothing.
+    export() writes Chrome trace-event JSON for paths ending in .json (open it in
+    chrome://tracing or Perfetto) and one JSON object per line otherwise.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._threads = {}
+
+    def enable(self):
+        with self._lock:
+            self.enabled = True
+            self.events = []
+            self._origin = time.perf_counter()
+            self._threads = {}
+
+    def _thread(self):
+        # Small stable numbers read better in trace viewers than thread idents.
+        ident = threading.get_ident()
+        if ident not in self._threads:
+            self._threads[ident] = (len(self._threads) + 1, threading.current_thread().name)
+        return self._threads[ident][0]
+
+    def _record(self, event):
+        with self._lock:
+            event["thread"] = self._thread()
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, name, category="agent", **attrs):
+        """
+        Time the enclosed block. The yielded dict holds the span's attributes and
+        may be filled in from inside the block, e.g. with token counts.
+        """
+        if not self.enabled:
+            yield attrs
+            return
+        start = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._record({
+                "name": name,
+                "category": category,
+                "start_ms": (start - self._origin) * 1000,
+                "duration_ms": (time.perf_counter() - start) * 1000,
+                "attrs": attrs,
+            })
+
+    def event(self, name, category="agent", **attrs):
+        """Record an instant event, such as a retry."""
+        if self.enabled:
+            self._record({
+                "name": name,
+                "category": category,
+                "start_ms": (time.perf_counter() - self._origin) * 1000,
+                "attrs": attrs,
+            })
+
+    def export(self, path):
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event["start_ms"])
+            threads = dict(self._threads.values())
+        with open(path, "w") as f:
+            if path.endswith(".json"):
+                json.dump(self._chrome_trace(events, threads), f, default=str)
+            else:
+                for event in events:
+                    f.write(json.dumps(event, default=str) + "\n")
+
+    @staticmethod
+    def _chrome_trace(events, threads):
+        pid = os.getpid()
+        trace_events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        for event in events:
+            trace_event = {
+                "name": event["name"],
+                "cat": event["category"],
+                "ts": event["start_ms"] * 1000,
+                "pid": pid,
+                "tid": event["thread"],
+                "args": event["attrs"],
+            }
+            if "duration_ms" in event:
+                trace_event.update(ph="X", dur=event["duration_ms"] * 1000)
+            else:
+                trace_event.update(ph="i", s="t")
+            trace_events.append(trace_event)
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+
+def usage_attrs(usage_metadata):
+    """Token counts from a response's usage metadata, for span attributes."""
+    return {
+        "prompt_tokens": getattr(usage_metadata, "prompt_token_count", None),
+        "response_tokens": getattr(usage_metadata, "candidates_token_count", None),
+    }
+
+
+tracer = Tracer()